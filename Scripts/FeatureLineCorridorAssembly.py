@@ -2,7 +2,7 @@
 # Purpose: This tool normalizes center line networks by assembling them into continuous parallel corridors and
 # attaching a corridor ID that can be used with a dissolve to the input network.
 # Author: David Wasserman
-# Last Modified: 1/1/2020
+# Last Modified: 10/19/2026
 # Copyright: David Wasserman
 # Python Version:  2.7/3.6
 # --------------------------------
@@ -21,12 +21,16 @@
 # limitations under the License.
 # --------------------------------
 # Import Modules
-import arcpy
-import pandas as pd
-import numpy as np
 import os
+import linebackend
 import linelibrary as ll
 
+# Heavy modules load on first use so importing the tool (e.g. from lineworker.py) stays cheap.
+arcpy = ll.arcpy
+pd = ll.pd
+la = ll.la
+np = linebackend.LazyImport("numpy")
+
 
 def assemble_corridors_from_network(
     input_network,
@@ -34,6 +38,7 @@ def assemble_corridors_from_network(
     connected_range="0.5 Feet",
     parallel_threshold=15,
     near_table=None,
+    bearing_method="ENDPOINT",
 ):
     """This tool normalizes center line networks by assembling them into continuous parallel corridors and
     attaching a corridor ID that can be used with a dissolve to the input network.
@@ -43,23 +48,41 @@ def assemble_corridors_from_network(
     output_network - output network with attached corridor ids.
     connected_range - the distance between lines that is considered for a connected relationship.
     parallel_threshold - threshold of angles in degrees between parallel lines and non-parallel lines.
-    temp_near_table - temporary near table used to compute line relationships."""
+    temp_near_table - temporary near table used to compute line relationships.
+    bearing_method - bearing used for the parallel test. ENDPOINT uses the first to last point bearing, PCA uses the
+    principal direction of the line and MEAN uses the length weighted mean segment bearing. PCA and MEAN come from a
+    precomputed descriptor table so curved lines are classified by their overall orientation. ENDPOINT is the
+    default so existing outputs do not change."""
     near_table = os.path.join("in_memory", "Near_Table")
     bearing_field = "Azimuth"
     if near_table is None:
         near_table = os.path.join("in_memory", "Temp_Near_Table")
     arcpy.env.overwriteOutput = True
+    bearing_method = str(bearing_method).upper()
     ll.arc_print("Creating network copy...")
     if arcpy.Exists(output_network):
         arcpy.DeleteFeatures_management(output_network)
     arcpy.CopyFeatures_management(input_network, output_network)
-    ll.calculate_line_bearing(output_network, bearing_field, True)
-    ll.arc_print("Bearing field added...")
     desc = arcpy.Describe(output_network)
     oid = desc.OIDFieldName
-    line_bearing_df = ll.arcgis_table_to_df(output_network, [bearing_field])
-    line_bearing_df[bearing_field]
+    if bearing_method != "ENDPOINT" and desc.spatialReference.type == "Geographic":
+        arcpy.AddWarning(
+            "Descriptor bearings require a projected coordinate system, using ENDPOINT bearings instead."
+        )
+        bearing_method = "ENDPOINT"
+    if bearing_method == "ENDPOINT":
+        ll.calculate_line_bearing(output_network, bearing_field, True)
+        ll.arc_print("Bearing field added...")
+        line_bearing_df = ll.arcgis_table_to_df(output_network, [bearing_field])
+    else:
+        ll.arc_print("Building line descriptor table...")
+        descriptor_df = ll.line_descriptor_df(output_network)
+        descriptor_field = "MEAN_BEARING" if bearing_method == "MEAN" else "PCA_BEARING"
+        line_bearing_df = descriptor_df[[descriptor_field]].rename(
+            columns={descriptor_field: bearing_field}
+        )
     ll.arc_print("Generating near table for parallel analysis...")
+    near_stage = ll.profile_stage("near table")
     arcpy.GenerateNearTable_analysis(
         output_network,
         output_network,
@@ -68,6 +91,7 @@ def assemble_corridors_from_network(
         closest=False,
     )
     near_df = ll.arcgis_table_to_df(near_table)
+    near_stage.stop(len(near_df))
     near_df = near_df.merge(
         line_bearing_df, how="left", left_on="IN_FID", right_index=True
     )
@@ -77,9 +101,16 @@ def assemble_corridors_from_network(
     )
     near_df = near_df.rename(columns={bearing_field: "NEAR_" + str(bearing_field)})
     ll.arc_print("Determining smallest angle between two potential line directions...")
-    near_df_w_angle = ll.find_smallest_angle_column(
-        near_df, "IN_Azimuth", "NEAR_Azimuth"
-    )
+    if bearing_method == "ENDPOINT":
+        near_df_w_angle = ll.find_smallest_angle_column(
+            near_df, "IN_Azimuth", "NEAR_Azimuth"
+        )
+    else:
+        # Descriptor bearings are axial, so the parallel test is one array comparison over the near pairs.
+        near_df["Smallest_Angle"] = la.smallest_axial_angle(
+            near_df["IN_Azimuth"].values, near_df["NEAR_Azimuth"].values
+        )
+        near_df_w_angle = near_df
     near_df["Parallel_Lines"] = np.where(
         near_df["Smallest_Angle"] <= parallel_threshold, 1, 0
     )
@@ -114,6 +145,7 @@ def assemble_corridors_from_network(
     counter = 0
     current_corridor_id = 1
     ll.arc_print("Using relationship table to construct corridors...")
+    corridor_stage = ll.profile_stage("assemble corridors", len(unique_fids))
     for fid in unique_fids:
         if fid in visited_fids:
             continue
@@ -138,6 +170,7 @@ def assemble_corridors_from_network(
         else:
             pass
         counter += 1
+    corridor_stage.stop()
     corridor_container = []
     for corridor_id in corridor_ids:
         unique_ids = list(corridor_ids[corridor_id])
@@ -148,10 +181,15 @@ def assemble_corridors_from_network(
     angle_results = angle_results.merge(
         corridor_df, how="left", left_on="IN_FID", right_index=True
     )
+    if bearing_method != "ENDPOINT":
+        angle_results = angle_results.merge(
+            line_bearing_df, how="left", left_on="IN_FID", right_index=True
+        )
     angle_rec = angle_results.to_records()
     ll.arc_print("Joining Bearing & Corridor Fields...")
     arcpy.da.ExtendTable(output_network, oid, angle_rec, "IN_FID", False)
     ll.arc_print("Script Complete...")
+    ll.report_profile("assemble_corridors_from_network")
 
 
 # This test allows the script to be used from the operating
@@ -0,0 +1,282 @@
+# Name: FeatureLineDynamicSegmentation.py
+# Purpose: Split each line of a feature class into segments of a target count or target distance like Feature Line
+# Split, and aggregate an event table (crashes, counts) onto the segments by dynamic segmentation. Events are either
+# (route OID, measure) records or points snapped to the routes. Each event is assigned to its segment by a binary
+# search over the cut measures of all lines, and the event counts, sums and means per segment are computed in
+# vectorized passes instead of a spatial join.
+# The tool is not in the toolbox, it is called from Python or run by lineworker as the dynseg tool.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright: David Wasserman
+# Python Version:   3.7+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+# Import Modules
+import os
+import linelibrary as fll
+from FeatureLineSplit import (
+    CURVATURE_SPLIT_METHOD,
+    LINEAR_REFERENCE_FIELD_TYPES,
+    SPLIT_METHODS,
+)
+
+# arcpy is None outside of ArcGIS, file datasets then use the numpy geometry backend.
+arcpy = fll.arcpy
+
+EVENT_COUNT_FIELD = "EVENT_COUNT"
+
+
+# Function Definitions
+def segment_cut_measures(
+    in_fc,
+    fields,
+    f_dict,
+    out_count_value,
+    out_count_field,
+    split_method,
+    best_fit_bool,
+    events,
+):
+    """First pass over the lines. Computes the (from, to) cut measures of the segments of every line and locates
+    point events on their routes.
+    Parameters
+    ----------------
+    in_fc - input polyline feature class
+    fields - input fields starting with SHAPE@
+    f_dict - index dictionary of fields + OID@
+    out_count_value - the length or desired number of segments
+    out_count_field - optional field to use for custom splitting
+    split_method - determines if split value is treated as a length target or segment count target
+    best_fit_bool - determines if the length is rounded to be segments of equal length.
+    events - event columns from fll.read_line_events, MEASURE is filled in for point events
+    Returns
+    ------------
+    dictionary with the line OIDs, the interval offsets per line and the flat from/to measure arrays.
+    """
+    np = fll.np
+    route_oids, interval_counts, from_measures, to_measures = [], [], [], []
+    point_measures = None
+    if events["POINTS"] is not None:
+        point_measures = np.full(len(events["ROUTE"]), np.nan)
+    errors = fll.ErrorLog()
+    for singleline in fll.line_search_cursor(in_fc, fields + ["OID@"]):
+        oid = singleline[f_dict["OID@"]]
+        route_oids.append(oid)
+        interval_counts.append(0)
+        try:
+            linegeo = singleline[f_dict["SHAPE@"]]
+            split_value = fll.line_length(
+                singleline, out_count_field, out_count_value, f_dict
+            )
+            line_length = fll.geometry_backend.length(linegeo)
+            if str(split_method).upper() == "LENGTH":
+                measures = fll.split_measures_by_length(
+                    line_length, split_value, 0, best_fit_bool
+                )
+            else:
+                measures = fll.split_measures_by_count(line_length, split_value, 0)
+            if point_measures is not None:
+                start = np.searchsorted(events["ROUTE"], oid, "left")
+                end = np.searchsorted(events["ROUTE"], oid, "right")
+                point_measures[start:end] = fll.locate_points_on_line(
+                    linegeo, events["POINTS"][start:end]
+                )
+            from_measures.extend(from_measure for from_measure, _ in measures)
+            to_measures.extend(to_measure for _, to_measure in measures)
+            interval_counts[-1] = len(measures)
+        except Exception as e:
+            errors.record(oid, "measure", e)
+    errors.report()
+    if point_measures is not None:
+        events["MEASURE"] = point_measures
+    return {
+        "oids": np.asarray(route_oids, dtype=np.float64),
+        "offsets": np.concatenate([[0], np.cumsum(interval_counts, dtype=np.int64)]),
+        "from": np.asarray(from_measures, dtype=np.float64),
+        "to": np.asarray(to_measures, dtype=np.float64),
+    }
+
+
+def aggregate_events(cuts, events):
+    """Assigns the events to segments and aggregates them per segment.
+    Parameters
+    ----------------
+    cuts - cut measures from segment_cut_measures
+    events - event columns from fll.read_line_events with measures
+    Returns
+    ------------
+    tuple of the dictionary of per segment aggregate arrays and the number of unassigned events.
+    """
+    np = fll.np
+    # Route OIDs to route indexes by a binary search over the sorted line OIDs.
+    sorter = np.argsort(cuts["oids"], kind="stable")
+    sorted_oids = cuts["oids"][sorter]
+    position = np.minimum(
+        np.searchsorted(sorted_oids, events["ROUTE"]), max(len(sorted_oids) - 1, 0)
+    )
+    groups = np.full(len(events["ROUTE"]), -1, dtype=np.int64)
+    if len(sorted_oids):
+        matched = sorted_oids[position] == events["ROUTE"]
+        groups[matched] = sorter[position[matched]]
+    interval_index = fll.la.locate_in_intervals(
+        cuts["offsets"], cuts["from"], cuts["to"], groups, events["MEASURE"]
+    )
+    aggregates = fll.la.interval_aggregates(
+        interval_index, len(cuts["from"]), events["VALUES"]
+    )
+    return aggregates, int(np.count_nonzero(interval_index < 0))
+
+
+def feature_line_dynamic_segmentation(
+    in_fc,
+    out_count_value,
+    out_count_field,
+    split_method,
+    best_fit_bool,
+    event_table,
+    route_field,
+    measure_field,
+    value_fields,
+    out_fc,
+):
+    """This function will split each feature in a feature class into segments like feature_line_split and aggregate
+    the events of an event table onto the segments. Events are assigned to the segment of their route that starts at
+    or before their measure, events off their route or without a route in the input are reported as unassigned.
+    Parameters
+    ----------------
+    in_fc - input arc polyline to split
+    out_count_value - the length or desired number of segments
+    out_count_field - optional field to use for custom splitting using the desired type of out_count_value/split method
+    split_method - determines if split value is treated as a length target or segment count target
+    best_fit_bool - determines if the length is rounded to be segments of equal length.
+    event_table - table, feature class or file dataset of events
+    route_field - event field holding the OID of the input line of each event
+    measure_field - event field holding the distance along the line, if empty the event points are located on the lines
+    value_fields - optional list (or semicolon delimited string) of numeric event fields summed and averaged per segment
+    out_fc - output split feature class with the linear reference fields, EVENT_COUNT and the value aggregates
+    """
+    try:
+        split_methods = [
+            method for method in SPLIT_METHODS if method != CURVATURE_SPLIT_METHOD
+        ]
+        if str(split_method).upper() not in split_methods:
+            raise ValueError(
+                "Split method {0} is not one of {1}.".format(
+                    split_method, ", ".join(split_methods)
+                )
+            )
+        if isinstance(value_fields, str):
+            value_fields = [field for field in value_fields.split(";") if field]
+        value_fields = list(value_fields or [])
+        FileName = os.path.split(out_fc)[1]
+        preFields = fll.get_fields(in_fc)
+        fields = ["SHAPE@"] + preFields
+        f_dict = fll.construct_index_dict(fields + ["OID@"])
+        project_row = fll.compile_row_projector(fields, f_dict)
+        aggregate_names = ["COUNT"]
+        aggregate_field_types = [(EVENT_COUNT_FIELD, "int")]
+        for field in value_fields:
+            aggregate_names.extend([field + "_SUM", field + "_MEAN"])
+            aggregate_field_types.extend(
+                [(field + "_SUM", "float"), (field + "_MEAN", "float")]
+            )
+        segment_field_types = LINEAR_REFERENCE_FIELD_TYPES + aggregate_field_types
+        with fll.profile_stage("read events") as stage:
+            events = fll.read_line_events(
+                event_table, route_field, measure_field, value_fields
+            )
+            stage.rows = len(events["ROUTE"])
+        with fll.profile_stage("cut measures") as stage:
+            cuts = segment_cut_measures(
+                in_fc,
+                fields,
+                f_dict,
+                out_count_value,
+                out_count_field,
+                split_method,
+                best_fit_bool,
+                events,
+            )
+            stage.rows = len(cuts["oids"])
+        with fll.profile_stage("aggregate events") as stage:
+            aggregates, unassigned = aggregate_events(cuts, events)
+            stage.rows = len(events["ROUTE"])
+        fll.arc_print(
+            "Assigned {0} of {1} events to segments.".format(
+                len(events["ROUTE"]) - unassigned, len(events["ROUTE"])
+            ),
+            True,
+        )
+        with fll.profile_stage("create output"):
+            fll.create_line_feature_class(out_fc, in_fc, None, segment_field_types)
+        line_index = {oid: index for index, oid in enumerate(cuts["oids"].tolist())}
+        out_fields = fields + [name for name, _ in segment_field_types]
+        out_field_types = fll.get_field_types(in_fc, preFields) + segment_field_types
+        with fll.line_insert_cursor(
+            out_fc, out_fields, in_fc, field_types=out_field_types
+        ) as insertCursor:
+            fll.arc_print("Established insert cursor for " + str(FileName) + ".", True)
+            lineCounter = 0
+            errors = fll.ErrorLog()
+            process_stage = fll.profile_stage("split features")
+            for singleline in fll.line_search_cursor(in_fc, fields + ["OID@"]):
+                try:
+                    lineCounter += 1
+                    oid = singleline[f_dict["OID@"]]
+                    index = line_index[oid]
+                    start, end = cuts["offsets"][index], cuts["offsets"][index + 1]
+                    measures = list(
+                        zip(
+                            cuts["from"][start:end].tolist(),
+                            cuts["to"][start:end].tolist(),
+                        )
+                    )
+                    split_segment_list = fll.split_segments_at_measures(
+                        singleline[f_dict["SHAPE@"]], measures
+                    )
+                    # Unload by feature so partial segments are not made.
+                    segment_rows = []
+                    for seg_index, segment in enumerate(split_segment_list):
+                        interval = start + seg_index
+                        from_measure, to_measure = measures[seg_index]
+                        row = list(project_row(singleline, segment))
+                        row.extend([oid, seg_index + 1, from_measure, to_measure])
+                        row.extend(
+                            aggregates[name][interval].item()
+                            for name in aggregate_names
+                        )
+                        segment_rows.append(row)
+                    for row in segment_rows:
+                        insertCursor.insertRow(row)
+                    if lineCounter % 500 == 0:
+                        fll.arc_print(
+                            "Iterated through and segmented feature "
+                            + str(lineCounter)
+                            + ".",
+                            True,
+                        )
+                except Exception as e:
+                    errors.record(singleline[f_dict["OID@"]], "segment", e)
+            errors.report()
+            process_stage.stop(lineCounter)
+            fll.arc_print("Script Completed Successfully.", True)
+    except fll.ExecuteError:
+        fll.tool_status.fail(arcpy.GetMessages(2))
+    except Exception as e:
+        fll.tool_status.fail(e)
+    fll.report_profile("feature_line_dynamic_segmentation")
+
+    # End do_analysis function
@@ -22,12 +22,17 @@
 # limitations under the License.
 # --------------------------------
 # Import Modules
-import os, arcpy, math
+import os, math
+import itertools
 import linelibrary as fll
 
+# arcpy is None outside of ArcGIS, file datasets then use the numpy geometry backend.
+arcpy = fll.arcpy
+# Features pulled together in packed arrays.
+PULL_BATCH_FEATURES = 10000
+
 
 # Function Definitions
-@fll.arc_tool_report
 def pull_line_geometry(
     linegeometry, pull_value, end_point_bool=True, start_point_bool=True
 ):
@@ -44,7 +49,7 @@ def pull_line_geometry(
     - ArcPolyline: A modified ArcPolyline geometry with its start and/or end points retracted by the specified pull_value.
     """
     segment_returned = None
-    line_length = float(linegeometry.length)
+    line_length = fll.geometry_backend.length(linegeometry)
     end_point_start_position = line_length
     start_point_start_position = 0
     total_pull = 0
@@ -58,16 +63,130 @@ def pull_line_geometry(
         if total_pull >= line_length:
             segment_returned = None  # "The total pull value is greater than the length of the line, returning None."
         else:
-            segment_returned = linegeometry.segmentAlongLine(
-                start_point_start_position, end_point_start_position
+            segment_returned = fll.geometry_backend.segment_along_line(
+                linegeometry, start_point_start_position, end_point_start_position
             )
     except:  # Should the function failr, return null geometry.
         return None
     return segment_returned
 
 
+def pull_packed_lines(
+    packed, pull_value, end_point_bool=True, start_point_bool=True, index=None
+):
+    """Batch form of pull_line_geometry: pulls back the ends of every packed line in one segments_along_lines query.
+    Parameters
+    ----------------
+    packed - linearray.PackedLines
+    pull_value - the distance the ends are pulled back, a scalar or one value per feature
+    end_point_bool - if true the end point of each line is pulled back
+    start_point_bool - if true the start point of each line is pulled back
+    index - optional linearray.LengthIndex of the packed lines, a planar index is built if None
+    Returns
+    ------------
+    linearray.PackedLines with one feature per line, lines shorter than their total pull have no parts.
+    """
+    index = index or fll.la.LengthIndex(packed)
+    lengths = index.lengths
+    pull_value = fll.np.broadcast_to(
+        fll.np.asarray(pull_value, dtype=fll.np.float64), lengths.shape
+    )
+    starts = pull_value if start_point_bool else fll.np.zeros_like(lengths)
+    ends = lengths - pull_value if end_point_bool else lengths
+    total_pull = pull_value * (int(bool(start_point_bool)) + int(bool(end_point_bool)))
+    pulled = fll.np.flatnonzero(total_pull < lengths)
+    segments = fll.segments_along_lines(
+        packed, pulled, starts[pulled], ends[pulled], index=index
+    )
+    part_counts = fll.np.zeros(packed.feature_count, dtype=fll.np.int64)
+    part_counts[pulled] = fll.np.diff(segments.feature_offsets)
+    return fll.la.PackedLines.from_zm_columns(
+        segments.coords,
+        segments.part_offsets,
+        fll.np.concatenate([[0], fll.np.cumsum(part_counts)]),
+        packed.oids,
+        segments.zm_columns(),
+        segments.z is not None,
+        segments.m is not None,
+    )
+
+
+def pull_row_batches(
+    rows,
+    f_dict,
+    out_pull_value,
+    out_pull_field,
+    start_point_bool=True,
+    end_point_bool=True,
+    sr=None,
+    batch_size=PULL_BATCH_FEATURES,
+):
+    """Pulls cursor rows with planar math in batches of packed lines (see pull_packed_lines). Z and M values are
+    interpolated at the new ends. Null and zero length shapes and the rows of a batch that fails are yielded as not
+    pulled, so the caller can pull them one at a time and record the error of each feature.
+    Parameters
+    ----------------
+    rows - iterable of cursor rows with SHAPE@WKB and OID@ fields
+    f_dict - field dictionary of field name index pairs
+    out_pull_value - the distance the ends are pulled back
+    out_pull_field - optional field with the pull distance of each row
+    start_point_bool - start point option of feature_line_pull, passed to pull_packed_lines as end_point_bool the
+      way feature_line_pull has always passed it to pull_line_geometry
+    end_point_bool - end point option of feature_line_pull, passed to pull_packed_lines as start_point_bool
+    sr - spatial reference of the pulled geometries
+    batch_size - rows pulled together
+    Returns
+    ------------
+    generator of (row, pulled, geometry) tuples in input order. pulled is False for rows that were not pulled in a
+    batch, and the geometry is None for them and for lines shorter than their total pull.
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        try:
+            packed = fll.la.packed_lines_from_wkb(
+                [row[f_dict["SHAPE@WKB"]] for row in batch],
+                [row[f_dict["OID@"]] for row in batch],
+            )
+            pull_values = [
+                fll.line_length(row, out_pull_field, out_pull_value, f_dict)
+                for row in batch
+            ]
+            index = fll.la.LengthIndex(packed)
+            # The tool options are swapped like in the pull_line_geometry call of feature_line_pull.
+            pulled = pull_packed_lines(
+                packed,
+                pull_values,
+                end_point_bool=start_point_bool,
+                start_point_bool=end_point_bool,
+                index=index,
+            )
+            lines = fll.geometry_backend.from_wkb(
+                fll.la.packed_lines_to_wkb(pulled), sr
+            )
+        except Exception:
+            for row in batch:
+                yield row, False, None
+            continue
+        # Null and zero length shapes are pulled by the per feature path like they always have been.
+        has_length = index.lengths > 0
+        for row, line, batched in zip(batch, lines, has_length):
+            yield row, bool(batched), line if batched else None
+
+
 def feature_line_pull(
-    in_fc, out_pull_value, out_pull_field, start_point_bool, end_point_bool, out_fc
+    in_fc,
+    out_pull_value,
+    out_pull_field,
+    start_point_bool,
+    end_point_bool,
+    out_fc,
+    resume_bool=False,
+    checkpoint_features=0,
+    changeset_fc=None,
+    changeset_key_fields=None,
 ):
     """Take a feature class and pull back a line equal to a target distance from either a start or end point position.
     This version of the tool will join the original fields.
@@ -79,60 +198,104 @@ def feature_line_pull(
      start_point_bool (bool): A flag to indicate whether the start points of the lines should be retracted. If True, the start point of each line in the feature class is pulled back by the distance specified in out_pull_value.
      end_point_bool (bool): A flag to indicate whether the end points of the lines should be retracted. If True, the end point of each line in the feature class is pulled back by the distance specified in out_pull_value.
      out_fc (FeatureClass): The output feature class where the modified line geometries will be saved. This feature class will include the original attribute fields from in_fc, along with the new out_pull_field.
+     resume_bool (bool, optional): If True, a run that stopped is continued from its last checkpoint (see fll.RunCheckpoint).
+     checkpoint_features (int, optional): Input features per checkpoint, 0 does not record checkpoints.
+     changeset_fc (FeatureClass, optional): Output of the rows inserted, updated or deleted since the previous run (see fll.OutputChangeset).
+     changeset_key_fields (list, optional): Input fields identifying a line across runs, required with changeset_fc.
     """
     try:
-        arcpy.env.overwriteOutput = True
         OutWorkspace = os.path.split(out_fc)[0]
         FileName = os.path.split(out_fc)[1]
-        arcpy.CreateFeatureclass_management(
-            OutWorkspace,
-            FileName,
-            "POLYLINE",
-            in_fc,
-            spatial_reference=in_fc,
-            has_m="SAME_AS_TEMPLATE",
-            has_z="SAME_AS_TEMPLATE",
+        checkpoint = fll.RunCheckpoint(
+            out_fc,
+            [
+                "feature_line_pull",
+                in_fc,
+                out_pull_value,
+                out_pull_field,
+                start_point_bool,
+                end_point_bool,
+            ],
+            resume_bool,
+            checkpoint_features,
         )
         preFields = fll.get_fields(in_fc)
         fields = ["SHAPE@"] + preFields
-        cursor = arcpy.da.SearchCursor(in_fc, fields)
-        f_dict = fll.construct_index_dict(fields)
-        with arcpy.da.InsertCursor(out_fc, fields) as insertCursor:
+        changeset = fll.OutputChangeset(
+            out_fc, changeset_fc, changeset_key_fields, preFields, checkpoint.resuming
+        )
+        if not checkpoint.resuming:
+            with fll.profile_stage("create output"):
+                fll.create_line_feature_class(out_fc, in_fc)
+        # Results of unchanged features are reused from the result cache when one is set, otherwise the lines are
+        # pulled in batches of packed lines.
+        cache = fll.result_cache_session(
+            "feature_line_pull", [start_point_bool, end_point_bool]
+        )
+        read_fields = fields + ["OID@", "SHAPE@WKB"]
+        sr = fll.describe_line_spatial_reference(in_fc)[0]
+        cursor = fll.line_search_cursor(in_fc, read_fields)
+        f_dict = fll.construct_index_dict(read_fields)
+        project_row = fll.compile_row_projector(fields, f_dict)
+        with fll.line_insert_cursor(
+            out_fc, fields, in_fc, resume_rows=checkpoint.resume_rows
+        ) as insertCursor:
+            checkpoint.track(insertCursor)
             fll.arc_print("Established insert cursor for " + str(FileName) + ".", True)
             lineCounter = 0
             null_counter = 0
-            for singleline in cursor:
+            errors = fll.ErrorLog()
+            process_stage = fll.profile_stage("pull features")
+            rows = (row for row in cursor if not checkpoint.skip(row[f_dict["OID@"]]))
+            if cache is None:
+                results = pull_row_batches(
+                    rows,
+                    f_dict,
+                    out_pull_value,
+                    out_pull_field,
+                    start_point_bool=start_point_bool,
+                    end_point_bool=end_point_bool,
+                    sr=sr,
+                )
+            else:
+                results = ((row, False, None) for row in rows)
+            for singleline, batch_pulled, batch_line in results:
                 try:
                     segment_rows = []
                     lineCounter += 1
                     linegeo = singleline[f_dict["SHAPE@"]]
-                    # Function splits linegeometry based on method and split value
-                    split_segment_geometry = pull_line_geometry(
-                        linegeo,
-                        fll.line_length(
-                            singleline, out_pull_field, out_pull_value, f_dict
-                        ),
-                        start_point_bool,
-                        end_point_bool,
+                    pull_value = fll.line_length(
+                        singleline, out_pull_field, out_pull_value, f_dict
                     )
+                    cached = cache_key = None
+                    if cache is not None:
+                        cache_key = cache.key(
+                            singleline[f_dict["SHAPE@WKB"]], pull_value
+                        )
+                        cached = cache.lookup(cache_key)
+                    if batch_pulled:
+                        split_segment_geometry = batch_line
+                    elif cached:
+                        split_segment_geometry = fll.geometry_backend.from_wkb(
+                            cached[0], sr
+                        )[0]
+                    else:
+                        # Function splits linegeometry based on method and split value
+                        split_segment_geometry = pull_line_geometry(
+                            linegeo,
+                            pull_value,
+                            end_point_bool=start_point_bool,
+                            start_point_bool=end_point_bool,
+                        )
+                    if cache_key is not None and not cached:
+                        cache.store(
+                            cache_key,
+                            fll.geometry_backend.to_wkb([split_segment_geometry]),
+                        )
                     if split_segment_geometry is None:
                         null_counter += 1
                         # continue - # Uncomment to skip null geometries, otherwise empty geometries will be inserted.
-                    segID = 0
-                    try:
-                        segID += 1
-                        segmentedRow = fll.copy_altered_row(
-                            singleline,
-                            fields,
-                            f_dict,
-                            {"SHAPE@": split_segment_geometry},
-                        )
-                        segment_rows.append(segmentedRow)
-                    except:
-                        fll.arc_print(
-                            "Could not iterate through line segment " + str(segID) + "."
-                        )
-                        break
+                    segment_rows.append(project_row(singleline, split_segment_geometry))
                     for row in segment_rows:
                         insertCursor.insertRow(row)
                     if lineCounter % 500 == 0:
@@ -143,27 +306,30 @@ def feature_line_pull(
                             True,
                         )
                 except Exception as e:
-                    fll.arc_print(
-                        "Failed to iterate through and a pulled feature "
-                        + str(lineCounter)
-                        + ".",
-                        True,
-                    )
-                    fll.arc_print(e.args[0])
+                    errors.record(singleline[f_dict["OID@"]], "pull", e)
+                    checkpoint.feature_failed(singleline[f_dict["OID@"]])
+                else:
+                    checkpoint.feature_done(singleline[f_dict["OID@"]])
             if null_counter > 0:
-                arcpy.AddWarning(
+                fll.arc_warning(
                     "There were "
                     + str(null_counter)
                     + " features that were shorter than the pull value."
                 )
+            errors.report()
+            process_stage.stop(lineCounter)
             del cursor, insertCursor, fields, preFields, OutWorkspace, lineCounter
-            fll.arc_print("Script Completed Successfully.", True)
-    except arcpy.ExecuteError:
-        fll.arc_print(arcpy.GetMessages(2))
+        checkpoint.finish()
+        fll.report_result_cache(cache)
+        changeset.write()
+        fll.arc_print("Script Completed Successfully.", True)
+    except fll.ExecuteError:
+        fll.tool_status.fail(arcpy.GetMessages(2))
     except Exception as e:
-        fll.arc_print(e.args[0])
+        fll.tool_status.fail(e)
+    fll.report_profile("feature_line_pull")
 
-        # End do_analysis function
+    # End do_analysis function
 
 
 # This test allows the script to be used from the operating
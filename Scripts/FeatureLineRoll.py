@@ -22,14 +22,19 @@
 # limitations under the License.
 # --------------------------------
 # Import Modules
-import os, arcpy, math
+import os, math
+import itertools
 import linelibrary as fll
 
+# arcpy is None outside of ArcGIS, file datasets then use the numpy geometry backend.
+arcpy = fll.arcpy
+# Features rolled together in packed arrays when the input is projected.
+ROLL_BATCH_FEATURES = 10000
+
 
 # Function Definitions
 
 
-@fll.arc_tool_report
 def get_line_ends(linegeometry, pull_value, percentage=False):
     """This function will take an ArcPolyline and a pull value. The function returns
     a the start and end points of the line as separate geometries.
@@ -38,24 +43,248 @@ def get_line_ends(linegeometry, pull_value, percentage=False):
     linegeometry - arc polyline input
     pull_value - the distance or percentage the line will be pulled back from either the start or end point
     percentage - if true, pull value is treated as a percentage."""
-    line_length = 1 if percentage else float(linegeometry.length)
+    line_length = 1 if percentage else fll.geometry_backend.length(linegeometry)
     end_point_end_position = 1 if percentage else line_length
     start_point_end_position = 0
     try:
         end_point_start_position = line_length - pull_value
         start_point_start_position = 0 + pull_value
-        start_segment = linegeometry.segmentAlongLine(
-            start_point_start_position, start_point_end_position, percentage
+        start_segment = fll.geometry_backend.segment_along_line(
+            linegeometry,
+            start_point_start_position,
+            start_point_end_position,
+            percentage,
         )
-        end_segment = linegeometry.segmentAlongLine(
-            end_point_start_position, end_point_end_position, percentage
+        end_segment = fll.geometry_backend.segment_along_line(
+            linegeometry, end_point_start_position, end_point_end_position, percentage
         )
     except:  # This function fails if the line is shorter than the pull value, in this case no geometry is returned.
         return None, None
     return start_segment, end_segment
 
 
-def feature_line_roll(in_fc, extension_distance, end_sampling_percentage, out_fc):
+@fll.profiled
+def roll_line_geometry(
+    linegeometry, extension_distance, end_sampling_percentage, sr=None, method="PLANAR"
+):
+    """This function will take a polyline and extend its end points by the extension distance along the bearings
+    of the sampled start and end portions of the line. The arcpy backend uses pointFromAngleAndDistance with the
+    passed method, the numpy backend translates the end points in planar coordinates.
+    Parameters
+    ---------------------
+    linegeometry - polyline input
+    extension_distance - the distance to extend the line in both directions (units of projection)
+    end_sampling_percentage - the ratio of the line used to sample the start and end bearings
+    sr - spatial reference of the line
+    method - PLANAR or GEODESIC extension method (arcpy backend only)
+    Returns
+    ---------------------
+    polyline with the extended end points"""
+    start_seg, end_seg = get_line_ends(
+        linegeometry, float(end_sampling_percentage), True
+    )
+    start_bearing = fll.convert_to_azimuth(fll.calculate_segment_bearing(start_seg))
+    end_bearing = fll.convert_to_azimuth(fll.calculate_segment_bearing(end_seg))
+    if fll.geometry_backend.name == "arcpy":
+        start_start_pt = arcpy.PointGeometry(start_seg.firstPoint, sr)
+        end_end_pt = arcpy.PointGeometry(end_seg.lastPoint, sr)
+        new_start_end_pt = start_start_pt.pointFromAngleAndDistance(
+            start_bearing, extension_distance, method
+        ).getPart(0)
+        new_end_end_pt = end_end_pt.pointFromAngleAndDistance(
+            end_bearing, extension_distance, method
+        ).getPart(0)
+    else:  # Azimuths are converted back to math angles for the planar translation.
+        new_start_end_pt = fll.translate_point(
+            fll.geometry_backend.first_point(start_seg),
+            90.0 - start_bearing,
+            extension_distance,
+        )
+        new_end_end_pt = fll.translate_point(
+            fll.geometry_backend.last_point(end_seg),
+            90.0 - end_bearing,
+            extension_distance,
+        )
+    all_parts = fll.geometry_backend.parts(linegeometry)
+    all_parts[0].insert(0, new_start_end_pt)
+    all_parts[-1].append(new_end_end_pt)
+    return fll.geometry_backend.construct_polyline(all_parts, sr)
+
+
+def roll_packed_lines(packed, extension_distance, end_sampling_percentage, index=None):
+    """Batch form of roll_line_geometry with planar math: extends the ends of every packed line along the bearings
+    of its sampled start and end portions. The sampled points are found in points_along_lines queries over the parts
+    of each line in order. Only the first part of a multipart line gets the new start point and only its last part
+    the new end point, the inserts are placed through the part offsets without a loop over parts or vertices.
+    Parameters
+    ---------------------
+    packed - linearray.PackedLines
+    extension_distance - the distance to extend the lines in both directions, a scalar or one value per feature
+    end_sampling_percentage - the ratio of the line used to sample the start and end bearings
+    index - optional linearray.LengthIndex of the packed lines, a planar index is built if None
+    Returns
+    ---------------------
+    linearray.PackedLines with the extended lines, Z and M values of the new end points are extrapolated from the
+    sampled portions"""
+    np = fll.np
+    index = index or fll.la.LengthIndex(packed)
+    # Features without vertices are left as they are.
+    features = np.flatnonzero(np.diff(packed.vertex_offsets) > 0)
+    fraction = float(end_sampling_percentage)
+    first_vertex, last_vertex = (
+        packed.vertex_offsets[features],
+        packed.vertex_offsets[features + 1] - 1,
+    )
+    line_start = np.take(packed.coords, first_vertex, axis=0)
+    line_end = np.take(packed.coords, last_vertex, axis=0)
+    # The start sample ends the sampled start portion, so on a part boundary it is the end of the part before.
+    start_sample, start_z, start_m = fll.points_along_lines(
+        packed, features, fraction, True, index, at_part_end=True
+    )
+    end_sample, end_z, end_m = fll.points_along_lines(
+        packed, features, 1 - fraction, True, index
+    )
+    distance = np.broadcast_to(
+        np.asarray(extension_distance, dtype=np.float64), (packed.feature_count,)
+    )[features]
+
+    def extend(origin, target, from_point):
+        # Same angle conventions as calculate_segment_bearing, convert_to_azimuth and translate_point.
+        angle = np.degrees(
+            np.arctan2(target[:, 1] - origin[:, 1], target[:, 0] - origin[:, 0])
+        )
+        azimuth = np.where(
+            (angle <= 180) & (angle > 90), 360.0 - (angle - 90), np.abs(angle - 90)
+        )
+        radians = np.radians(90.0 - azimuth)
+        return from_point + distance[:, np.newaxis] * np.column_stack(
+            [np.cos(radians), np.sin(radians)]
+        )
+
+    # Z and M change along the extensions at their rate between the sampled points and the line ends.
+    start_span = np.hypot(*(line_start - start_sample).T)
+    end_span = np.hypot(*(line_end - end_sample).T)
+
+    def extrapolate(span, origin_values, target_values, from_values):
+        # The extension over the span scales the change of every column at once.
+        with np.errstate(invalid="ignore", divide="ignore"):
+            scale = np.where(span > 0, distance / span, 0.0)[:, np.newaxis]
+        return from_values + (target_values - origin_values) * scale
+
+    # The start segment runs back from the sampled point to the line start, as in get_line_ends.
+    new_start = extend(start_sample, line_start, start_sample)
+    new_end = extend(end_sample, line_end, line_end)
+    part_sizes = np.diff(packed.part_offsets)
+    first_parts, last_parts = (
+        packed.feature_offsets[features],
+        packed.feature_offsets[features + 1] - 1,
+    )
+    added = np.zeros(packed.part_count, dtype=np.int64)
+    np.add.at(added, first_parts, 1)
+    np.add.at(added, last_parts, 1)
+    part_offsets = np.concatenate([[0], np.cumsum(part_sizes + added)])
+    # Old vertices shift by the points added before them, one per started part and one per ended part.
+    vertex_part = packed.vertex_part_index()
+    starts_before = np.cumsum(np.bincount(first_parts, minlength=packed.part_count))
+    ends_before = np.concatenate(
+        [[0], np.cumsum(np.bincount(last_parts, minlength=packed.part_count))[:-1]]
+    )
+    moved = np.arange(packed.vertex_count) + (starts_before + ends_before)[vertex_part]
+    start_slots, end_slots = part_offsets[first_parts], part_offsets[last_parts + 1] - 1
+    # Every output vertex is gathered from the vertex moved to it or from the new end points stacked after the
+    # vertices, a gather is several times faster than scattering (n, k) rows.
+    source = np.zeros(packed.vertex_count + 2 * len(features), dtype=np.int64)
+    source[moved] = np.arange(packed.vertex_count)
+    source[start_slots] = packed.vertex_count + np.arange(len(features))
+    source[end_slots] = packed.vertex_count + len(features) + np.arange(len(features))
+
+    def insert(values, start_values, end_values):
+        return np.take(
+            np.concatenate([values, start_values, end_values]), source, axis=0
+        )
+
+    # Z and M are extrapolated and inserted together as the columns of one array.
+    columns = packed.zm_columns()
+    zm = None
+    if columns is not None:
+        start_zm = np.column_stack([v for v in (start_z, start_m) if v is not None])
+        end_zm = np.column_stack([v for v in (end_z, end_m) if v is not None])
+        first_zm = np.take(columns, first_vertex, axis=0)
+        last_zm = np.take(columns, last_vertex, axis=0)
+        zm = insert(
+            columns,
+            extrapolate(start_span, start_zm, first_zm, start_zm),
+            extrapolate(end_span, end_zm, last_zm, last_zm),
+        )
+    return fll.la.PackedLines.from_zm_columns(
+        insert(packed.coords, new_start, new_end),
+        part_offsets,
+        packed.feature_offsets,
+        packed.oids,
+        zm,
+        packed.z is not None,
+        packed.m is not None,
+    )
+
+
+def roll_row_batches(
+    rows,
+    f_dict,
+    extension_distance,
+    end_sampling_percentage,
+    sr=None,
+    batch_size=ROLL_BATCH_FEATURES,
+):
+    """Rolls cursor rows with planar math in batches of packed lines (see roll_packed_lines). Multipart lines are
+    handled through their part offsets, only the first part of each line gets a new start point and only its last
+    part a new end point. The rows of a batch that fails are yielded without a line, so the caller can roll them one
+    at a time and record the error of each feature.
+    Parameters
+    ----------------
+    rows - iterable of cursor rows with SHAPE@WKB and OID@ fields
+    f_dict - field dictionary of field name index pairs
+    extension_distance - the distance to extend the lines in both directions
+    end_sampling_percentage - the ratio of the line used to sample the start and end bearings
+    sr - spatial reference of the rolled geometries
+    batch_size - rows rolled together
+    Returns
+    ------------
+    generator of (row, rolled geometry) tuples in input order, with None instead of the geometry of rows that were
+    not rolled."""
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        try:
+            packed = fll.la.packed_lines_from_wkb(
+                [row[f_dict["SHAPE@WKB"]] for row in batch],
+                [row[f_dict["OID@"]] for row in batch],
+            )
+            rolled = roll_packed_lines(
+                packed, extension_distance, end_sampling_percentage
+            )
+            lines = fll.geometry_backend.from_wkb(
+                fll.la.packed_lines_to_wkb(rolled), sr
+            )
+        except Exception:
+            for row in batch:
+                yield row, None
+            continue
+        for row, line in zip(batch, lines):
+            yield row, line
+
+
+def feature_line_roll(
+    in_fc,
+    extension_distance,
+    end_sampling_percentage,
+    out_fc,
+    resume_bool=False,
+    checkpoint_features=0,
+    changeset_fc=None,
+    changeset_key_fields=None,
+):
     """Take a feature line and extend its end points based on the angle implied by a sample of the line identified
     from its start and end point. This tool has an optional ability to use the Integrate geoprocessing tools after
     line extensions to match the lines ahead of its vertex.
@@ -65,79 +294,71 @@ def feature_line_roll(in_fc, extension_distance, end_sampling_percentage, out_fc
     extension_distance - the distance to extend the line in both directions (units of projection)
     end_sampling_percentage - the length segment to sample end from in current projection units
     out_fc - output feature class with extended lines based on sampling of end segments
+    resume_bool - if true, a run that stopped is continued from its last checkpoint (see fll.RunCheckpoint)
+    checkpoint_features - input features per checkpoint, 0 does not record checkpoints
+    changeset_fc - optional output of the rows inserted, updated or deleted since the previous run (see
+    fll.OutputChangeset)
+    changeset_key_fields - input fields identifying a line across runs, required with changeset_fc
     """
     try:
-        arcpy.env.overwriteOutput = True
         OutWorkspace = os.path.split(out_fc)[0]
         FileName = os.path.split(out_fc)[1]
         fll.arc_print("Creating new feature class for lines...")
-        arcpy.CreateFeatureclass_management(
-            OutWorkspace,
-            FileName,
-            "POLYLINE",
-            in_fc,
-            spatial_reference=in_fc,
-            has_m="SAME_AS_TEMPLATE",
-            has_z="SAME_AS_TEMPLATE",
+        checkpoint = fll.RunCheckpoint(
+            out_fc,
+            ["feature_line_roll", in_fc, extension_distance, end_sampling_percentage],
+            resume_bool,
+            checkpoint_features,
         )
         preFields = fll.get_fields(in_fc)
         fields = ["SHAPE@"] + preFields
-        cursor = arcpy.da.SearchCursor(in_fc, fields)
-        f_dict = fll.construct_index_dict(fields)
-        sr = arcpy.Describe(in_fc).spatialReference
-        is_projected = sr.type == "Projected"
+        changeset = fll.OutputChangeset(
+            out_fc, changeset_fc, changeset_key_fields, preFields, checkpoint.resuming
+        )
+        if not checkpoint.resuming:
+            with fll.profile_stage("create output"):
+                fll.create_line_feature_class(out_fc, in_fc)
+        sr, is_projected = fll.describe_line_spatial_reference(in_fc)
         if not is_projected:
-            arcpy.AddWarning(
+            fll.arc_warning(
                 "This tool works best on a projected coordinate system. Please reprojected for best results."
             )
+        # Projected lines are rolled with planar math in batches of packed lines.
+        read_fields = fields + ["OID@"] + (["SHAPE@WKB"] if is_projected else [])
+        cursor = fll.line_search_cursor(in_fc, read_fields)
+        f_dict = fll.construct_index_dict(read_fields)
+        project_row = fll.compile_row_projector(fields, f_dict)
         fll.arc_print("Extending lines based on heading calculations...")
-        with arcpy.da.InsertCursor(out_fc, fields) as insertCursor:
+        with fll.line_insert_cursor(
+            out_fc, fields, in_fc, resume_rows=checkpoint.resume_rows
+        ) as insertCursor:
+            checkpoint.track(insertCursor)
             lineCounter = 0
             fll.arc_print("Established insert cursor for " + str(FileName) + ".", True)
-            for singleline in cursor:
+            errors = fll.ErrorLog()
+            process_stage = fll.profile_stage("roll features")
+            rows = (row for row in cursor if not checkpoint.skip(row[f_dict["OID@"]]))
+            if is_projected:
+                results = roll_row_batches(
+                    rows, f_dict, extension_distance, end_sampling_percentage, sr
+                )
+            else:
+                results = ((row, None) for row in rows)
+            for singleline, new_line in results:
                 try:
-                    segment_rows = []
                     lineCounter += 1
-                    linegeo = singleline[f_dict["SHAPE@"]]
-                    # Function splits line geometry based on method and split value
-                    start_seg, end_seg = get_line_ends(
-                        linegeo, float(end_sampling_percentage), True
-                    )
-                    method = "PLANAR" if is_projected else "GEODESIC"
-                    start_bearing = fll.convert_to_azimuth(
-                        fll.calculate_segment_bearing(start_seg)
-                    )
-                    end_bearing = fll.convert_to_azimuth(
-                        fll.calculate_segment_bearing(end_seg)
-                    )
-                    start_start_pt = arcpy.PointGeometry(start_seg.firstPoint, sr)
-                    end_end_pt = arcpy.PointGeometry(end_seg.lastPoint, sr)
-                    new_start_end_pt = start_start_pt.pointFromAngleAndDistance(
-                        start_bearing, extension_distance, method
-                    )
-                    new_end_end_pt = end_end_pt.pointFromAngleAndDistance(
-                        end_bearing, extension_distance, method
-                    )
-                    segID = 0
-                    part_number = 0
-                    all_parts = []
-                    for part in linegeo:
-                        part_list = []
-                        point_number = 0
-                        for point in linegeo.getPart(part_number):
-                            if part_number == 0 and point_number == 0:
-                                part_list.append(new_start_end_pt.getPart(0))
-                            if point:
-                                part_list.append(point)
-                            point_number += 1
-                        all_parts.append(part_list)
-                        part_number += 1
-                    all_parts[-1].append(new_end_end_pt.getPart(0))
-                    all_pt_array = arcpy.Array(all_parts)
-                    new_line = arcpy.Polyline(all_pt_array, sr)
-                    row = fll.copy_altered_row(
-                        singleline, fields, f_dict, {"SHAPE@": new_line}
-                    )
+                    if new_line is None:
+                        linegeo = singleline[f_dict["SHAPE@"]]
+                        # Function extends line geometry based on the bearing of its sampled ends
+                        method = "PLANAR" if is_projected else "GEODESIC"
+                        new_line = roll_line_geometry(
+                            linegeo,
+                            extension_distance,
+                            end_sampling_percentage,
+                            sr,
+                            method,
+                        )
+                    row = project_row(singleline, new_line)
                     insertCursor.insertRow(row)
                     if lineCounter % 500 == 0:
                         fll.arc_print(
@@ -147,15 +368,22 @@ def feature_line_roll(in_fc, extension_distance, end_sampling_percentage, out_fc
                             True,
                         )
                 except Exception as e:
-                    fll.arc_print("Failed to iterate through features.", True)
-                    fll.arc_print(e.args[0])
+                    errors.record(singleline[f_dict["OID@"]], "roll", e)
+                    checkpoint.feature_failed(singleline[f_dict["OID@"]])
+                else:
+                    checkpoint.feature_done(singleline[f_dict["OID@"]])
+            errors.report()
+            process_stage.stop(lineCounter)
+        checkpoint.finish()
+        changeset.write()
         fll.arc_print("Script Completed Successfully.", True)
-    except arcpy.ExecuteError:
-        fll.arc_print(arcpy.GetMessages(2))
+    except fll.ExecuteError:
+        fll.tool_status.fail(arcpy.GetMessages(2))
     except Exception as e:
-        fll.arc_print(e.args[0])
+        fll.tool_status.fail(e)
+    fll.report_profile("feature_line_roll")
 
-        # End do_analysis function
+    # End do_analysis function
 
 
 # This test allows the script to be used from the operating
@@ -0,0 +1,193 @@
+# Name: FeatureLineRollingStatistics.py
+# Purpose: Compute rolling linear statistics along routes. The input is a set of segments ordered along routes, such
+# as the output of Feature Line Split with linear referencing, and each segment gets the sum, mean and maximum of
+# attribute fields over a window of a configurable length centered on the segment. Windows are computed with prefix
+# sums and a sparse table over measure sorted arrays, so the cost does not grow with the window length.
+# The tool is not in the toolbox, it is called from Python or run by lineworker as the rolling tool.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright: David Wasserman
+# Python Version:   3.7+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+# Import Modules
+import os
+import linelibrary as fll
+
+# arcpy is None outside of ArcGIS, file datasets then use the numpy geometry backend.
+arcpy = fll.arcpy
+
+WINDOW_COUNT_FIELD = "WINDOW_COUNT"
+# Output field suffix of each statistic returned by linearray.rolling_window_statistics.
+ROLLING_STATISTIC_SUFFIXES = [("_SUM", "_RSUM"), ("_MEAN", "_RMEAN"), ("_MAX", "_RMAX")]
+
+
+# Function Definitions
+def read_route_measures(
+    in_fc, route_field, from_measure_field, to_measure_field, statistic_fields
+):
+    """Reads the route, measure and statistic columns of the segments in cursor order.
+    Parameters
+    ----------------
+    in_fc - input segments
+    route_field - field identifying the route of each segment
+    from_measure_field - field with the start measure of each segment along its route
+    to_measure_field - optional field with the end measure, if given the segment midpoint is used as its measure
+    statistic_fields - list of numeric fields
+    Returns
+    ------------
+    tuple of the route index array, the measure array and a dictionary of statistic field arrays.
+    """
+    np = fll.np
+    measure_fields = [from_measure_field] + (
+        [to_measure_field] if to_measure_field else []
+    )
+    route_index = {}
+    groups, measures = [], []
+    values = [[] for _ in statistic_fields]
+    for row in fll.line_search_cursor(
+        in_fc, [route_field] + measure_fields + list(statistic_fields)
+    ):
+        groups.append(route_index.setdefault(row[0], len(route_index)))
+        if to_measure_field:
+            from_measure, to_measure = row[1], row[2]
+            if from_measure is None or to_measure is None:
+                measures.append(None)
+            else:
+                measures.append((from_measure + to_measure) / 2.0)
+        else:
+            measures.append(row[1])
+        for column, value in zip(values, row[len(measure_fields) + 1 :]):
+            column.append(value)
+
+    def to_array(column):
+        return np.array(
+            [np.nan if value is None else value for value in column], dtype=np.float64
+        )
+
+    return (
+        np.asarray(groups, dtype=np.int64),
+        to_array(measures),
+        {field: to_array(column) for field, column in zip(statistic_fields, values)},
+    )
+
+
+def feature_line_rolling_statistics(
+    in_fc,
+    route_field,
+    from_measure_field,
+    to_measure_field,
+    statistic_fields,
+    window_length,
+    out_fc,
+):
+    """This function will compute windowed sums, means and maxima of attribute fields of segments along routes.
+    The window of a segment is centered on its measure (the midpoint of its from/to measures) and holds the segments
+    of the same route whose measures are within half the window length. Segments without a measure get no window.
+    Parameters
+    ----------------
+    in_fc - input segments, for example the output of feature_line_split with linear_reference_bool set
+    route_field - field identifying the route of each segment, such as PARENT_OID
+    from_measure_field - field with the start measure of each segment, such as FROM_MEASURE
+    to_measure_field - optional field with the end measure of each segment, such as TO_MEASURE
+    statistic_fields - list (or semicolon delimited string) of numeric fields to compute rolling statistics for
+    window_length - length of the window in the units of the measures
+    out_fc - output feature class with the input fields, WINDOW_COUNT and a _RSUM, _RMEAN and _RMAX field for each
+    statistic field"""
+    try:
+        if isinstance(statistic_fields, str):
+            statistic_fields = [field for field in statistic_fields.split(";") if field]
+        statistic_fields = list(statistic_fields or [])
+        window_length = float(window_length)
+        if window_length < 0:
+            raise ValueError("The window length must not be negative.")
+        FileName = os.path.split(out_fc)[1]
+        preFields = fll.get_fields(in_fc)
+        fields = ["SHAPE@"] + preFields
+        f_dict = fll.construct_index_dict(fields + ["OID@"])
+        project_row = fll.compile_row_projector(fields, f_dict)
+        statistic_names = [WINDOW_COUNT_FIELD]
+        statistic_field_types = [(WINDOW_COUNT_FIELD, "int")]
+        for field in statistic_fields:
+            for suffix, out_suffix in ROLLING_STATISTIC_SUFFIXES:
+                statistic_names.append(field + suffix)
+                statistic_field_types.append((field + out_suffix, "float"))
+        with fll.profile_stage("read measures") as stage:
+            groups, measures, values = read_route_measures(
+                in_fc,
+                route_field,
+                from_measure_field,
+                to_measure_field,
+                statistic_fields,
+            )
+            stage.rows = len(groups)
+        with fll.profile_stage("rolling statistics") as stage:
+            has_measure = ~fll.np.isnan(measures)
+            statistics = fll.la.rolling_window_statistics(
+                groups[has_measure],
+                measures[has_measure],
+                {field: value[has_measure] for field, value in values.items()},
+                window_length,
+            )
+            # Statistics by input row, None for rows without a measure.
+            segment_statistics = [None] * len(groups)
+            columns = [statistics[name].tolist() for name in statistic_names]
+            for position, index in enumerate(fll.np.flatnonzero(has_measure).tolist()):
+                segment_statistics[index] = [column[position] for column in columns]
+            stage.rows = len(groups)
+        with fll.profile_stage("create output"):
+            fll.create_line_feature_class(out_fc, in_fc, None, statistic_field_types)
+        out_fields = fields + [name for name, _ in statistic_field_types]
+        out_field_types = fll.get_field_types(in_fc, preFields) + statistic_field_types
+        empty_statistics = [None] * len(statistic_names)
+        with fll.line_insert_cursor(
+            out_fc, out_fields, in_fc, field_types=out_field_types
+        ) as insertCursor:
+            fll.arc_print("Established insert cursor for " + str(FileName) + ".", True)
+            lineCounter = 0
+            errors = fll.ErrorLog()
+            process_stage = fll.profile_stage("write statistics")
+            for singleline in fll.line_search_cursor(in_fc, fields + ["OID@"]):
+                try:
+                    row_statistics = segment_statistics[lineCounter] or empty_statistics
+                    lineCounter += 1
+                    row = list(project_row(singleline, singleline[f_dict["SHAPE@"]]))
+                    insertCursor.insertRow(
+                        row
+                        + [
+                            None if value != value else value
+                            for value in row_statistics
+                        ]
+                    )
+                    if lineCounter % 500 == 0:
+                        fll.arc_print(
+                            "Iterated through and wrote statistics for feature "
+                            + str(lineCounter)
+                            + ".",
+                            True,
+                        )
+                except Exception as e:
+                    errors.record(singleline[f_dict["OID@"]], "statistics", e)
+            errors.report()
+            process_stage.stop(lineCounter)
+            fll.arc_print("Script Completed Successfully.", True)
+    except fll.ExecuteError:
+        fll.tool_status.fail(arcpy.GetMessages(2))
+    except Exception as e:
+        fll.tool_status.fail(e)
+    fll.report_profile("feature_line_rolling_statistics")
+
+    # End do_analysis function
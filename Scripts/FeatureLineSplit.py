@@ -23,45 +23,299 @@
 # limitations under the License.
 # --------------------------------
 # Import Modules
-import os, arcpy, math
+import itertools
+import os, math
 import linelibrary as fll
 
+# arcpy is None outside of ArcGIS, file datasets then use the numpy geometry backend.
+arcpy = fll.arcpy
+
+# FULL copies the input attributes to every segment, BROADCAST writes the same output by broadcasting the attributes
+# of each input to its segments in columnar batches, KEYS_ONLY writes only the segments with their parent OID and
+# segment ID for a later join.
+SPLIT_OUTPUT_MODES = ["FULL", "BROADCAST", "KEYS_ONLY"]
+KEY_FIELD_TYPES = [("PARENT_OID", "int"), ("SEG_ID", "int")]
+# Linear referencing fields of each segment: the input OID, the segment index and the from/to distances along the
+# input line.
+LINEAR_REFERENCE_FIELD_TYPES = [
+    ("PARENT_OID", "int"),
+    ("SEG_INDEX", "int"),
+    ("FROM_MEASURE", "float"),
+    ("TO_MEASURE", "float"),
+]
+# With the CURVATURE split method the split value is the cumulative turning angle in degrees between split points.
+CURVATURE_SPLIT_METHOD = "CURVATURE"
+# Split methods of the toolbox, LENGTH and SEGMENT COUNT, with COUNT accepted for SEGMENT COUNT.
+SPLIT_METHODS = ["LENGTH", "SEGMENT COUNT", "COUNT", CURVATURE_SPLIT_METHOD]
+# Features split together in packed arrays by the LENGTH and COUNT methods.
+SPLIT_BATCH_FEATURES = 10000
+
 
 # Function Definitions
 # @fll.arc_tool_report
+@fll.profiled
 def split_line_geometry(
     linegeometry,
     split_value,
     split_method="LENGTH",
     overlap_percentage=0,
     best_fit_bool=True,
+    return_measures=False,
+    populate_m=False,
+    min_length=0.0,
+    max_length=None,
+    cut_measures=None,
+    cut_tolerance=0.0,
 ):
-    """This function will take an ArcPolyline, a split value, a split method of either 'LENGTH' or 'SEGMENT COUNT', and
+    """This function will take an ArcPolyline, a split value, a split method of either 'LENGTH', 'CURVATURE' or 'SEGMENT COUNT', and
     boolean that determines if the lines split are the best of fit based on the length. The function returns a list of
     line geometries whose length and number are determined by the split value, split method, and best fit settings.
     Parameters
     ----------------
     linegeometry - arc polyline
-    split_value - the length in current projection or desired number of segments
-    split_method - determines if split value is treated as a length target or segment count target
+    split_value - the length in current projection, desired number of segments or turning angle in degrees
+    split_method - determines if split value is treated as a length target, segment count target or turning angle
     overlap_percentage - the amount lines will overlap in terms of a percentage of the target length. No overlap at end points.
     best_fit_bool -  determines if the length is rounded to be segments of equal length.
+    return_measures - if true the (from, to) measures of the segments are returned with the segments
+    populate_m - if true the M values of the segments are set to their distance along the input line
+    min_length - minimum segment length of the CURVATURE split method
+    max_length - optional maximum segment length of the CURVATURE split method
+    cut_measures - optional list of distances along the line where it is cut before the pieces are split
+    cut_tolerance - cuts within this distance of a line end or another cut are dropped
     Returns
     ------------
-    segment_list - list of split geometries.
+    segment_list - list of split geometries, or a tuple of the segment list and the list of (from, to) measures.
     """
-    segment_list = []
-    if str(split_method).upper() == "LENGTH":
-        segment_list = fll.split_segment_by_length(
-            linegeometry, split_value, overlap_percentage, best_fit_bool
+    line_length = fll.geometry_backend.length(linegeometry)
+    if str(split_method).upper() == CURVATURE_SPLIT_METHOD:
+        measures = fll.split_measures_by_curvature(
+            linegeometry, split_value, min_length, max_length
         )
+        if cut_measures:
+            measures = add_cuts_to_measures(measures, cut_measures, cut_tolerance)
     else:
-        segment_list = fll.split_segment_by_count(
-            linegeometry, split_value, overlap_percentage
+        if str(split_method).upper() == "LENGTH":
+
+            def measure_piece(piece_length):
+                return fll.split_measures_by_length(
+                    piece_length, split_value, overlap_percentage, best_fit_bool
+                )
+
+        else:
+
+            def measure_piece(piece_length):
+                return fll.split_measures_by_count(
+                    piece_length, split_value, overlap_percentage
+                )
+
+        # Cut pieces are split by the length or count target on their own.
+        measures = fll.split_measures_at_cuts(
+            line_length, cut_measures or [], measure_piece, cut_tolerance
         )
+    segment_list = fll.split_segments_at_measures(linegeometry, measures, populate_m)
+    if return_measures:
+        return segment_list, measures
     return segment_list
 
 
+def add_cuts_to_measures(measures, cut_measures, cut_tolerance=0.0):
+    """Adds cuts to the (from, to) measures of non overlapping segments covering a line.
+    Parameters
+    ----------------
+    measures - list of (from, to) measures, the last to measure is the line length
+    cut_measures - list of distances along the line to cut at
+    cut_tolerance - cuts within this distance of a line end or another cut are dropped
+    Returns
+    ------------
+    list of (from, to) measures."""
+    if not measures:
+        return measures
+    boundaries = list(cut_measures) + [to_measure for _, to_measure in measures[:-1]]
+    return fll.split_measures_at_cuts(measures[-1][1], boundaries, None, cut_tolerance)
+
+
+def line_cut_measures(in_fc, cut_at_line_ends_bool, cut_points_fc, cut_tolerance):
+    """Finds where each line is met by the end points of other lines and by external points within a tolerance, with
+    one grid spatial index query for the whole input (see linearray.points_near_lines).
+    Parameters
+    ----------------
+    in_fc - input polyline feature class or file dataset
+    cut_at_line_ends_bool - if true lines are cut where the end points of other input lines meet them
+    cut_points_fc - optional point feature class or file dataset of external cut points
+    cut_tolerance - search distance of the cut points
+    Returns
+    ------------
+    dictionary of the sorted list of cut measures of each input OID with cuts."""
+    np = fll.np
+    packed = fll.feature_class_to_packed_lines(in_fc)
+    point_arrays, feature_arrays = [np.empty((0, 2))], [np.empty(0, dtype=np.int64)]
+    if cut_at_line_ends_bool:
+        end_points, end_features = fll.la.line_end_points(packed)
+        point_arrays.append(end_points)
+        feature_arrays.append(end_features)
+    if cut_points_fc:
+        wkb_geometries = [
+            row[0]
+            for row in fll.line_search_cursor(cut_points_fc, ["SHAPE@WKB"], stages=[])
+        ]
+        cut_points, _ = fll.la.points_from_wkb(wkb_geometries)
+        point_arrays.append(cut_points)
+        feature_arrays.append(np.full(len(cut_points), -1, dtype=np.int64))
+    _, features, measures, _ = fll.la.points_near_lines(
+        packed,
+        np.concatenate(point_arrays),
+        cut_tolerance,
+        np.concatenate(feature_arrays),
+    )
+    order = np.lexsort((measures, features))
+    cuts = {}
+    for feature, measure in zip(features[order].tolist(), measures[order].tolist()):
+        cuts.setdefault(packed.oids[feature].item(), []).append(measure)
+    return cuts
+
+
+def curvature_split_measures(
+    in_fc, out_count_value, out_count_field, min_length=0.0, max_length=None
+):
+    """Splits all lines of the input where they bend in one pass over their packed vertex arrays, see
+    linearray.curvature_split_measures.
+    Parameters
+    ----------------
+    in_fc - input polyline feature class or file dataset
+    out_count_value - the cumulative turning angle in degrees between split points
+    out_count_field - optional field with the turning angle of each line
+    min_length - minimum segment length
+    max_length - optional maximum segment length
+    Returns
+    ------------
+    dictionary of the list of (from, to) measures of the segments of each input OID."""
+    fields = ["SHAPE@WKB", "OID@"] + (
+        [out_count_field] if out_count_field and out_count_field != "#" else []
+    )
+    f_dict = fll.construct_index_dict(fields)
+    oids, wkb_geometries, turn_angles = [], [], []
+    for row in fll.line_search_cursor(in_fc, fields):
+        oids.append(row[f_dict["OID@"]])
+        wkb_geometries.append(row[f_dict["SHAPE@WKB"]])
+        turn_angles.append(
+            fll.line_length(row, out_count_field, out_count_value, f_dict)
+        )
+    packed = fll.la.packed_lines_from_wkb(wkb_geometries, oids)
+    offsets, from_measures, to_measures = fll.la.curvature_split_measures(
+        packed, turn_angles, min_length, max_length
+    )
+    measures = list(zip(from_measures.tolist(), to_measures.tolist()))
+    offsets = offsets.tolist()
+    return {
+        oid: measures[offsets[index] : offsets[index + 1]]
+        for index, oid in enumerate(oids)
+    }
+
+
+def linear_reference_values(parent_oid, measures, reference_fields):
+    """Returns a tuple of linear reference values per segment, ordered as the reference fields.
+    Parameters
+    ----------------
+    parent_oid - OID of the split input feature
+    measures - list of (from, to) measures of the segments
+    reference_fields - names of the LINEAR_REFERENCE_FIELD_TYPES fields that are written
+    Returns
+    ------------
+    list of value tuples."""
+    values = []
+    for seg_index, (from_measure, to_measure) in enumerate(measures, 1):
+        row = {
+            "PARENT_OID": parent_oid,
+            "SEG_INDEX": seg_index,
+            "FROM_MEASURE": from_measure,
+            "TO_MEASURE": to_measure,
+        }
+        values.append(tuple(row[field] for field in reference_fields))
+    return values
+
+
+def split_row_batches(
+    rows,
+    f_dict,
+    out_count_value,
+    out_count_field,
+    split_method,
+    overlap_percentage,
+    best_fit_bool,
+    populate_m=False,
+    sr=None,
+    batch_size=SPLIT_BATCH_FEATURES,
+):
+    """Splits cursor rows by length or count in batches of packed lines. A sizing pass computes the exact segment
+    count and offsets of every line from its length (see linearray.split_segment_counts), so the segments of a batch
+    are cut into arrays allocated once instead of growing per feature lists. The rows of a batch that fails, and rows
+    without a shape or with a zero length, are yielded without segments, so the caller can split them one at a time
+    and record the error of each feature.
+    Parameters
+    ----------------
+    rows - iterable of cursor rows with SHAPE@WKB and OID@ fields
+    f_dict - field dictionary of field name index pairs
+    out_count_value - the length or desired number of segments
+    out_count_field - optional field with the length or number of segments of each row
+    split_method - LENGTH, any other method splits by count
+    overlap_percentage - the amount lines will overlap in terms of a percentage of the target length
+    best_fit_bool - determines if the length is rounded to be segments of equal length
+    populate_m - if true the segment M values are set to their distance along the input line
+    sr - spatial reference of the segment geometries
+    batch_size - rows split together
+    Returns
+    ------------
+    generator of (row, (segment list, list of (from, to) measures)) tuples in input order, with None instead of the
+    segments of rows that were not split."""
+    method = "LENGTH" if str(split_method).upper() == "LENGTH" else "COUNT"
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        try:
+            packed = fll.la.packed_lines_from_wkb(
+                [row[f_dict["SHAPE@WKB"]] for row in batch],
+                [row[f_dict["OID@"]] for row in batch],
+            )
+            split_values = [
+                fll.line_length(row, out_count_field, out_count_value, f_dict)
+                for row in batch
+            ]
+            index = fll.la.LengthIndex(packed)
+            pieces, offsets, from_measures, to_measures = fll.la.split_lines(
+                packed,
+                split_values,
+                method,
+                overlap_percentage,
+                best_fit_bool,
+                index=index,
+            )
+            if populate_m:
+                piece_measures, _ = fll.la.vertex_measures(pieces)
+                pieces.m = piece_measures + fll.np.repeat(
+                    from_measures,
+                    fll.np.diff(pieces.part_offsets[pieces.feature_offsets]),
+                )
+            segments = fll.geometry_backend.from_wkb(
+                fll.la.packed_lines_to_wkb(pieces), sr
+            )
+            measures = list(zip(from_measures.tolist(), to_measures.tolist()))
+        except Exception:
+            for row in batch:
+                yield row, None
+            continue
+        # Null and zero length shapes fail in the per feature path like they always have.
+        has_length = index.lengths > 0
+        for feature, row in enumerate(batch):
+            if not has_length[feature]:
+                yield row, None
+                continue
+            start, end = offsets[feature], offsets[feature + 1]
+            yield row, (segments[start:end], measures[start:end])
+
+
 def feature_line_split(
     in_fc,
     out_count_value,
@@ -70,6 +324,18 @@ def feature_line_split(
     overlap_percentage,
     best_fit_bool,
     out_fc,
+    output_mode="FULL",
+    linear_reference_bool=False,
+    populate_m_bool=False,
+    min_segment_length=0.0,
+    max_segment_length=None,
+    cut_at_line_ends_bool=False,
+    cut_points_fc=None,
+    cut_tolerance=0.0,
+    resume_bool=False,
+    checkpoint_features=0,
+    changeset_fc=None,
+    changeset_key_fields=None,
 ):
     """This function will split each feature in a feature class into a desired number of equal length segments based
     on a specified distance or target segment count based on an out count value or field.
@@ -78,64 +344,273 @@ def feature_line_split(
     in_fc - input arc polyline to split
     out_count_value - the length or desired number of segments
     out_count_field - optional field to use for custom splitting using the desired type of out_count_value/split method
-    split_method- determines if split value is treated as a length target or segment count target
+    split_method- determines if split value is treated as a length target, segment count target or, with CURVATURE,
+    the cumulative turning angle in degrees between split points (overlap is not applied to CURVATURE splits), one
+    of SPLIT_METHODS
     overlap_percentage - the amount lines will overlap in terms of a percentage of the target length. No overlap at end points.
     best_fit_bool determines if the length is roundedto be segments of equal length.
-    out_fc - output split feature class"""
+    out_fc - output split feature class
+    output_mode - FULL, BROADCAST or KEYS_ONLY (see SPLIT_OUTPUT_MODES)
+    linear_reference_bool - if true each segment gets the fields in LINEAR_REFERENCE_FIELD_TYPES
+    populate_m_bool - if true the segment M values are set to their distance along the input line
+    min_segment_length - minimum segment length of the CURVATURE split method
+    max_segment_length - optional maximum segment length of the CURVATURE split method
+    cut_at_line_ends_bool - if true lines are first cut where the end points of other lines meet them
+    cut_points_fc - optional point feature class or file dataset of external points the lines are first cut at
+    cut_tolerance - distance within which cut points meet a line, cuts closer than it to a line end are dropped
+    resume_bool - if true, a run that stopped is continued from its last checkpoint (see fll.RunCheckpoint)
+    checkpoint_features - input features per checkpoint, 0 does not record checkpoints
+    changeset_fc - optional output of the rows inserted, updated or deleted since the previous run (see
+    fll.OutputChangeset)
+    changeset_key_fields - fields identifying a segment across runs, defaults to PARENT_OID and SEG_INDEX with linear
+    referencing or PARENT_OID and SEG_ID with KEYS_ONLY
+    """
     try:
-        arcpy.env.overwriteOutput = True
+        output_mode = str(output_mode).upper()
+        if output_mode not in SPLIT_OUTPUT_MODES:
+            raise ValueError(
+                "Output mode {0} is not one of {1}.".format(
+                    output_mode, ", ".join(SPLIT_OUTPUT_MODES)
+                )
+            )
+        if str(split_method).upper() not in SPLIT_METHODS:
+            raise ValueError(
+                "Split method {0} is not one of {1}.".format(
+                    split_method, ", ".join(SPLIT_METHODS)
+                )
+            )
         OutWorkspace = os.path.split(out_fc)[0]
         FileName = os.path.split(out_fc)[1]
-        arcpy.CreateFeatureclass_management(
-            OutWorkspace,
-            FileName,
-            "POLYLINE",
-            in_fc,
-            spatial_reference=in_fc,
-            has_m="SAME_AS_TEMPLATE",
-            has_z="SAME_AS_TEMPLATE",
-        )
         preFields = fll.get_fields(in_fc)
         fields = ["SHAPE@"] + preFields
-        cursor = arcpy.da.SearchCursor(in_fc, fields)
-        f_dict = fll.construct_index_dict(fields)
-        with arcpy.da.InsertCursor(out_fc, fields) as insertCursor:
+        out_fields, out_field_types = fields, None
+        if output_mode == "KEYS_ONLY":
+            out_field_types = KEY_FIELD_TYPES
+            out_fields = ["SHAPE@"] + [name for name, _ in KEY_FIELD_TYPES]
+        reference_field_types = []
+        if linear_reference_bool:
+            reference_field_types = [
+                (name, kind)
+                for name, kind in LINEAR_REFERENCE_FIELD_TYPES
+                if name not in out_fields
+            ]
+        reference_fields = [name for name, _ in reference_field_types]
+        checkpoint = fll.RunCheckpoint(
+            out_fc,
+            [
+                "feature_line_split",
+                in_fc,
+                out_count_value,
+                out_count_field,
+                split_method,
+                overlap_percentage,
+                best_fit_bool,
+                output_mode,
+                linear_reference_bool,
+                populate_m_bool,
+                min_segment_length,
+                max_segment_length,
+                cut_at_line_ends_bool,
+                cut_points_fc,
+                cut_tolerance,
+            ],
+            resume_bool,
+            checkpoint_features,
+        )
+        if not changeset_key_fields:
+            changeset_key_fields = (
+                ["PARENT_OID", "SEG_INDEX"]
+                if linear_reference_bool
+                else ["PARENT_OID", "SEG_ID"] if output_mode == "KEYS_ONLY" else None
+            )
+        changeset = fll.OutputChangeset(
+            out_fc,
+            changeset_fc,
+            changeset_key_fields,
+            out_fields + reference_fields,
+            checkpoint.resuming,
+        )
+        if not checkpoint.resuming:
+            with fll.profile_stage("create output"):
+                fll.create_line_feature_class(
+                    out_fc,
+                    in_fc,
+                    out_field_types,
+                    reference_field_types,
+                    populate_m_bool,
+                )
+        if reference_fields:
+            out_fields = out_fields + reference_fields
+            out_field_types = (
+                out_field_types or fll.get_field_types(in_fc, preFields)
+            ) + reference_field_types
+        curvature_measures = None
+        if str(split_method).upper() == CURVATURE_SPLIT_METHOD:
+            with fll.profile_stage("curvature measures"):
+                curvature_measures = curvature_split_measures(
+                    in_fc,
+                    out_count_value,
+                    out_count_field,
+                    min_segment_length,
+                    max_segment_length,
+                )
+        line_cuts = {}
+        if cut_at_line_ends_bool or cut_points_fc:
+            with fll.profile_stage("cut measures"):
+                line_cuts = line_cut_measures(
+                    in_fc, cut_at_line_ends_bool, cut_points_fc, cut_tolerance
+                )
+        # Results of unchanged features are reused from the result cache when one is set.
+        cache = fll.result_cache_session(
+            "feature_line_split",
+            [
+                split_method,
+                overlap_percentage,
+                best_fit_bool,
+                populate_m_bool,
+                min_segment_length,
+                max_segment_length,
+                cut_tolerance,
+            ],
+        )
+        # LENGTH and COUNT splits without cuts or a result cache are done in batches of packed lines.
+        batched = (
+            str(split_method).upper() != CURVATURE_SPLIT_METHOD
+            and not line_cuts
+            and cache is None
+        )
+        # Batched runs read the shapes as WKB only, rows split one at a time decode it.
+        if batched:
+            read_fields = preFields + ["OID@", "SHAPE@WKB"]
+        else:
+            read_fields = (
+                fields + ["OID@"] + (["SHAPE@WKB"] if cache is not None else [])
+            )
+        sr = None
+        if cache is not None or batched:
+            sr = fll.describe_line_spatial_reference(in_fc)[0]
+        cursor = fll.line_search_cursor(in_fc, read_fields)
+        f_dict = fll.construct_index_dict(read_fields)
+        project_row = fll.compile_row_projector(fields, f_dict)
+        with fll.line_insert_cursor(
+            out_fc,
+            out_fields,
+            in_fc,
+            field_types=out_field_types,
+            resume_rows=checkpoint.resume_rows,
+        ) as insertCursor, fll.BroadcastRowWriter(
+            insertCursor, fields, f_dict, child_fields=reference_fields
+        ) as broadcastWriter:
+            checkpoint.track(broadcastWriter, insertCursor)
             fll.arc_print("Established insert cursor for " + str(FileName) + ".", True)
             lineCounter = 0
-            for singleline in cursor:
+            errors = fll.ErrorLog()
+            process_stage = fll.profile_stage("split features")
+            rows = (row for row in cursor if not checkpoint.skip(row[f_dict["OID@"]]))
+            if batched:
+                results = split_row_batches(
+                    rows,
+                    f_dict,
+                    out_count_value,
+                    out_count_field,
+                    split_method,
+                    overlap_percentage,
+                    best_fit_bool,
+                    populate_m_bool,
+                    sr,
+                )
+            else:
+                results = ((row, None) for row in rows)
+            for singleline, batch_split in results:
                 try:
-                    segment_rows = []
                     lineCounter += 1
-                    linegeo = singleline[f_dict["SHAPE@"]]
-                    # Function splits line geometry based on method and split value
-                    line_length = fll.line_length(
-                        singleline, out_count_field, out_count_value, f_dict
-                    )
-                    split_segment_list = split_line_geometry(
-                        linegeo,
-                        line_length,
-                        split_method,
-                        overlap_percentage,
-                        best_fit_bool,
-                    )
-                    segID = 0
-                    for segment in split_segment_list:
-                        try:
-                            segID += 1
-                            segmentedRow = fll.copy_altered_row(
-                                singleline, fields, f_dict, {"SHAPE@": segment}
+                    parent_oid = singleline[f_dict["OID@"]]
+                    cached = cache_key = None
+                    if batch_split is not None:
+                        split_segment_list, measures = batch_split
+                    else:
+                        if batched:
+                            linegeo = fll.geometry_backend.from_wkb(
+                                [singleline[f_dict["SHAPE@WKB"]]], sr
+                            )[0]
+                        else:
+                            linegeo = singleline[f_dict["SHAPE@"]]
+                        # Function splits line geometry based on method and split value
+                        line_length = fll.line_length(
+                            singleline, out_count_field, out_count_value, f_dict
+                        )
+                        if cache is not None:
+                            cache_key = cache.key(
+                                singleline[f_dict["SHAPE@WKB"]],
+                                line_length,
+                                line_cuts.get(parent_oid),
+                                (
+                                    None
+                                    if curvature_measures is None
+                                    else curvature_measures.get(parent_oid)
+                                ),
+                            )
+                            cached = cache.lookup(cache_key)
+                        if cached:
+                            split_segment_list = fll.geometry_backend.from_wkb(
+                                cached[0], sr
                             )
-                            segment_rows.append(segmentedRow)
-                        except:
-                            fll.arc_print(
-                                "Could not iterate through line segment "
-                                + str(segID)
-                                + "."
+                            measures = [tuple(measure) for measure in cached[1]]
+                        elif curvature_measures is not None:
+                            measures = curvature_measures[parent_oid]
+                            if parent_oid in line_cuts:
+                                measures = add_cuts_to_measures(
+                                    measures, line_cuts[parent_oid], cut_tolerance
+                                )
+                            split_segment_list = fll.split_segments_at_measures(
+                                linegeo, measures, populate_m_bool
                             )
-                            break
-                    if len(segment_rows) == len(
-                        split_segment_list
-                    ):  # Unload by feature so partial segments are not made.
+                        else:
+                            split_segment_list, measures = split_line_geometry(
+                                linegeo,
+                                line_length,
+                                split_method,
+                                overlap_percentage,
+                                best_fit_bool,
+                                True,
+                                populate_m_bool,
+                                cut_measures=line_cuts.get(parent_oid),
+                                cut_tolerance=cut_tolerance,
+                            )
+                    if cache_key is not None and not cached:
+                        cache.store(
+                            cache_key,
+                            fll.geometry_backend.to_wkb(split_segment_list),
+                            [[float(start), float(end)] for start, end in measures],
+                        )
+                    # Per segment values of the linear reference fields.
+                    reference_values = linear_reference_values(
+                        parent_oid, measures, reference_fields
+                    )
+                    if output_mode == "BROADCAST":
+                        parent_index = broadcastWriter.add_parent(singleline)
+                        broadcastWriter.add_children(
+                            parent_index,
+                            split_segment_list,
+                            [list(column) for column in zip(*reference_values)],
+                        )
+                    elif output_mode == "KEYS_ONLY":
+                        for segID, segment in enumerate(split_segment_list, 1):
+                            insertCursor.insertRow(
+                                (segment, parent_oid, segID)
+                                + reference_values[segID - 1]
+                            )
+                    else:
+                        # Unload by feature so partial segments are not made.
+                        segment_rows = [
+                            project_row(singleline, segment)
+                            for segment in split_segment_list
+                        ]
+                        if reference_fields:
+                            segment_rows = [
+                                list(row) + list(values)
+                                for row, values in zip(segment_rows, reference_values)
+                            ]
                         for row in segment_rows:
                             insertCursor.insertRow(row)
                     if lineCounter % 500 == 0:
@@ -146,13 +621,12 @@ def feature_line_split(
                             True,
                         )
                 except Exception as e:
-                    fll.arc_print(
-                        "Failed to iterate through and a split feature "
-                        + str(lineCounter)
-                        + ".",
-                        True,
-                    )
-                    fll.arc_print(e.args[0])
+                    errors.record(singleline[f_dict["OID@"]], "split", e)
+                    checkpoint.feature_failed(singleline[f_dict["OID@"]])
+                else:
+                    checkpoint.feature_done(singleline[f_dict["OID@"]])
+            errors.report()
+            process_stage.stop(lineCounter)
             del (
                 cursor,
                 insertCursor,
@@ -160,15 +634,18 @@ def feature_line_split(
                 preFields,
                 OutWorkspace,
                 lineCounter,
-                split_segment_list,
             )
-            fll.arc_print("Script Completed Successfully.", True)
-    except arcpy.ExecuteError:
-        fll.arc_print(arcpy.GetMessages(2))
+        checkpoint.finish()
+        fll.report_result_cache(cache)
+        changeset.write()
+        fll.arc_print("Script Completed Successfully.", True)
+    except fll.ExecuteError:
+        fll.tool_status.fail(arcpy.GetMessages(2))
     except Exception as e:
-        fll.arc_print(e.args[0])
+        fll.tool_status.fail(e)
+    fll.report_profile("feature_line_split")
 
-        # End do_analysis function
+    # End do_analysis function
 
 
 # This test allows the script to be used from the operating
@@ -176,7 +653,8 @@ def feature_line_split(
 # as a geoprocessing script tool, or as a module imported in
 # another script
 if __name__ == "__main__":
-    # Define Inputs
+    # Define Inputs. The toolbox passes the first seven parameters, the other
+    # options of feature_line_split are set from Python or lineworker jobs.
     FeatureClass = arcpy.GetParameterAsText(0)
     Desired_Feature_Count = arcpy.GetParameter(1)
     Feature_Count_Field = arcpy.GetParameterAsText(2)
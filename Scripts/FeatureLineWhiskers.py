@@ -22,15 +22,125 @@
 # limitations under the License.
 # --------------------------------
 # Import Modules
-import os, arcpy
+import os
+import itertools
 import linelibrary as fll
 
+# arcpy is None outside of ArcGIS, file datasets then use the numpy geometry backend.
+arcpy = fll.arcpy
+# Features whose whiskers are generated together in packed arrays.
+WHISKER_BATCH_FEATURES = 10000
+
 
 # Function Definitions
+def whisker_row_batches(
+    rows,
+    f_dict,
+    out_whisker_width,
+    out_whisker_field,
+    sample_length,
+    sr=None,
+    cache=None,
+    label_points=False,
+    batch_size=WHISKER_BATCH_FEATURES,
+):
+    """Generates the whiskers of cursor rows with planar math in batches of packed lines (see
+    fll.whiskers_from_packed_lines). Whiskers of lines with Z or M values take the
+    values at the middle of the sampled line. With a result cache, the whiskers of cached features are read from it
+    and only the other features are packed and generated, then stored. Null and zero length shapes, rows whose width
+    fails and the rows of a batch that fails are yielded without a whisker, so the caller can generate them one at a
+    time and record the error of each feature.
+    Parameters
+    ----------------
+    rows - iterable of cursor rows with SHAPE@WKB and OID@ fields
+    f_dict - field dictionary of field name index pairs
+    out_whisker_width - the width of each whisker
+    out_whisker_field - optional field with the whisker width of each row
+    sample_length - the length sampled from the center of each line, 0 uses the whole line
+    sr - spatial reference of the whisker geometries
+    cache - optional result cache session, see fll.result_cache_session
+    label_points - center whiskers of lines whose centroid is off the line on the point halfway along it, like the
+      arcpy centroid (see fll.whiskers_from_packed_lines)
+    batch_size - rows whose whiskers are generated together
+    Returns
+    ------------
+    generator of (row, whisker geometry, cache key) tuples in input order. The geometry is None for rows that were
+    not generated, and the cache key is None without a cache or when the width of the row failed.
+    """
+    rows = iter(rows)
+    while True:
+        batch = list(itertools.islice(rows, batch_size))
+        if not batch:
+            return
+        lines = [None] * len(batch)
+        keys = [None] * len(batch)
+        widths = {}
+        for position, row in enumerate(batch):
+            try:
+                widths[position] = fll.line_length(
+                    row, out_whisker_field, out_whisker_width, f_dict
+                )
+            except Exception:
+                continue
+            if cache is not None:
+                keys[position] = cache.key(row[f_dict["SHAPE@WKB"]], widths[position])
+        hits = {}
+        if cache is not None:
+            for position in widths:
+                cached = cache.lookup(keys[position])
+                if cached:
+                    hits[position] = cached[0][0]
+        if hits:
+            cached_lines = fll.geometry_backend.from_wkb(list(hits.values()), sr)
+            for position, line in zip(hits, cached_lines):
+                lines[position] = line
+        misses = [
+            position
+            for position in widths
+            if position not in hits and batch[position][f_dict["SHAPE@WKB"]]
+        ]
+        if misses:
+            try:
+                packed = fll.la.packed_lines_from_wkb(
+                    [batch[position][f_dict["SHAPE@WKB"]] for position in misses],
+                    [batch[position][f_dict["OID@"]] for position in misses],
+                )
+                index = fll.la.LengthIndex(packed)
+                has_length = index.lengths > 0
+                whiskers = fll.whiskers_from_packed_lines(
+                    packed,
+                    [widths[position] for position in misses],
+                    index,
+                    label_points,
+                    sample_length,
+                )
+                whisker_wkb = fll.la.packed_lines_to_wkb(whiskers)
+                generated = fll.geometry_backend.from_wkb(whisker_wkb, sr)
+            except Exception:
+                whisker_wkb = generated = []
+            for feature, (position, wkb, line) in enumerate(
+                zip(misses, whisker_wkb, generated)
+            ):
+                # Zero length shapes fail in the per feature path like they always have.
+                if not has_length[feature]:
+                    continue
+                lines[position] = line
+                if cache is not None:
+                    cache.store(keys[position], [wkb])
+        for row, line, key in zip(batch, lines, keys):
+            yield row, line, key
 
 
 def feature_line_whisker(
-    in_fc, out_whisker_width, out_whisker_field, sample_length, out_fc
+    in_fc,
+    out_whisker_width,
+    out_whisker_field,
+    sample_length,
+    out_fc,
+    resume_bool=False,
+    checkpoint_features=0,
+    changeset_fc=None,
+    changeset_key_fields=None,
 ):
     """Take a feature class and generate "whiskers" that are perpendicular either to the lines start and end points, or
     a sample line extracted from the center portion of the input polyline feature.
@@ -46,57 +156,109 @@ def feature_line_whisker(
       generate the whiskers. This parameter defines the portion of the line used for whisker generation.
     out_fc (FeatureClass): The output feature class where the geometries with whiskers will be saved. This feature class
       will include the original attribute fields from in_fc, along with the new out_whisker_field.
+    resume_bool (bool, optional): If True, a run that stopped is continued from its last checkpoint (see
+      fll.RunCheckpoint).
+    checkpoint_features (int, optional): Input features per checkpoint, 0 does not record checkpoints.
+    changeset_fc (FeatureClass, optional): Output of the rows inserted, updated or deleted since the previous run (see
+      fll.OutputChangeset).
+    changeset_key_fields (list, optional): Input fields identifying a line across runs, required with changeset_fc.
     """
     try:
-        arcpy.env.overwriteOutput = True
         OutWorkspace = os.path.split(out_fc)[0]
         FileName = os.path.split(out_fc)[1]
-        arcpy.CreateFeatureclass_management(
-            OutWorkspace,
-            FileName,
-            "POLYLINE",
-            in_fc,
-            spatial_reference=in_fc,
-            has_m="SAME_AS_TEMPLATE",
-            has_z="SAME_AS_TEMPLATE",
+        checkpoint = fll.RunCheckpoint(
+            out_fc,
+            [
+                "feature_line_whisker",
+                in_fc,
+                out_whisker_width,
+                out_whisker_field,
+                sample_length,
+            ],
+            resume_bool,
+            checkpoint_features,
         )
         preFields = fll.get_fields(in_fc)
         fields = ["SHAPE@"] + preFields
-        cursor = arcpy.da.SearchCursor(in_fc, fields)
-        f_dict = fll.construct_index_dict(fields)
-        with arcpy.da.InsertCursor(out_fc, fields) as insertCursor:
+        changeset = fll.OutputChangeset(
+            out_fc, changeset_fc, changeset_key_fields, preFields, checkpoint.resuming
+        )
+        if not checkpoint.resuming:
+            with fll.profile_stage("create output"):
+                fll.create_line_feature_class(out_fc, in_fc)
+        # Whiskers are generated in batches of packed lines, which keep the Z and M values the per feature
+        # fallback drops. The batches use planar bearings, so geographic inputs keep the geodesic bearings of the
+        # per feature path when arcpy is the geometry backend. Whiskers of unchanged features are read from the
+        # result cache when one is set, and only the other features of each batch are generated.
+        cache = fll.result_cache_session("feature_line_whisker", [sample_length])
+        sr, is_projected = fll.describe_line_spatial_reference(in_fc)
+        batched = fll.geometry_backend.name != "arcpy" or is_projected
+        read_fields = (
+            fields + ["OID@"] + (["SHAPE@WKB"] if batched or cache is not None else [])
+        )
+        cursor = fll.line_search_cursor(in_fc, read_fields)
+        f_dict = fll.construct_index_dict(read_fields)
+        project_row = fll.compile_row_projector(fields, f_dict)
+        with fll.line_insert_cursor(
+            out_fc, fields, in_fc, resume_rows=checkpoint.resume_rows
+        ) as insertCursor:
+            checkpoint.track(insertCursor)
             fll.arc_print("Established insert cursor for " + str(FileName) + ".", True)
             lineCounter = 0
-            for singleline in cursor:
+            errors = fll.ErrorLog()
+            process_stage = fll.profile_stage("generate whiskers")
+            rows = (row for row in cursor if not checkpoint.skip(row[f_dict["OID@"]]))
+            if batched:
+                results = whisker_row_batches(
+                    rows,
+                    f_dict,
+                    out_whisker_width,
+                    out_whisker_field,
+                    sample_length,
+                    sr,
+                    cache,
+                    label_points=fll.geometry_backend.name == "arcpy",
+                )
+            else:
+                results = ((row, None, None) for row in rows)
+            for singleline, batch_whisker, cache_key in results:
                 try:
                     segment_rows = []
                     lineCounter += 1
-                    linegeo = singleline[f_dict["SHAPE@"]]
-                    # Function splits linegeometry based on method and split value
-                    if sample_length:
-                        linegeo = fll.sample_line_from_center(linegeo, sample_length)
-                    line_length = fll.line_length(
-                        singleline, out_whisker_field, out_whisker_width, f_dict
-                    )
-                    split_segment_geometry = fll.generate_whisker_from_polyline(
-                        linegeo, line_length
-                    )
-                    segID = 0
-                    try:
-                        segID += 1
-                        segmentedRow = fll.copy_altered_row(
-                            singleline,
-                            fields,
-                            f_dict,
-                            {"SHAPE@": split_segment_geometry},
-                        )
-                        segment_rows.append(segmentedRow)
-                    except:
-                        fll.arc_print(
-                            "Could not iterate through line segment " + str(segID) + "."
+                    if batch_whisker is not None:
+                        split_segment_geometry = batch_whisker
+                    else:
+                        # Rows the batches did not generate are cache misses, generated one at a time.
+                        linegeo = singleline[f_dict["SHAPE@"]]
+                        line_length = fll.line_length(
+                            singleline, out_whisker_field, out_whisker_width, f_dict
                         )
-                        break
-
+                        cached = None
+                        if cache is not None and not batched:
+                            cache_key = cache.key(
+                                singleline[f_dict["SHAPE@WKB"]], line_length
+                            )
+                            cached = cache.lookup(cache_key)
+                        if cached:
+                            split_segment_geometry = fll.geometry_backend.from_wkb(
+                                cached[0], sr
+                            )[0]
+                        else:
+                            if sample_length:
+                                linegeo = fll.sample_line_from_center(
+                                    linegeo, sample_length
+                                )
+                            split_segment_geometry = fll.generate_whisker_from_polyline(
+                                linegeo, line_length
+                            )
+                            if cache_key is not None:
+                                cache.store(
+                                    cache_key,
+                                    fll.geometry_backend.to_wkb(
+                                        [split_segment_geometry]
+                                    ),
+                                )
+                    segment_rows.append(project_row(singleline, split_segment_geometry))
                     for row in segment_rows:
                         insertCursor.insertRow(row)
                     if lineCounter % 500 == 0:
@@ -107,21 +269,24 @@ def feature_line_whisker(
                             True,
                         )
                 except Exception as e:
-                    fll.arc_print(
-                        "Failed to iterate through and generated whiskers for feature "
-                        + str(lineCounter)
-                        + ".",
-                        True,
-                    )
-                    fll.arc_print(e.args[0])
+                    errors.record(singleline[f_dict["OID@"]], "whisker", e)
+                    checkpoint.feature_failed(singleline[f_dict["OID@"]])
+                else:
+                    checkpoint.feature_done(singleline[f_dict["OID@"]])
+            errors.report()
+            process_stage.stop(lineCounter)
             del cursor, insertCursor, fields, preFields, OutWorkspace, lineCounter
-            fll.arc_print("Script Completed Successfully.", True)
-    except arcpy.ExecuteError:
-        fll.arc_print(arcpy.GetMessages(2))
+        checkpoint.finish()
+        fll.report_result_cache(cache)
+        changeset.write()
+        fll.arc_print("Script Completed Successfully.", True)
+    except fll.ExecuteError:
+        fll.tool_status.fail(arcpy.GetMessages(2))
     except Exception as e:
-        fll.arc_print(e.args[0])
+        fll.tool_status.fail(e)
+    fll.report_profile("feature_line_whisker")
 
-        # End do_analysis function
+    # End do_analysis function
 
 
 # This test allows the script to be used from the operating
@@ -0,0 +1,1407 @@
+# --------------------------------
+# Name: linearray.py
+# Purpose: This file serves as a packed array geometry library for the Feature Line Toolboxes. Line geometries are
+# held as flat NumPy coordinate arrays with part and feature offsets so that whole networks can be processed in
+# vectorized passes instead of per feature geometry calls. Import as la.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# ArcGIS Version:   ArcGIS Pro
+# Python Version:   3.6+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+
+# Import Modules
+import struct
+import numpy as np
+
+# Length modes of step_lengths, and the WGS 1984 semi-major axis (meters) and flattening of GEODESIC lengths.
+LENGTH_MODES = ["PLANAR", "3D", "GEODESIC"]
+WGS84 = (6378137.0, 1 / 298.257223563)
+# Vertices closer than this share of the feature length to a cut are replaced by the cut point.
+CUT_TOLERANCE = 1e-9
+# Segments longer than this many grid cells are registered in points_near_lines as pieces of at most this length.
+POINT_GRID_PIECE_CELLS = 4
+# Odd 64 bit multiplier of the vertex index hash that orders equal triangle areas in visvalingam_keep.
+VERTEX_HASH_MULTIPLIER = 0x9E3779B97F4A7C15
+
+# Class Definitions
+class PackedLines(object):
+    """Container for a batch of (multipart) polylines stored as packed arrays.
+    Parameters
+    ----------------
+    coords - (n_vertices, 2) float array of XY coordinates for every vertex of every part of every feature
+    part_offsets - (n_parts + 1) int array, vertices of part i are coords[part_offsets[i]:part_offsets[i + 1]]
+    feature_offsets - (n_features + 1) int array, parts of feature j are part_offsets[feature_offsets[j]:...]
+    oids - optional (n_features) array of object ids, defaults to a range index
+    z - optional (n_vertices) float array of z values
+    m - optional (n_vertices) float array of m values
+    Kernels move and interpolate the Z and M values together as the columns of one array, see zm_columns."""
+
+    def __init__(self, coords, part_offsets, feature_offsets, oids=None, z=None, m=None):
+        self.coords = np.asarray(coords, dtype=np.float64).reshape(-1, 2)
+        self.part_offsets = np.asarray(part_offsets, dtype=np.int64)
+        self.feature_offsets = np.asarray(feature_offsets, dtype=np.int64)
+        if oids is None:
+            oids = np.arange(len(self.feature_offsets) - 1, dtype=np.int64)
+        self.oids = np.asarray(oids)
+        self.z = None if z is None else np.asarray(z, dtype=np.float64)
+        self.m = None if m is None else np.asarray(m, dtype=np.float64)
+        self._zm_columns = None
+
+    @property
+    def feature_count(self):
+        return len(self.feature_offsets) - 1
+
+    @property
+    def part_count(self):
+        return len(self.part_offsets) - 1
+
+    @property
+    def vertex_count(self):
+        return len(self.coords)
+
+    @property
+    def vertex_offsets(self):
+        """Vertex offsets per feature: vertices of feature j are coords[vertex_offsets[j]:vertex_offsets[j + 1]]."""
+        return self.part_offsets[self.feature_offsets]
+
+    def part_feature_index(self):
+        """Returns the feature index of every part."""
+        return np.repeat(np.arange(self.feature_count), np.diff(self.feature_offsets))
+
+    def vertex_part_index(self):
+        """Returns the part index of every vertex."""
+        return np.repeat(np.arange(self.part_count), np.diff(self.part_offsets))
+
+    def vertex_feature_index(self):
+        """Returns the feature index of every vertex."""
+        return np.repeat(np.arange(self.feature_count), np.diff(self.vertex_offsets))
+
+    def zm_columns(self):
+        """Returns the Z and M values as the columns of one (n_vertices, k) array, Z before M, or None for lines
+        without either. Lines built with from_zm_columns return their array without a copy, and the array is built
+        again if z or m is replaced."""
+        if self.z is None and self.m is None:
+            return None
+        cached = self._zm_columns
+        if cached is None or cached[0] is not self.z or cached[1] is not self.m:
+            values = [values for values in (self.z, self.m) if values is not None]
+            columns = values[0][:, np.newaxis] if len(values) == 1 else np.column_stack(values)
+            self._zm_columns = cached = (self.z, self.m, columns)
+        return cached[2]
+
+    @classmethod
+    def from_zm_columns(cls, coords, part_offsets, feature_offsets, oids, columns, has_z, has_m):
+        """Build packed lines whose Z and M values are the columns of an array laid out like zm_columns, so a kernel
+        cuts or interpolates both in one pass and the next kernel reuses the array.
+        :param - columns - (n_vertices, k) array of Z and M columns, Z before M, or None
+        :param - has_z - if true the first column holds Z values
+        :param - has_m - if true the last column holds M values"""
+        z = columns[:, 0] if columns is not None and has_z else None
+        m = columns[:, -1] if columns is not None and has_m else None
+        lines = cls(coords, part_offsets, feature_offsets, oids, z, m)
+        if columns is not None:
+            lines._zm_columns = (lines.z, lines.m, columns)
+        return lines
+
+    @classmethod
+    def from_parts(cls, features, oids=None):
+        """Build packed lines from a nested list of features, each a list of (n, 2) coordinate sequences (parts)."""
+        part_arrays = []
+        part_counts = []
+        for feature in features:
+            part_counts.append(len(feature))
+            part_arrays.extend(np.asarray(part, dtype=np.float64).reshape(-1, 2) for part in feature)
+        vertex_counts = [len(part) for part in part_arrays]
+        coords = np.concatenate(part_arrays) if part_arrays else np.empty((0, 2))
+        part_offsets = np.concatenate([[0], np.cumsum(vertex_counts, dtype=np.int64)])
+        feature_offsets = np.concatenate([[0], np.cumsum(part_counts, dtype=np.int64)])
+        return cls(coords, part_offsets, feature_offsets, oids)
+
+
+# Function Definitions
+def group_reduce(ufunc, values, offsets, empty_value=np.nan):
+    """Reduce contiguous groups of values delimited by offsets with a numpy ufunc (np.add, np.minimum, ...).
+    Unlike a bare ufunc.reduceat, empty groups return the empty_value instead of a neighbouring element.
+    :param - ufunc - numpy ufunc with a reduceat method
+    :param - values - array of values to reduce along the first axis
+    :param - offsets - (n_groups + 1) array of group boundaries
+    :param - empty_value - value returned for groups without members
+    :return - (n_groups) array of reduced values"""
+    offsets = np.asarray(offsets, dtype=np.int64)
+    counts = np.diff(offsets)
+    result = np.full((len(counts),) + np.shape(values)[1:], empty_value, dtype=np.float64)
+    non_empty = counts > 0
+    if np.any(non_empty):
+        result[non_empty] = ufunc.reduceat(values, offsets[:-1][non_empty], axis=0)
+    return result
+
+
+def segment_index(packed):
+    """Returns the start vertex index of every two point segment in the packed lines. Segments never cross part
+    boundaries, so the end vertex of each segment is the start index + 1.
+    :param - packed - PackedLines
+    :return - int array of segment start vertex indexes"""
+    if packed.vertex_count < 2:
+        return np.empty(0, dtype=np.int64)
+    valid = np.ones(packed.vertex_count - 1, dtype=bool)
+    part_ends = packed.part_offsets[1:-1] - 1
+    valid[part_ends[(part_ends >= 0) & (part_ends < len(valid))]] = False
+    return np.flatnonzero(valid)
+
+
+def segment_feature_offsets(packed, start_index):
+    """Returns (n_features + 1) offsets into the segment array from segment_index for each feature."""
+    return np.searchsorted(start_index, packed.vertex_offsets, side="left")
+
+
+def math_angle_to_axial_azimuth(angle):
+    """Converts math angles (radians counterclockwise from east) to axial azimuths in degrees (0-180) clockwise from
+    north. Axial azimuths ignore line direction so a line and its reverse share a bearing.
+    @param: angle - array of angles in radians
+    @returns - array of azimuths 0 to 180"""
+    return np.mod(90.0 - np.degrees(angle), 180.0)
+
+
+def smallest_axial_angle(bearing_1, bearing_2):
+    """Vectorized smallest angle between two undirected line bearings. Equivalent to testing every combination of the
+    angles and their inverses as find_smallest_angle_from_intersecting_lines does, but over whole arrays.
+    @param: bearing_1 - array of azimuth angles in degrees
+    @param: bearing_2 - array of azimuth angles in degrees
+    @returns - array of angles between 0 and 90 degrees"""
+    diff = np.mod(np.asarray(bearing_1, dtype=np.float64) - np.asarray(bearing_2, dtype=np.float64), 180.0)
+    return np.minimum(diff, 180.0 - diff)
+
+
+def line_descriptor_table(packed):
+    """Builds a per feature descriptor table for parallel and orientation tests in one vectorized pass over the
+    packed vertices. Bearings are axial azimuths (0-180 degrees clockwise from north).
+    Fields
+    ----------------
+    OID - feature object id
+    LENGTH - planar length of the line
+    MEAN_BEARING - length weighted mean bearing of the line segments (doubled angle average)
+    BEARING_STRENGTH - 0-1 resultant length of the mean bearing, 1 is a straight line, near 0 has no main direction
+    PCA_BEARING - principal direction of the line treated as a continuous mass of uniform density
+    PCA_RATIO - minor/major principal standard deviation ratio, 0 for straight lines
+    OBB_CENTER_X, OBB_CENTER_Y - center of the oriented bounding box aligned to the principal direction
+    OBB_LENGTH, OBB_WIDTH - extent of the oriented bounding box along and across the principal direction
+    :param - packed - PackedLines
+    :return - numpy structured array with one record per feature"""
+    n_features = packed.feature_count
+    coords = packed.coords
+    vertex_offsets = packed.vertex_offsets
+    vertex_feature = packed.vertex_feature_index()
+    # Center each feature on its first vertex to keep second moments well conditioned.
+    origin = np.zeros((n_features, 2))
+    has_vertices = np.diff(vertex_offsets) > 0
+    origin[has_vertices] = coords[vertex_offsets[:-1][has_vertices]]
+    local = coords - origin[vertex_feature]
+    starts = segment_index(packed)
+    seg_feature = vertex_feature[starts]
+    p = local[starts]
+    q = local[starts + 1]
+    d = q - p
+    seg_length = np.hypot(d[:, 0], d[:, 1])
+    length = np.bincount(seg_feature, seg_length, minlength=n_features)
+    # Length weighted mean of the doubled segment angles gives an orientation that ignores segment direction.
+    doubled = 2.0 * np.arctan2(d[:, 1], d[:, 0])
+    cos_sum = np.bincount(seg_feature, seg_length * np.cos(doubled), minlength=n_features)
+    sin_sum = np.bincount(seg_feature, seg_length * np.sin(doubled), minlength=n_features)
+    mean_angle = 0.5 * np.arctan2(sin_sum, cos_sum)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        strength = np.where(length > 0, np.hypot(cos_sum, sin_sum) / length, 0.0)
+    # Continuous first and second moments of each segment: integral of the outer product along the segment.
+    mid = 0.5 * (p + q)
+    sx = np.bincount(seg_feature, seg_length * mid[:, 0], minlength=n_features)
+    sy = np.bincount(seg_feature, seg_length * mid[:, 1], minlength=n_features)
+    w_xx = seg_length * ((p[:, 0] ** 2 + q[:, 0] ** 2) / 3.0 + p[:, 0] * q[:, 0] / 3.0)
+    w_yy = seg_length * ((p[:, 1] ** 2 + q[:, 1] ** 2) / 3.0 + p[:, 1] * q[:, 1] / 3.0)
+    w_xy = seg_length * (
+        (p[:, 0] * p[:, 1] + q[:, 0] * q[:, 1]) / 3.0 + (p[:, 0] * q[:, 1] + q[:, 0] * p[:, 1]) / 6.0
+    )
+    sxx = np.bincount(seg_feature, w_xx, minlength=n_features)
+    syy = np.bincount(seg_feature, w_yy, minlength=n_features)
+    sxy = np.bincount(seg_feature, w_xy, minlength=n_features)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        safe_length = np.where(length > 0, length, 1.0)
+        mean_x = sx / safe_length
+        mean_y = sy / safe_length
+        cov_xx = sxx / safe_length - mean_x**2
+        cov_yy = syy / safe_length - mean_y**2
+        cov_xy = sxy / safe_length - mean_x * mean_y
+    pca_angle = 0.5 * np.arctan2(2.0 * cov_xy, cov_xx - cov_yy)
+    spread = np.sqrt(np.maximum((cov_xx - cov_yy) ** 2 / 4.0 + cov_xy**2, 0.0))
+    major = np.maximum((cov_xx + cov_yy) / 2.0 + spread, 0.0)
+    minor = np.maximum((cov_xx + cov_yy) / 2.0 - spread, 0.0)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        pca_ratio = np.where(major > 0, np.sqrt(minor / np.where(major > 0, major, 1.0)), 0.0)
+    # Oriented bounding box from the vertices projected on the principal axes.
+    cos_a = np.cos(pca_angle)[vertex_feature]
+    sin_a = np.sin(pca_angle)[vertex_feature]
+    u = local[:, 0] * cos_a + local[:, 1] * sin_a
+    v = -local[:, 0] * sin_a + local[:, 1] * cos_a
+    u_min = group_reduce(np.minimum, u, vertex_offsets)
+    u_max = group_reduce(np.maximum, u, vertex_offsets)
+    v_min = group_reduce(np.minimum, v, vertex_offsets)
+    v_max = group_reduce(np.maximum, v, vertex_offsets)
+    u_mid = (u_min + u_max) / 2.0
+    v_mid = (v_min + v_max) / 2.0
+    center_x = origin[:, 0] + u_mid * np.cos(pca_angle) - v_mid * np.sin(pca_angle)
+    center_y = origin[:, 1] + u_mid * np.sin(pca_angle) + v_mid * np.cos(pca_angle)
+    table = np.zeros(
+        n_features,
+        dtype=[
+            ("OID", packed.oids.dtype),
+            ("LENGTH", "f8"),
+            ("MEAN_BEARING", "f8"),
+            ("BEARING_STRENGTH", "f8"),
+            ("PCA_BEARING", "f8"),
+            ("PCA_RATIO", "f8"),
+            ("OBB_CENTER_X", "f8"),
+            ("OBB_CENTER_Y", "f8"),
+            ("OBB_LENGTH", "f8"),
+            ("OBB_WIDTH", "f8"),
+        ],
+    )
+    table["OID"] = packed.oids
+    table["LENGTH"] = length
+    table["MEAN_BEARING"] = np.where(length > 0, math_angle_to_axial_azimuth(mean_angle), np.nan)
+    table["BEARING_STRENGTH"] = strength
+    table["PCA_BEARING"] = np.where(length > 0, math_angle_to_axial_azimuth(pca_angle), np.nan)
+    table["PCA_RATIO"] = pca_ratio
+    table["OBB_CENTER_X"] = center_x
+    table["OBB_CENTER_Y"] = center_y
+    table["OBB_LENGTH"] = u_max - u_min
+    table["OBB_WIDTH"] = v_max - v_min
+    return table
+
+
+def step_lengths(packed, mode="PLANAR", ellipsoid=WGS84):
+    """Returns the length of the segment ending at every vertex, 0 at the first vertex of each part. PLANAR lengths
+    are np.hypot over XY, 3D lengths add the Z difference and GEODESIC lengths read XY as longitude and latitude in
+    degrees and are ellipsoidal distances in the units of the semi-major axis (see geodesic_distances).
+    :param - packed - PackedLines
+    :param - mode - PLANAR, 3D or GEODESIC (see LENGTH_MODES)
+    :param - ellipsoid - (semi-major axis, flattening) of GEODESIC lengths
+    :return - (n_vertices) array of segment lengths"""
+    mode = str(mode).upper()
+    if mode not in LENGTH_MODES:
+        raise ValueError("Length mode {0} is not one of {1}.".format(mode, ", ".join(LENGTH_MODES)))
+    if mode == "3D" and packed.z is None:
+        raise ValueError("3D lengths need lines with Z values.")
+    steps = np.zeros(packed.vertex_count)
+    starts = segment_index(packed)
+    if mode == "GEODESIC":
+        steps[starts + 1] = geodesic_distances(packed.coords[starts], packed.coords[starts + 1], ellipsoid)
+        return steps
+    delta = np.take(packed.coords, starts + 1, axis=0) - np.take(packed.coords, starts, axis=0)
+    steps[starts + 1] = np.hypot(delta[:, 0], delta[:, 1])
+    if mode == "3D":
+        steps[starts + 1] = np.hypot(steps[starts + 1], packed.z[starts + 1] - packed.z[starts])
+    return steps
+
+
+def geodesic_distances(start_points, end_points, ellipsoid=WGS84, iterations=200, tolerance=1e-12):
+    """Ellipsoidal distances between pairs of (longitude, latitude) points in degrees, with Vincenty's inverse formula
+    iterated for all pairs at once. Pairs that do not converge (nearly antipodal points) get the great circle distance
+    on a sphere of the mean radius.
+    :param - start_points - (n, 2) array of longitudes and latitudes
+    :param - end_points - (n, 2) array of longitudes and latitudes
+    :param - ellipsoid - (semi-major axis, flattening)
+    :param - iterations - maximum iterations of the longitude on the auxiliary sphere
+    :param - tolerance - convergence tolerance of the longitude in radians
+    :return - (n) array of distances in the units of the semi-major axis"""
+    semi_major, flattening = float(ellipsoid[0]), float(ellipsoid[1])
+    semi_minor = semi_major * (1 - flattening)
+    start = np.radians(np.asarray(start_points, dtype=np.float64).reshape(-1, 2))
+    end = np.radians(np.asarray(end_points, dtype=np.float64).reshape(-1, 2))
+    longitude = end[:, 0] - start[:, 0]
+    reduced_1 = np.arctan((1 - flattening) * np.tan(start[:, 1]))
+    reduced_2 = np.arctan((1 - flattening) * np.tan(end[:, 1]))
+    sin_u1, cos_u1, sin_u2, cos_u2 = np.sin(reduced_1), np.cos(reduced_1), np.sin(reduced_2), np.cos(reduced_2)
+    lam = longitude.copy()
+    sin_sigma, cos_sigma, sigma = np.zeros_like(lam), np.ones_like(lam), np.zeros_like(lam)
+    cos2_alpha, cos_2sigma_m = np.ones_like(lam), np.zeros_like(lam)
+    active = np.arange(len(lam))
+    for _ in range(iterations):
+        if not len(active):
+            break
+        sin_lam, cos_lam = np.sin(lam[active]), np.cos(lam[active])
+        s1, c1, s2, c2 = sin_u1[active], cos_u1[active], sin_u2[active], cos_u2[active]
+        sin_s = np.hypot(c2 * sin_lam, c1 * s2 - s1 * c2 * cos_lam)
+        cos_s = s1 * s2 + c1 * c2 * cos_lam
+        with np.errstate(invalid="ignore", divide="ignore"):
+            sin_alpha = np.where(sin_s > 0, c1 * c2 * sin_lam / sin_s, 0.0)
+            c2a = 1 - sin_alpha ** 2
+            # Lines along the equator have cos2_alpha 0 and no cos_2sigma_m term.
+            c2sm = np.where(c2a > 0, cos_s - 2 * s1 * s2 / c2a, 0.0)
+        correction = flattening / 16 * c2a * (4 + flattening * (4 - 3 * c2a))
+        sig = np.arctan2(sin_s, cos_s)
+        new_lam = longitude[active] + (1 - correction) * flattening * sin_alpha * (
+            sig + correction * sin_s * (c2sm + correction * cos_s * (-1 + 2 * c2sm ** 2)))
+        sin_sigma[active], cos_sigma[active], sigma[active] = sin_s, cos_s, sig
+        cos2_alpha[active], cos_2sigma_m[active] = c2a, c2sm
+        converged = np.abs(new_lam - lam[active]) <= tolerance
+        lam[active] = new_lam
+        active = active[~converged]
+    u2 = cos2_alpha * (semi_major ** 2 - semi_minor ** 2) / semi_minor ** 2
+    a_term = 1 + u2 / 16384 * (4096 + u2 * (-768 + u2 * (320 - 175 * u2)))
+    b_term = u2 / 1024 * (256 + u2 * (-128 + u2 * (74 - 47 * u2)))
+    delta_sigma = b_term * sin_sigma * (cos_2sigma_m + b_term / 4 * (
+        cos_sigma * (-1 + 2 * cos_2sigma_m ** 2) -
+        b_term / 6 * cos_2sigma_m * (-3 + 4 * sin_sigma ** 2) * (-3 + 4 * cos_2sigma_m ** 2)))
+    distances = semi_minor * a_term * (sigma - delta_sigma)
+    if len(active):
+        half = (end[active] - start[active]) / 2
+        haversine = np.sin(half[:, 1]) ** 2 + np.cos(start[active, 1]) * np.cos(end[active, 1]) * np.sin(half[:, 0]) ** 2
+        distances[active] = (2 * semi_major + semi_minor) / 3 * 2 * np.arcsin(np.sqrt(np.clip(haversine, 0.0, 1.0)))
+    return distances
+
+
+def compensated_cumsum(values):
+    """Prefix sums of values with the exact rounding error of every addition (TwoSum) carried in a second running
+    sum, so sums + corrections is the prefix sum to within a few rounding errors of the result however long the sum
+    runs, and the difference of two prefix sums is exact to the size of the difference.
+    :param - values - (n) float array
+    :return - tuple of the (n) plain np.cumsum sums and the (n) corrections"""
+    values = np.asarray(values, dtype=np.float64)
+    sums = np.cumsum(values)
+    previous = np.concatenate([[0.0], sums[:-1]])
+    value_part = sums - previous
+    errors = (previous - (sums - value_part)) + (values - value_part)
+    return sums, np.cumsum(errors)
+
+
+def vertex_measures(packed, mode="PLANAR", ellipsoid=WGS84):
+    """Returns the distance of every vertex along its feature, measured over the parts in order without the gaps
+    between them (as segmentAlongLine does), and the length of every feature. The segment lengths are accumulated with
+    compensated_cumsum, so measures far into a batch do not drift.
+    :param - packed - PackedLines
+    :param - mode - PLANAR, 3D or GEODESIC, see step_lengths
+    :param - ellipsoid - (semi-major axis, flattening) of GEODESIC lengths
+    :return - tuple of the (n_vertices) measure array and the (n_features) length array"""
+    sums, corrections = compensated_cumsum(step_lengths(packed, mode, ellipsoid))
+    vertex_offsets = packed.vertex_offsets
+    has_vertices = np.diff(vertex_offsets) > 0
+    first_vertex = vertex_offsets[:-1][packed.vertex_feature_index()]
+    measures = (sums - sums[first_vertex]) + (corrections - corrections[first_vertex])
+    lengths = np.zeros(packed.feature_count)
+    lengths[has_vertices] = measures[vertex_offsets[1:][has_vertices] - 1]
+    return measures, lengths
+
+
+class LengthIndex(object):
+    """Cumulative length index of packed lines: the measure of every vertex along its feature and the length of every
+    feature (see vertex_measures), computed once and binary searched by every distance along line query.
+    :param - packed - PackedLines
+    :param - mode - PLANAR, 3D or GEODESIC, see step_lengths
+    :param - ellipsoid - (semi-major axis, flattening) of GEODESIC lengths"""
+
+    def __init__(self, packed, mode="PLANAR", ellipsoid=WGS84):
+        self.packed = packed
+        self.mode = str(mode).upper()
+        self.measures, self.lengths = vertex_measures(packed, mode, ellipsoid)
+        self._vertex_features = None
+        self._vertex_parts = None
+
+    @property
+    def vertex_features(self):
+        if self._vertex_features is None:
+            self._vertex_features = self.packed.vertex_feature_index()
+        return self._vertex_features
+
+    @property
+    def vertex_parts(self):
+        if self._vertex_parts is None:
+            self._vertex_parts = self.packed.vertex_part_index()
+        return self._vertex_parts
+
+    def locate(self, features, measures, at_part_end=False):
+        """Finds the segment holding each (feature, measure) query with one binary search over all vertices. Measures
+        are clipped to the feature. A measure on a part boundary, or within CUT_TOLERANCE of the feature length of
+        it, is placed at the start of the following part, where extract_intervals starts a piece cut there, or with
+        at_part_end at the end of the preceding part, where extract_intervals ends a piece cut there.
+        :param - features - (n) int array of feature indexes
+        :param - measures - (n) array of distances along the features
+        :param - at_part_end - if true measures on part boundaries are placed at the end of the preceding part
+        :return - tuple of the (n) start vertex index of each segment and the (n) fraction of the segment length
+        before the measure, the first vertex and 0 for features without segments"""
+        features = np.asarray(features, dtype=np.int64)
+        at = np.clip(np.asarray(measures, dtype=np.float64), 0.0, self.lengths[features])
+        first, last = self.packed.vertex_offsets[features], self.packed.vertex_offsets[features + 1] - 1
+        side = "left" if at_part_end else "right"
+        lower = grouped_searchsorted(self.vertex_features, self.measures, features, at, side, (first, last + 1)) - 1
+        lower = np.clip(lower, first, np.maximum(last - 1, first))
+        upper = np.minimum(lower + 1, np.maximum(last, first))
+        tolerance = CUT_TOLERANCE * self.lengths[features]
+        if at_part_end:
+            # The first segment of a part just past a boundary moves back to the last segment of the part before.
+            part_start = self.packed.part_offsets[self.vertex_parts[lower]]
+            across = (lower == part_start) & (lower > first) & (at <= self.measures[lower] + tolerance)
+            moved = lower - 2
+        else:
+            # The last segment of a part just before a boundary moves on to the first segment of the part after.
+            part_end = self.packed.part_offsets[self.vertex_parts[upper] + 1] - 1
+            across = (upper == part_end) & (upper < last) & (at >= self.measures[upper] - tolerance)
+            moved = upper + 1
+        if across.any():
+            lower = np.clip(np.where(across, moved, lower), first, np.maximum(last - 1, first))
+            upper = np.minimum(lower + 1, np.maximum(last, first))
+        span = self.measures[upper] - self.measures[lower]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            fraction = np.clip(np.where(span > 0, (at - self.measures[lower]) / span, 0.0), 0.0, 1.0)
+        return lower, fraction
+
+
+def curvature_split_measures(packed, turn_angle, min_length=0.0, max_length=None, curvature=None):
+    """Places split points where lines bend. The turning angle at every vertex is the heading change between the
+    segments before and after it, and a vertex becomes a split point each time the cumulative turning angle of its
+    line passes another multiple of turn_angle, or when its curvature (turning angle per unit of length) is at least
+    curvature. Split points closer than min_length to the previous split point or to the line end are dropped, and
+    pieces longer than max_length are divided into equal pieces. All lines of the batch are handled together over the
+    packed vertex arrays, only the min_length filter loops over the split points.
+    :param - packed - PackedLines
+    :param - turn_angle - cumulative turning angle in degrees between split points, a scalar or a (n_features) array
+    :param - min_length - minimum length of a piece
+    :param - max_length - optional maximum length of a piece
+    :param - curvature - optional curvature in degrees per unit of length that always splits at a vertex
+    :return - tuple of the (n_features + 1) interval offsets and the from and to measure arrays of the pieces"""
+    measures, lengths = vertex_measures(packed)
+    vertex_feature = packed.vertex_feature_index()
+    # Headings of the segments with a length, turns are taken between consecutive segments of a part.
+    starts = segment_index(packed)
+    delta = packed.coords[starts + 1] - packed.coords[starts]
+    segment_length = np.hypot(delta[:, 0], delta[:, 1])
+    keep = segment_length > 0
+    starts, delta, segment_length = starts[keep], delta[keep], segment_length[keep]
+    heading = np.arctan2(delta[:, 1], delta[:, 0])
+    segment_part = packed.vertex_part_index()[starts]
+    same_part = segment_part[1:] == segment_part[:-1]
+    turn = np.abs(np.mod(heading[1:] - heading[:-1] + np.pi, 2.0 * np.pi) - np.pi)[same_part]
+    turn_vertex = starts[1:][same_part]
+    turn_feature = vertex_feature[turn_vertex]
+    turn_degrees = np.degrees(turn)
+    # Cumulative turning restarts with every line.
+    cumulative = np.cumsum(turn_degrees)
+    first_turn = np.searchsorted(turn_feature, np.arange(packed.feature_count), side="left")
+    has_turns = first_turn < len(turn_feature)
+    feature_base = np.zeros(packed.feature_count)
+    feature_base[has_turns] = cumulative[first_turn[has_turns]] - turn_degrees[first_turn[has_turns]]
+    cumulative = cumulative - feature_base[turn_feature]
+    threshold = np.broadcast_to(np.asarray(turn_angle, dtype=np.float64), (packed.feature_count,))[turn_feature]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        level = np.where(threshold > 0, np.floor(cumulative / np.where(threshold > 0, threshold, 1.0)), 0.0)
+        previous_level = np.where(
+            threshold > 0,
+            np.floor((cumulative - turn_degrees) / np.where(threshold > 0, threshold, 1.0)),
+            0.0,
+        )
+    is_split = level > previous_level
+    if curvature is not None:
+        adjacent_length = (segment_length[1:] + segment_length[:-1])[same_part] / 2.0
+        is_split |= turn_degrees / adjacent_length >= float(curvature)
+    split_feature = turn_feature[is_split].tolist()
+    split_measure = measures[turn_vertex[is_split]].tolist()
+    feature_lengths = lengths.tolist()
+    kept_feature, kept_measure = [], []
+    last_feature, last_measure = -1, 0.0
+    for feature, measure in zip(split_feature, split_measure):
+        if feature != last_feature:
+            last_feature, last_measure = feature, 0.0
+        if measure - last_measure >= max(min_length, 0.0) and measure > last_measure:
+            if feature_lengths[feature] - measure >= min_length and feature_lengths[feature] > measure:
+                kept_feature.append(feature)
+                kept_measure.append(measure)
+                last_measure = measure
+    kept_feature = np.asarray(kept_feature, dtype=np.int64)
+    kept_measure = np.asarray(kept_measure, dtype=np.float64)
+    interval_counts = np.bincount(kept_feature, minlength=packed.feature_count) + 1
+    interval_offsets = np.concatenate([[0], np.cumsum(interval_counts)])
+    from_measures = np.zeros(interval_offsets[-1])
+    to_measures = np.zeros(interval_offsets[-1])
+    rank = np.arange(len(kept_feature)) - np.searchsorted(kept_feature, kept_feature, side="left")
+    from_measures[interval_offsets[kept_feature] + rank + 1] = kept_measure
+    to_measures[interval_offsets[kept_feature] + rank] = kept_measure
+    to_measures[interval_offsets[1:] - 1] = lengths
+    if max_length:
+        piece_length = to_measures - from_measures
+        pieces = np.maximum(np.ceil(piece_length / float(max_length) - 1e-9), 1).astype(np.int64)
+        piece_index = np.arange(pieces.sum()) - np.repeat(np.cumsum(pieces) - pieces, pieces)
+        step = np.repeat(piece_length / pieces, pieces)
+        piece_from = np.repeat(from_measures, pieces) + piece_index * step
+        piece_to = np.where(
+            piece_index == np.repeat(pieces, pieces) - 1, np.repeat(to_measures, pieces), piece_from + step
+        )
+        interval_feature = np.repeat(np.arange(packed.feature_count), interval_counts)
+        interval_counts = np.bincount(interval_feature, weights=pieces, minlength=packed.feature_count).astype(
+            np.int64
+        )
+        interval_offsets = np.concatenate([[0], np.cumsum(interval_counts)])
+        from_measures, to_measures = piece_from, piece_to
+    return interval_offsets, from_measures, to_measures
+
+
+def points_near_lines(packed, points, tolerance, point_features=None, cell_size=None):
+    """Finds the lines within a tolerance of each point with a uniform grid spatial index, and the measure of the
+    nearest location on each of those lines. Line segments longer than POINT_GRID_PIECE_CELLS cells are cut into
+    pieces of at most that length, each segment or piece is registered in every grid cell its bounding box (grown
+    by the tolerance) covers, each point is looked up in its cell, and the candidate pairs are measured in one
+    vectorized pass.
+    :param - packed - PackedLines
+    :param - points - (n_points, 2) array of XY coordinates
+    :param - tolerance - search distance
+    :param - point_features - optional (n_points) array of the feature index each point comes from, a point is not
+    matched to its own feature
+    :param - cell_size - optional grid cell size, defaults to the larger of twice the tolerance and the median
+    segment length
+    :return - tuple of (n_pairs) arrays: point index, feature index, measure along the feature and distance"""
+    points = np.asarray(points, dtype=np.float64).reshape(-1, 2)
+    empty = (np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64), np.empty(0), np.empty(0))
+    starts = segment_index(packed)
+    if not len(starts) or not len(points):
+        return empty
+    tolerance = float(tolerance)
+    vertex_measure, _ = vertex_measures(packed)
+    p = packed.coords[starts]
+    d = packed.coords[starts + 1] - p
+    segment_length = np.hypot(d[:, 0], d[:, 1])
+    if cell_size is None:
+        cell_size = max(2.0 * tolerance, float(np.median(segment_length)))
+    cell_size = cell_size if cell_size > 0 else 1.0
+    origin = np.minimum(packed.coords.min(axis=0), points.min(axis=0)) - tolerance
+    # Segments longer than a few cells are registered as pieces of at most that length, so a long diagonal segment
+    # adds cells in proportion to its length rather than to the area of its bounding box.
+    piece_counts = np.maximum(np.ceil(segment_length / (POINT_GRID_PIECE_CELLS * cell_size)), 1).astype(np.int64)
+    if np.any(piece_counts > 1):
+        piece_segment = np.repeat(np.arange(len(starts)), piece_counts)
+        piece_index = np.arange(len(piece_segment)) - np.repeat(np.cumsum(piece_counts) - piece_counts, piece_counts)
+        piece_d = d[piece_segment] / piece_counts[piece_segment][:, np.newaxis]
+        piece_start = p[piece_segment] + piece_index[:, np.newaxis] * piece_d
+        piece_end = piece_start + piece_d
+    else:
+        piece_segment, piece_start, piece_end = None, p, p + d
+    low = np.floor((np.minimum(piece_start, piece_end) - tolerance - origin) / cell_size).astype(np.int64)
+    high = np.floor((np.maximum(piece_start, piece_end) + tolerance - origin) / cell_size).astype(np.int64)
+    row_count = int(max(high[:, 1].max(), np.floor((points[:, 1].max() - origin[1]) / cell_size))) + 1
+    # Every (cell, segment piece) registration, sorted by cell key.
+    span = high - low + 1
+    cell_counts = span[:, 0] * span[:, 1]
+    registration = np.repeat(np.arange(len(piece_start)), cell_counts)
+    position = np.arange(cell_counts.sum()) - np.repeat(np.cumsum(cell_counts) - cell_counts, cell_counts)
+    cell_x = low[registration, 0] + position // span[registration, 1]
+    cell_y = low[registration, 1] + position % span[registration, 1]
+    cell_keys = cell_x * row_count + cell_y
+    order = np.argsort(cell_keys, kind="stable")
+    cell_keys, registration = cell_keys[order], registration[order]
+    if piece_segment is not None:
+        registration = piece_segment[registration]
+    point_cells = np.floor((points - origin) / cell_size).astype(np.int64)
+    point_keys = point_cells[:, 0] * row_count + point_cells[:, 1]
+    first = np.searchsorted(cell_keys, point_keys, side="left")
+    last = np.searchsorted(cell_keys, point_keys, side="right")
+    pair_counts = last - first
+    pair_point = np.repeat(np.arange(len(points)), pair_counts)
+    pair_segment = registration[
+        np.repeat(first, pair_counts) + np.arange(pair_counts.sum()) - np.repeat(np.cumsum(pair_counts) - pair_counts, pair_counts)
+    ]
+    # Nearest location of each candidate segment.
+    offset = points[pair_point] - p[pair_segment]
+    seg_d = d[pair_segment]
+    squared_length = np.einsum("ij,ij->i", seg_d, seg_d)
+    with np.errstate(invalid="ignore", divide="ignore"):
+        t = np.where(squared_length > 0, np.einsum("ij,ij->i", offset, seg_d) / squared_length, 0.0)
+    t = np.clip(t, 0.0, 1.0)
+    distance = np.hypot(*(offset - t[:, np.newaxis] * seg_d).T)
+    pair_feature = packed.vertex_feature_index()[starts[pair_segment]]
+    keep = distance <= tolerance
+    if point_features is not None:
+        keep &= np.asarray(point_features, dtype=np.int64)[pair_point] != pair_feature
+    pair_point, pair_segment, pair_feature = pair_point[keep], pair_segment[keep], pair_feature[keep]
+    distance, t = distance[keep], t[keep]
+    measure = vertex_measure[starts[pair_segment]] + t * segment_length[pair_segment]
+    # Keep the nearest segment of each (point, feature) pair.
+    order = np.lexsort((distance, pair_feature, pair_point))
+    pair_point, pair_feature = pair_point[order], pair_feature[order]
+    first_of_pair = np.ones(len(order), dtype=bool)
+    first_of_pair[1:] = (pair_point[1:] != pair_point[:-1]) | (pair_feature[1:] != pair_feature[:-1])
+    return (
+        pair_point[first_of_pair],
+        pair_feature[first_of_pair],
+        measure[order][first_of_pair],
+        distance[order][first_of_pair],
+    )
+
+
+def line_end_points(packed):
+    """Returns the XY coordinates of the first and last vertex of every part and the feature index of each."""
+    part_offsets = packed.part_offsets
+    has_vertices = np.diff(part_offsets) > 0
+    part_feature = packed.part_feature_index()[has_vertices]
+    first = part_offsets[:-1][has_vertices]
+    last = part_offsets[1:][has_vertices] - 1
+    return np.concatenate([packed.coords[first], packed.coords[last]]), np.concatenate([part_feature, part_feature])
+
+
+def select_vertices(packed, keep):
+    """Returns packed lines with only the vertices where keep is true, parts and features keep their order.
+    :param - packed - PackedLines
+    :param - keep - (n_vertices) boolean array
+    :return - PackedLines"""
+    keep = np.asarray(keep, dtype=bool)
+    kept_before = np.concatenate([[0], np.cumsum(keep, dtype=np.int64)])
+    zm = packed.zm_columns()
+    return PackedLines.from_zm_columns(packed.coords[keep], kept_before[packed.part_offsets], packed.feature_offsets,
+                                       packed.oids, None if zm is None else zm[keep], packed.z is not None,
+                                       packed.m is not None)
+
+
+def _part_end_vertices(packed):
+    """Returns the first and last vertex index of every part with vertices."""
+    part_offsets = packed.part_offsets
+    has_vertices = np.diff(part_offsets) > 0
+    return part_offsets[:-1][has_vertices], part_offsets[1:][has_vertices] - 1
+
+
+def _point_segment_distance(points, starts, ends):
+    """Distance of each point to the segment from the start to the end point of its row."""
+    direction = ends - starts
+    length_squared = np.einsum("ij,ij->i", direction, direction)
+    along = np.einsum("ij,ij->i", points - starts, direction)
+    fraction = np.clip(np.divide(along, length_squared, out=np.zeros(len(points)), where=length_squared > 0), 0, 1)
+    offset = points - starts - fraction[:, np.newaxis] * direction
+    return np.hypot(offset[:, 0], offset[:, 1])
+
+
+def feature_point_distances(packed, points):
+    """Returns the distance of one point per feature to that feature, the smallest distance to any of its segments.
+    :param - packed - PackedLines
+    :param - points - (n_features, 2) array with the point of each feature
+    :return - (n_features) array of distances, NaN for features without segments"""
+    starts = segment_index(packed)
+    segment_features = packed.vertex_feature_index()[starts]
+    distances = _point_segment_distance(np.asarray(points)[segment_features], packed.coords[starts],
+                                        packed.coords[starts + 1])
+    return group_reduce(np.minimum, distances, segment_feature_offsets(packed, starts))
+
+
+def douglas_peucker_keep(packed, tolerance):
+    """Marks the vertices kept by Douglas-Peucker simplification. All open vertex ranges of all parts are refined
+    together, each pass finds the farthest vertex from the chord of every range in one vectorized step and splits
+    the ranges where it is farther than the tolerance, so the number of passes follows the depth of the recursion
+    instead of the number of features. Part end vertices are always kept.
+    :param - packed - PackedLines
+    :param - tolerance - maximum distance of a removed vertex from the simplified line
+    :return - (n_vertices) boolean array"""
+    keep = np.zeros(packed.vertex_count, dtype=bool)
+    starts, ends = _part_end_vertices(packed)
+    keep[starts] = keep[ends] = True
+    coords = packed.coords
+    while len(starts):
+        interior = ends - starts - 1
+        has_interior = interior > 0
+        starts, ends, interior = starts[has_interior], ends[has_interior], interior[has_interior]
+        if not len(starts):
+            break
+        range_offsets = np.concatenate([[0], np.cumsum(interior)])
+        range_index = np.repeat(np.arange(len(starts)), interior)
+        vertex = np.arange(range_offsets[-1]) - range_offsets[range_index] + starts[range_index] + 1
+        distance = _point_segment_distance(coords[vertex], coords[starts[range_index]], coords[ends[range_index]])
+        farthest = np.maximum.reduceat(distance, range_offsets[:-1])
+        # First vertex of each range at its maximum distance.
+        at_maximum = np.flatnonzero(distance == farthest[range_index])
+        _, first = np.unique(range_index[at_maximum], return_index=True)
+        pivot = vertex[at_maximum[first]]
+        split = farthest > tolerance
+        pivot = pivot[split]
+        keep[pivot] = True
+        starts, ends = np.concatenate([starts[split], pivot]), np.concatenate([pivot, ends[split]])
+    return keep
+
+
+def visvalingam_keep(packed, min_area):
+    """Marks the vertices kept by Visvalingam-Whyatt simplification. Instead of removing one vertex at a time from
+    a priority queue, each pass removes every vertex whose triangle with its kept neighbours is smaller than min_area
+    and smaller than the triangles of the two kept vertices on either side of it. Vertices removed in the same pass
+    do not share a neighbour, and the areas are recomputed between passes, so the result is close to (but not always
+    identical to) the one vertex at a time order. Equal areas, such as the zero areas of a straight run of vertices,
+    are ordered by a hash of the vertex index so each pass removes a share of a run instead of one vertex of it. Part
+    end vertices are always kept.
+    :param - packed - PackedLines
+    :param - min_area - triangle area below which a vertex is removed
+    :return - (n_vertices) boolean array"""
+    keep = np.ones(packed.vertex_count, dtype=bool)
+    vertex_part = packed.vertex_part_index()
+    coords = packed.coords
+    # Multiplying by an odd number wraps around 2 ** 64 without two vertices sharing a hash.
+    vertex_hash = np.arange(packed.vertex_count, dtype=np.uint64) * np.uint64(VERTEX_HASH_MULTIPLIER)
+    while True:
+        kept = np.flatnonzero(keep)
+        kept_part = vertex_part[kept]
+        interior = np.zeros(len(kept), dtype=bool)
+        interior[1:-1] = (kept_part[1:-1] == kept_part[:-2]) & (kept_part[1:-1] == kept_part[2:])
+        middle = np.flatnonzero(interior)
+        previous, point, following = coords[kept[middle - 1]], coords[kept[middle]], coords[kept[middle + 1]]
+        area = np.full(len(kept), np.inf)
+        area[middle] = 0.5 * np.abs((point[:, 0] - previous[:, 0]) * (following[:, 1] - previous[:, 1]) -
+                                    (following[:, 0] - previous[:, 0]) * (point[:, 1] - previous[:, 1]))
+        key = vertex_hash[kept]
+        padded_area = np.concatenate([[np.inf, np.inf], area, [np.inf, np.inf]])
+        padded_key = np.concatenate([[0, 0], key, [0, 0]]).astype(np.uint64)
+        remove = area < min_area
+        for shift in (0, 1, 3, 4):
+            other_area, other_key = padded_area[shift:shift + len(kept)], padded_key[shift:shift + len(kept)]
+            remove &= (area < other_area) | ((area == other_area) & (key < other_key))
+        if not np.any(remove):
+            return keep
+        keep[kept[remove]] = False
+
+
+def simplify_lines(packed, tolerance, method="DOUGLAS_PEUCKER"):
+    """Simplifies packed lines with Douglas-Peucker (tolerance is a distance) or Visvalingam-Whyatt (tolerance is
+    a triangle area). Z and M values of the kept vertices are kept.
+    :param - packed - PackedLines
+    :param - tolerance - distance or area tolerance of the method
+    :param - method - DOUGLAS_PEUCKER or VISVALINGAM
+    :return - PackedLines"""
+    method = str(method).upper()
+    if method == "DOUGLAS_PEUCKER":
+        return select_vertices(packed, douglas_peucker_keep(packed, tolerance))
+    if method == "VISVALINGAM":
+        return select_vertices(packed, visvalingam_keep(packed, tolerance))
+    raise ValueError("Unknown simplification method {0}, use DOUGLAS_PEUCKER or VISVALINGAM.".format(method))
+
+
+def densify_lines(packed, interval):
+    """Adds vertices so that no segment is longer than interval. Each segment is divided into the fewest equal
+    pieces that are at most interval long, and Z and M values are interpolated along the segment.
+    :param - packed - PackedLines
+    :param - interval - maximum segment length
+    :return - PackedLines"""
+    if interval <= 0:
+        raise ValueError("The densification interval must be positive.")
+    starts = segment_index(packed)
+    delta = packed.coords[starts + 1] - packed.coords[starts]
+    # Every vertex is repeated once, segment start vertices once per piece of their segment.
+    piece_count = np.ones(packed.vertex_count, dtype=np.int64)
+    piece_count[starts] = np.maximum(np.ceil(np.hypot(delta[:, 0], delta[:, 1]) / interval), 1).astype(np.int64)
+    new_offsets = np.concatenate([[0], np.cumsum(piece_count)])
+    source = np.repeat(np.arange(packed.vertex_count), piece_count)
+    fraction = (np.arange(new_offsets[-1]) - new_offsets[source]) / piece_count[source]
+    following = np.minimum(source + 1, max(packed.vertex_count - 1, 0))
+
+    def interpolate(values):
+        if values is None:
+            return None
+        start = np.take(values, source, axis=0)
+        moved = fraction > 0
+        following_values = np.take(values, following, axis=0)
+        if values.ndim > 1:
+            moved = moved[:, np.newaxis]
+            return np.where(moved, start + fraction[:, np.newaxis] * (following_values - start), start)
+        return np.where(moved, start + fraction * (following_values - start), start)
+
+    return PackedLines.from_zm_columns(interpolate(packed.coords), new_offsets[packed.part_offsets],
+                                       packed.feature_offsets, packed.oids, interpolate(packed.zm_columns()),
+                                       packed.z is not None, packed.m is not None)
+
+
+def feature_range(packed, start, end):
+    """Returns features start:end of packed lines. The coordinate, Z, M and oid arrays are views of the input arrays,
+    only the offsets are rebased, so a worker can process a range of shared lines without copying them.
+    :param - packed - PackedLines
+    :param - start - index of the first feature
+    :param - end - index past the last feature
+    :return - PackedLines"""
+    first_part, last_part = packed.feature_offsets[start], packed.feature_offsets[end]
+    first_vertex, last_vertex = packed.part_offsets[first_part], packed.part_offsets[last_part]
+
+    def view(values):
+        return None if values is None else values[first_vertex:last_vertex]
+
+    return PackedLines(packed.coords[first_vertex:last_vertex],
+                       packed.part_offsets[first_part:last_part + 1] - first_vertex,
+                       packed.feature_offsets[start:end + 1] - first_part, packed.oids[start:end], view(packed.z),
+                       view(packed.m))
+
+
+def split_segment_counts(lengths, split_value, split_method="LENGTH", best_fit=True):
+    """Returns the number of segments and the segment length of every line split by length or count, from the line
+    lengths alone like linelibrary.split_measures_by_length and split_measures_by_count.
+    :param - lengths - (n_features) array of line lengths
+    :param - split_value - target segment length (LENGTH) or segment count (COUNT), a scalar or (n_features) array
+    :param - split_method - LENGTH or COUNT
+    :param - best_fit - with LENGTH, if true the counts are rounded so the segments of a line have equal lengths,
+    otherwise the segments have the target length and the last one is shorter
+    :return - tuple of the (n_features) int segment count array and the (n_features) segment length array"""
+    lengths = np.asarray(lengths, dtype=np.float64)
+    split_value = np.abs(np.broadcast_to(np.asarray(split_value, dtype=np.float64), lengths.shape))
+    if str(split_method).upper() == "LENGTH":
+        if np.any(split_value == 0):
+            raise ValueError("The split length must not be 0.")
+        if best_fit:
+            counts = np.maximum(1.0, np.round(lengths / split_value))
+            segment_lengths = lengths / counts
+        else:
+            counts = np.ceil(lengths / split_value)
+            segment_lengths = split_value.copy()
+    else:
+        counts = np.round(np.maximum(1.0, split_value))
+        segment_lengths = lengths / counts
+    return counts.astype(np.int64), segment_lengths
+
+
+def split_interval_measures(lengths, counts, segment_lengths, overlap=0.0):
+    """Returns the (from, to) measures of the segments of every line, the vectorized form of
+    linelibrary._split_measures. With overlap the segments reach overlap segment lengths past their neighbours.
+    :param - lengths - (n_features) array of line lengths
+    :param - counts - (n_features) int array of segment counts from split_segment_counts
+    :param - segment_lengths - (n_features) array of segment lengths from split_segment_counts
+    :param - overlap - overlap as a share of the segment length
+    :return - tuple of the (n_features + 1) segment offsets per feature and the (n_segments) from and to measures"""
+    lengths = np.asarray(lengths, dtype=np.float64)
+    counts = np.asarray(counts, dtype=np.int64)
+    offsets = np.concatenate([[0], np.cumsum(counts)])
+    feature = np.repeat(np.arange(len(counts)), counts)
+    index = (np.arange(offsets[-1]) - offsets[feature]).astype(np.float64)
+    overlap = float(overlap)
+    start_index = np.maximum(0.0, index - overlap) if overlap else index
+    end_index = np.minimum(counts[feature], index + overlap) if overlap else index
+    segment_length, length = np.asarray(segment_lengths, dtype=np.float64)[feature], lengths[feature]
+    return offsets, np.minimum(start_index * segment_length, length), np.minimum((end_index + 1) * segment_length, length)
+
+
+def _segment_fractions(measures, lower, at):
+    """Returns the fraction of the segments starting at the lower vertices before the measures, clipped to 0-1."""
+    span = measures[lower + 1] - measures[lower]
+    with np.errstate(invalid="ignore", divide="ignore"):
+        return np.clip(np.where(span > 0, (at - measures[lower]) / span, 0.0), 0.0, 1.0)
+
+
+def _interpolate_vertices(values, lower, fraction):
+    """Interpolates vertex values (coordinates, Z or M) at fractions of the segments starting at the lower vertices.
+    Rows are gathered with np.take, which is several times faster than fancy indexing on (n, k) arrays."""
+    if values.ndim > 1:
+        fraction = fraction[:, np.newaxis]
+    start = np.take(values, lower, axis=0)
+    return start + fraction * (np.take(values, lower + 1, axis=0) - start)
+
+
+def extract_intervals(packed, features, from_measures, to_measures, index=None):
+    """Cuts the pieces between (from, to) measures out of packed lines, segmentAlongLine for a batch of intervals.
+    Measures run along the parts of a feature in order without the gaps between them (see vertex_measures), and an
+    interval crossing a part gap gives a multipart piece. A piece part is its start point, the vertices strictly
+    between its measures and its end point, with Z and M interpolated at the cuts. Vertices within CUT_TOLERANCE of
+    the feature length from a cut are left out, as are parts the interval only touches within it, so rounding in the
+    measures does not add duplicate cut points or zero length parts.
+    :param - packed - PackedLines
+    :param - features - (n_intervals) int array of the feature index of each interval
+    :param - from_measures - (n_intervals) array of start measures, clipped to the feature
+    :param - to_measures - (n_intervals) array of end measures, clipped to the feature
+    :param - index - optional LengthIndex of the packed lines, a planar index is built if None
+    :return - PackedLines with one feature per interval, with the oids of the interval features"""
+    features = np.asarray(features, dtype=np.int64)
+    index = index or LengthIndex(packed)
+    measures, lengths = index.measures, index.lengths
+    starts = np.clip(np.asarray(from_measures, dtype=np.float64), 0.0, lengths[features])
+    ends = np.clip(np.asarray(to_measures, dtype=np.float64), starts, lengths[features])
+    # Parts with at least one segment and their measure ranges.
+    parts = np.flatnonzero(np.diff(packed.part_offsets) > 1)
+    part_groups = packed.part_feature_index()[parts]
+    first_vertex, last_vertex = packed.part_offsets[parts], packed.part_offsets[parts + 1] - 1
+    part_starts, part_ends = measures[first_vertex], measures[last_vertex]
+    # Pieces are the parts overlapping an interval, a zero length interval keeps the part it touches first.
+    lowest = np.searchsorted(part_groups, features, "left")
+    highest = np.searchsorted(part_groups, features, "right")
+    interval_tolerance = CUT_TOLERANCE * lengths[features]
+    first = grouped_searchsorted(part_groups, part_ends, features, starts + interval_tolerance, "right")
+    last = grouped_searchsorted(part_groups, part_starts, features, ends - interval_tolerance, "left") - 1
+    touching = np.minimum(grouped_searchsorted(part_groups, part_ends, features, starts, "left"), highest - 1)
+    empty = first > last
+    first[empty], last[empty] = touching[empty], touching[empty]
+    piece_counts = np.where(highest > lowest, last - first + 1, 0)
+    feature_offsets = np.concatenate([[0], np.cumsum(piece_counts)])
+    piece_interval = np.repeat(np.arange(len(features)), piece_counts)
+    piece = first[piece_interval] + np.arange(feature_offsets[-1]) - feature_offsets[piece_interval]
+    piece_starts = np.maximum(starts[piece_interval], part_starts[piece])
+    piece_ends = np.maximum(np.minimum(ends[piece_interval], part_ends[piece]), piece_starts)
+    # Vertices strictly inside each piece, found by one binary search over the vertices of all parts.
+    vertex_part = packed.vertex_part_index()
+    piece_part = parts[piece]
+    tolerance = interval_tolerance[piece_interval]
+    inner_start = grouped_searchsorted(vertex_part, measures, piece_part, piece_starts + tolerance, "right")
+    inner_end = grouped_searchsorted(vertex_part, measures, piece_part, piece_ends - tolerance, "left")
+    inner_start = np.clip(inner_start, first_vertex[piece] + 1, last_vertex[piece])
+    inner_end = np.maximum(np.clip(inner_end, first_vertex[piece] + 1, last_vertex[piece]), inner_start)
+    inner_counts = inner_end - inner_start
+    part_offsets = np.concatenate([[0], np.cumsum(inner_counts + 2)])
+    inner_piece = np.repeat(np.arange(len(piece)), inner_counts)
+    within = np.arange(len(inner_piece)) - (part_offsets[:-1] - 2 * np.arange(len(piece)))[inner_piece]
+    # Every output vertex is gathered from its source vertex, the cut points are written over their slots after.
+    source = np.zeros(part_offsets[-1], dtype=np.int64)
+    source[part_offsets[inner_piece] + 1 + within] = inner_start[inner_piece] + within
+    # The cut fractions are shared by the coordinates, Z and M.
+    start_fraction = _segment_fractions(measures, inner_start - 1, piece_starts)
+    end_fraction = _segment_fractions(measures, inner_end - 1, piece_ends)
+
+    def cut(values):
+        if values is None:
+            return None
+        result = np.take(values, source, axis=0)
+        result[part_offsets[:-1]] = _interpolate_vertices(values, inner_start - 1, start_fraction)
+        result[part_offsets[1:] - 1] = _interpolate_vertices(values, inner_end - 1, end_fraction)
+        return result
+
+    return PackedLines.from_zm_columns(cut(packed.coords), part_offsets, feature_offsets, packed.oids[features],
+                                       cut(packed.zm_columns()), packed.z is not None, packed.m is not None)
+
+
+def points_along_lines(packed, features, measures, index=None, at_part_end=False):
+    """Returns the points at distances along features, positionAlongLine for a batch of queries. Each query is found
+    with one binary search over the cumulative length index and interpolated on its segment.
+    :param - packed - PackedLines
+    :param - features - (n) int array of the feature index of each query
+    :param - measures - (n) array of distances along the features, clipped to the feature
+    :param - index - optional LengthIndex of the packed lines, a planar index is built if None
+    :param - at_part_end - if true points on part boundaries are the end of the preceding part, see LengthIndex.locate
+    :return - tuple of the (n, 2) coordinates and the (n) Z and M values, None when the lines have none"""
+    index = index or LengthIndex(packed)
+    lower, fraction = index.locate(features, measures, at_part_end)
+    upper = np.minimum(lower + 1, packed.vertex_count - 1)
+
+    def at(values):
+        if values is None:
+            return None
+        start = np.take(values, lower, axis=0)
+        return start + fraction[:, np.newaxis] * (np.take(values, upper, axis=0) - start)
+
+    zm = at(packed.zm_columns())
+    return (at(packed.coords), zm[:, 0] if packed.z is not None else None,
+            zm[:, -1] if packed.m is not None else None)
+
+
+def reverse_lines(packed, features=None):
+    """Reverses the direction of features: their parts in reverse order, each from its last vertex to its first, as
+    segmentAlongLine returns a segment whose start is after its end.
+    :param - packed - PackedLines
+    :param - features - optional int array or (n_features) boolean mask of the features to reverse, all if None
+    :return - PackedLines"""
+    if features is None:
+        flip = np.ones(packed.feature_count, dtype=bool)
+    elif np.asarray(features).dtype == bool:
+        flip = np.asarray(features)
+    else:
+        flip = np.zeros(packed.feature_count, dtype=bool)
+        flip[np.asarray(features, dtype=np.int64)] = True
+
+    def mirror(group, offsets):
+        source = np.arange(len(group))
+        flipped = flip[group]
+        source[flipped] = (offsets[group] + offsets[group + 1] - 1 - source)[flipped]
+        return source
+
+    part_source = mirror(packed.part_feature_index(), packed.feature_offsets)
+    vertex_source = mirror(packed.vertex_feature_index(), packed.vertex_offsets)
+    part_offsets = np.concatenate([[0], np.cumsum(np.diff(packed.part_offsets)[part_source])])
+    zm = packed.zm_columns()
+    return PackedLines.from_zm_columns(np.take(packed.coords, vertex_source, axis=0), part_offsets,
+                                       packed.feature_offsets, packed.oids,
+                                       None if zm is None else np.take(zm, vertex_source, axis=0),
+                                       packed.z is not None, packed.m is not None)
+
+
+def line_centroids(packed):
+    """Returns the centroid of every feature, the length weighted mean of its segment midpoints. Features without
+    length get the mean of their vertices.
+    :param - packed - PackedLines
+    :return - (n_features, 2) array of centroids, NaN for features without vertices"""
+    starts = segment_index(packed)
+    start_points = np.take(packed.coords, starts, axis=0)
+    delta = np.take(packed.coords, starts + 1, axis=0) - start_points
+    weights = np.hypot(delta[:, 0], delta[:, 1])
+    midpoints = start_points + delta / 2
+    offsets = segment_feature_offsets(packed, starts)
+    totals = group_reduce(np.add, weights, offsets, 0.0)
+    weighted = group_reduce(np.add, midpoints * weights[:, np.newaxis], offsets, 0.0)
+    vertex_offsets = packed.vertex_offsets
+    with np.errstate(invalid="ignore", divide="ignore"):
+        vertex_means = group_reduce(np.add, packed.coords, vertex_offsets) / np.diff(vertex_offsets)[:, np.newaxis]
+        return np.where(totals[:, np.newaxis] > 0, weighted / totals[:, np.newaxis], vertex_means)
+
+
+def split_lines(packed, split_value, split_method="LENGTH", overlap=0.0, best_fit=True, index=None):
+    """Splits every line into segments of a target length or count in vectorized passes, see split_segment_counts,
+    split_interval_measures and extract_intervals.
+    :param - packed - PackedLines
+    :param - split_value - target segment length or count, a scalar or (n_features) array
+    :param - split_method - LENGTH or COUNT
+    :param - overlap - overlap as a share of the segment length
+    :param - best_fit - with LENGTH, if true the segments of a line have equal lengths
+    :param - index - optional LengthIndex of the packed lines, a planar index is built if None
+    :return - tuple of the segment PackedLines (oids are the parent oids), the (n_features + 1) segment offsets per
+    feature and the (n_segments) from and to measures"""
+    index = index or LengthIndex(packed)
+    counts, segment_lengths = split_segment_counts(index.lengths, split_value, split_method, best_fit)
+    offsets, from_measures, to_measures = split_interval_measures(index.lengths, counts, segment_lengths, overlap)
+    features = np.repeat(np.arange(packed.feature_count), counts)
+    pieces = extract_intervals(packed, features, from_measures, to_measures, index)
+    return pieces, offsets, from_measures, to_measures
+
+
+def grouped_searchsorted(groups, values, query_groups, query_values, side="left", query_bounds=None):
+    """np.searchsorted over (group, value) keys: finds the insertion index of each query in the sorted keys of all
+    groups. With fewer queries than keys every query is bisected within its own group, all queries a step at a time.
+    Otherwise values are replaced by their rank among all values so the keys are exact integers, and the queries are
+    found in one binary search.
+    :param - groups - int array of the group of each sorted key, non decreasing
+    :param - values - array of the values of each sorted key, non decreasing within a group
+    :param - query_groups - int array of the group of each query
+    :param - query_values - array of the value of each query, not NaN
+    :param - side - left or right, as in np.searchsorted
+    :param - query_bounds - optional tuple of the first and past the last key index of the group of each query, when
+    the caller already has the group offsets
+    :return - int array of insertion indexes into the sorted keys"""
+    groups = np.asarray(groups, dtype=np.int64)
+    values = np.asarray(values, dtype=np.float64)
+    query_groups = np.asarray(query_groups, dtype=np.int64)
+    query_values = np.asarray(query_values, dtype=np.float64)
+    if len(query_values) < len(values):
+        if query_bounds is None:
+            query_bounds = np.searchsorted(groups, query_groups, "left"), np.searchsorted(groups, query_groups, "right")
+        low, high = query_bounds
+        compare = np.less if side == "left" else np.less_equal
+        for _ in range(int(np.max(high - low, initial=0)).bit_length()):
+            middle = (low + high) // 2
+            searching = low < high
+            below = compare(values[np.minimum(middle, len(values) - 1)], query_values)
+            low = np.where(searching & below, middle + 1, low)
+            high = np.where(searching & ~below, middle, high)
+        return low
+    _, ranks = np.unique(np.concatenate([values, query_values]), return_inverse=True)
+    ranks = ranks.reshape(-1).astype(np.int64)
+    scale = ranks.max() + 1 if len(ranks) else 1
+    keys = groups * scale + ranks[: len(values)]
+    query_keys = query_groups * scale + ranks[len(values) :]
+    return np.searchsorted(keys, query_keys, side=side)
+
+
+def locate_in_intervals(interval_offsets, interval_starts, interval_ends, event_groups, event_measures):
+    """Assigns events to the measure intervals (segments) of their group (route) by one binary search over all
+    groups, see grouped_searchsorted. The intervals of a group must be ordered by their start measure, an event is
+    assigned to the last interval of its group that starts at or before its measure, and is unassigned when it is
+    past the end of that interval.
+    :param - interval_offsets - (n_groups + 1) int array, intervals of group i are interval_offsets[i]:[i + 1]
+    :param - interval_starts - (n_intervals) array of interval start measures
+    :param - interval_ends - (n_intervals) array of interval end measures
+    :param - event_groups - (n_events) int array of the group index of each event, -1 for events without a group
+    :param - event_measures - (n_events) array of event measures, NaN events are unassigned
+    :return - (n_events) int array of interval indexes, -1 for unassigned events"""
+    interval_offsets = np.asarray(interval_offsets, dtype=np.int64)
+    interval_ends = np.asarray(interval_ends, dtype=np.float64)
+    event_groups = np.asarray(event_groups, dtype=np.int64)
+    event_measures = np.asarray(event_measures, dtype=np.float64)
+    n_groups = len(interval_offsets) - 1
+    result = np.full(len(event_measures), -1, dtype=np.int64)
+    valid = (event_groups >= 0) & (event_groups < n_groups) & ~np.isnan(event_measures)
+    if not len(interval_ends) or not np.any(valid):
+        return result
+    interval_groups = np.repeat(np.arange(n_groups, dtype=np.int64), np.diff(interval_offsets))
+    index = grouped_searchsorted(
+        interval_groups, interval_starts, event_groups[valid], event_measures[valid], "right"
+    ) - 1
+    # The found interval must belong to the event group and reach the event measure.
+    found = index >= interval_offsets[event_groups[valid]]
+    found[found] &= event_measures[valid][found] <= interval_ends[index[found]]
+    result[np.flatnonzero(valid)[found]] = index[found]
+    return result
+
+
+def interval_aggregates(interval_index, interval_count, values=None):
+    """Counts the events of each interval and sums and averages their values with np.bincount.
+    :param - interval_index - (n_events) int array from locate_in_intervals, -1 events are ignored
+    :param - interval_count - number of intervals
+    :param - values - optional dictionary of name: (n_events) value arrays, NaN values are ignored
+    :return - dictionary with a COUNT array and a name_SUM and name_MEAN array for each value array"""
+    interval_index = np.asarray(interval_index, dtype=np.int64)
+    assigned = interval_index >= 0
+    index = interval_index[assigned]
+    result = {"COUNT": np.bincount(index, minlength=interval_count)}
+    for name, value_array in (values or {}).items():
+        value_array = np.asarray(value_array, dtype=np.float64)[assigned]
+        has_value = ~np.isnan(value_array)
+        sums = np.bincount(index[has_value], value_array[has_value], minlength=interval_count)
+        counts = np.bincount(index[has_value], minlength=interval_count)
+        result[name + "_SUM"] = sums
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[name + "_MEAN"] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)
+    return result
+
+
+class SparseTableMax(object):
+    """Sparse table answering the maximum of any contiguous range of an array in constant time after an
+    O(n log n) build. NaN values are ignored, ranges without values return NaN.
+    :param - values - (n) array of values"""
+
+    def __init__(self, values):
+        level = np.where(np.isnan(values), -np.inf, np.asarray(values, dtype=np.float64))
+        self.levels = [level]
+        width = 1
+        while 2 * width <= len(level):
+            level = np.maximum(level[:-width], level[width:])
+            self.levels.append(level)
+            width *= 2
+
+    def query(self, starts, ends):
+        """Returns the maximum of values[starts[i]:ends[i]] for each range, NaN for empty ranges."""
+        starts = np.asarray(starts, dtype=np.int64)
+        ends = np.asarray(ends, dtype=np.int64)
+        lengths = ends - starts
+        result = np.full(len(starts), np.nan)
+        non_empty = lengths > 0
+        if not np.any(non_empty):
+            return result
+        starts, ends, lengths = starts[non_empty], ends[non_empty], lengths[non_empty]
+        powers = np.floor(np.log2(lengths)).astype(np.int64)
+        # Two overlapping power of two blocks cover each range.
+        maximum = np.full(len(starts), -np.inf)
+        for power in np.unique(powers):
+            in_power = powers == power
+            level = self.levels[power]
+            maximum[in_power] = np.maximum(
+                level[starts[in_power]], level[ends[in_power] - (1 << int(power))]
+            )
+        result[non_empty] = np.where(np.isinf(maximum) & (maximum < 0), np.nan, maximum)
+        return result
+
+
+def rolling_window_statistics(groups, measures, values, window_length):
+    """Windowed sums, means and maxima of values ordered along routes. The window of each record is centered on its
+    measure and holds the records of the same group whose measure is within half the window length. Sums and means
+    use prefix sums over the measure sorted arrays and maxima use a sparse table, so the cost does not depend on the
+    window length.
+    :param - groups - (n) int array of the route of each record
+    :param - measures - (n) array of the measure of each record along its route (for example a segment midpoint)
+    :param - values - dictionary of name: (n) value arrays, NaN values are ignored
+    :param - window_length - length of the window in measure units
+    :return - dictionary with a WINDOW_COUNT array of the records in each window and name_SUM, name_MEAN and
+    name_MAX arrays, all in the input order"""
+    groups = np.asarray(groups, dtype=np.int64)
+    measures = np.asarray(measures, dtype=np.float64)
+    order = np.lexsort((measures, groups))
+    sorted_groups, sorted_measures = groups[order], measures[order]
+    half_window = float(window_length) / 2.0
+    lower = grouped_searchsorted(sorted_groups, sorted_measures, sorted_groups, sorted_measures - half_window, "left")
+    upper = grouped_searchsorted(sorted_groups, sorted_measures, sorted_groups, sorted_measures + half_window, "right")
+    inverse = np.empty_like(order)
+    inverse[order] = np.arange(len(order))
+    result = {"WINDOW_COUNT": (upper - lower)[inverse]}
+    for name, value_array in values.items():
+        sorted_values = np.asarray(value_array, dtype=np.float64)[order]
+        has_value = ~np.isnan(sorted_values)
+        value_sums = np.concatenate([[0.0], np.cumsum(np.where(has_value, sorted_values, 0.0))])
+        value_counts = np.concatenate([[0], np.cumsum(has_value)])
+        sums = value_sums[upper] - value_sums[lower]
+        counts = value_counts[upper] - value_counts[lower]
+        result[name + "_SUM"] = np.where(counts > 0, sums, np.nan)[inverse]
+        with np.errstate(invalid="ignore", divide="ignore"):
+            result[name + "_MEAN"] = np.where(counts > 0, sums / np.maximum(counts, 1), np.nan)[inverse]
+        result[name + "_MAX"] = SparseTableMax(sorted_values).query(lower, upper)[inverse]
+    return result
+
+
+def hashed_row_changes(old_keys, old_hashes, new_keys, new_hashes):
+    """Joins two versions of a table on hashed row keys with one sort and one binary search and classifies the rows.
+    New rows whose key is not in the old version are inserted, matched rows whose content hash differs are updated
+    and old rows whose key is not in the new version are deleted. Keys must be unique within each version.
+    :param - old_keys - (n_old) uint64 array of key hashes of the old rows
+    :param - old_hashes - (n_old) uint64 array of content hashes of the old rows
+    :param - new_keys - (n_new) uint64 array of key hashes of the new rows
+    :param - new_hashes - (n_new) uint64 array of content hashes of the new rows
+    :return - tuple of the int arrays of inserted and updated new row indexes and of deleted old row indexes"""
+    old_keys = np.asarray(old_keys, dtype=np.uint64)
+    new_keys = np.asarray(new_keys, dtype=np.uint64)
+    for keys, version in ((old_keys, "old"), (new_keys, "new")):
+        if len(np.unique(keys)) != len(keys):
+            raise ValueError("The keys of the {0} rows are not unique.".format(version))
+    if not len(old_keys):
+        return np.arange(len(new_keys)), np.empty(0, dtype=np.int64), np.empty(0, dtype=np.int64)
+    order = np.argsort(old_keys, kind="stable")
+    sorted_keys = old_keys[order]
+    position = np.minimum(np.searchsorted(sorted_keys, new_keys), len(sorted_keys) - 1)
+    matched = sorted_keys[position] == new_keys
+    old_index = order[position]
+    changed = matched & (np.asarray(old_hashes, dtype=np.uint64)[old_index] != np.asarray(new_hashes, dtype=np.uint64))
+    kept = np.zeros(len(old_keys), dtype=bool)
+    kept[old_index[matched]] = True
+    return np.flatnonzero(~matched), np.flatnonzero(changed), np.flatnonzero(~kept)
+
+
+def packed_lines_from_wkb(wkb_geometries, oids=None):
+    """Packs a sequence of WKB LineString/MultiLineString geometries (ISO or EWKB, with optional Z and M) into
+    PackedLines. Only the headers are read in Python, coordinates are read with np.frombuffer per part.
+    :param - wkb_geometries - iterable of bytes like WKB geometries, None is packed as an empty feature
+    :param - oids - optional object ids for each geometry
+    :return - PackedLines"""
+    xy_parts = []
+    zm_parts = []
+    part_counts = []
+    vertex_counts = []
+    has_z = has_m = False
+    for wkb in wkb_geometries:
+        if wkb is None:
+            part_counts.append(0)
+            continue
+        buffer = memoryview(wkb)
+        parts = []
+        _read_wkb_lines(buffer, 0, parts)
+        part_counts.append(len(parts))
+        for part, dims in parts:
+            vertex_counts.append(len(part))
+            xy_parts.append(part[:, :2])
+            zm_parts.append((part, dims))
+            has_z = has_z or "Z" in dims
+            has_m = has_m or "M" in dims
+    coords = np.concatenate(xy_parts) if xy_parts else np.empty((0, 2))
+    zm = None
+    if has_z or has_m:
+        # Z and M are read straight into the columns of one array, see PackedLines.zm_columns. Parts without Z get
+        # 0 and parts without M get NaN.
+        zm = np.empty((len(coords), has_z + has_m))
+        zm[:, -1] = np.nan
+        start = 0
+        for part, dims in zm_parts:
+            end = start + len(part)
+            if has_z:
+                zm[start:end, 0] = part[:, 2] if "Z" in dims else 0.0
+            if has_m and "M" in dims:
+                zm[start:end, -1] = part[:, dims.index("M")]
+            start = end
+    part_offsets = np.concatenate([[0], np.cumsum(vertex_counts, dtype=np.int64)])
+    feature_offsets = np.concatenate([[0], np.cumsum(part_counts, dtype=np.int64)])
+    return PackedLines.from_zm_columns(coords, part_offsets, feature_offsets, oids, zm, has_z, has_m)
+
+
+def packed_lines_to_wkb(packed):
+    """Writes each feature of PackedLines as little endian ISO WKB, a LineString for single part features and a
+    MultiLineString otherwise. Z and M values are written when the packed lines carry them.
+    :param - packed - PackedLines
+    :return - list of WKB bytes, one per feature, None for features without parts"""
+    dims = 2 + (packed.z is not None) + (packed.m is not None)
+    dimension_code = 1000 * ((packed.z is not None) + 2 * (packed.m is not None))
+    columns = [packed.coords]
+    if packed.z is not None or packed.m is not None:
+        columns.append(packed.zm_columns())
+    vertex_bytes = np.ascontiguousarray(np.hstack(columns), dtype="<f8").tobytes()
+    stride = dims * 8
+    header = struct.Struct("<BII")
+    wkb_geometries = []
+    part_offsets = packed.part_offsets
+    for feature in range(packed.feature_count):
+        first_part, last_part = packed.feature_offsets[feature], packed.feature_offsets[feature + 1]
+        if first_part == last_part:
+            wkb_geometries.append(None)
+            continue
+        chunks = []
+        if last_part - first_part > 1:
+            chunks.append(header.pack(1, 5 + dimension_code, last_part - first_part))
+        for part in range(first_part, last_part):
+            start, end = part_offsets[part], part_offsets[part + 1]
+            chunks.append(header.pack(1, 2 + dimension_code, end - start))
+            chunks.append(vertex_bytes[start * stride : end * stride])
+        wkb_geometries.append(b"".join(chunks))
+    return wkb_geometries
+
+
+def points_from_wkb(wkb_geometries):
+    """Reads the XY coordinates of WKB Point and MultiPoint geometries, empty and None geometries are skipped.
+    :param - wkb_geometries - iterable of bytes like WKB geometries
+    :return - tuple of the (n_points, 2) coordinate array and the index of the geometry of each point"""
+    coordinates = []
+    geometry_index = []
+    for index, wkb in enumerate(wkb_geometries):
+        if wkb is None:
+            continue
+        points = []
+        _read_wkb_points(memoryview(wkb), 0, points)
+        coordinates.extend(points)
+        geometry_index.extend([index] * len(points))
+    coords = np.asarray(coordinates, dtype=np.float64).reshape(-1, 2)
+    valid = ~np.isnan(coords).any(axis=1)
+    return coords[valid], np.asarray(geometry_index, dtype=np.int64)[valid]
+
+
+def _read_wkb_header(buffer, position):
+    """Reads a WKB byte order and geometry type returning (byte order prefix, base type, dimensions, position)."""
+    order = "<" if buffer[position] == 1 else ">"
+    (geometry_type,) = struct.unpack_from(order + "I", buffer, position + 1)
+    dims = "XY"
+    if geometry_type & 0x80000000 or geometry_type & 0x40000000:  # EWKB flags
+        dims += ("Z" if geometry_type & 0x80000000 else "") + ("M" if geometry_type & 0x40000000 else "")
+        if geometry_type & 0x20000000:  # EWKB SRID is skipped
+            position += 4
+        geometry_type &= 0x0FFFFFFF
+    else:  # ISO WKB dimension thousands
+        dims += {0: "", 1: "Z", 2: "M", 3: "ZM"}.get(geometry_type // 1000, "")
+        geometry_type %= 1000
+    return order, geometry_type, dims, position + 5
+
+
+def _read_wkb_lines(buffer, position, parts):
+    """Appends (coordinate array, dims) tuples for every linestring found at the position in a WKB buffer and
+    returns the position after the geometry."""
+    order, geometry_type, dims, position = _read_wkb_header(buffer, position)
+    if geometry_type == 2:  # LineString
+        (count,) = struct.unpack_from(order + "I", buffer, position)
+        position += 4
+        width = len(dims)
+        part = np.frombuffer(buffer, dtype=order + "f8", count=count * width, offset=position)
+        parts.append((part.reshape(count, width).astype(np.float64), dims))
+        return position + count * width * 8
+    if geometry_type in (5, 7):  # MultiLineString or GeometryCollection
+        (count,) = struct.unpack_from(order + "I", buffer, position)
+        position += 4
+        for _ in range(count):
+            position = _read_wkb_lines(buffer, position, parts)
+        return position
+    raise ValueError("Unsupported WKB geometry type {0} for line packing.".format(geometry_type))
+
+
+def _read_wkb_points(buffer, position, points):
+    """Appends the (x, y) tuple of every point found at the position in a WKB buffer and returns the position after
+    the geometry."""
+    order, geometry_type, dims, position = _read_wkb_header(buffer, position)
+    if geometry_type == 1:  # Point
+        points.append(struct.unpack_from(order + "dd", buffer, position))
+        return position + len(dims) * 8
+    if geometry_type in (4, 7):  # MultiPoint or GeometryCollection
+        (count,) = struct.unpack_from(order + "I", buffer, position)
+        position += 4
+        for _ in range(count):
+            position = _read_wkb_points(buffer, position, points)
+        return position
+    raise ValueError("Unsupported WKB geometry type {0} for point reading.".format(geometry_type))
+
+
+# End do_analysis function
+
+# This test allows the script to be used from the operating
+# system command prompt (stand-alone), in a Python IDE,
+# as a geoprocessing script tool, or as a module imported in
+# another script
+if __name__ == "__main__":
+    # Define input parameters
+    print("Function library: linearray.py")
@@ -0,0 +1,303 @@
+# --------------------------------
+# Name: linebackend.py
+# Purpose: This file holds the geometry backends used by linelibrary. A backend wraps the handful of polyline
+# operations the Feature Line tools depend on (length, segment along line, centroid, first/last point and polyline
+# construction). The arcpy backend uses ArcGIS geometries, the numpy backend uses Shapely geometries with NumPy
+# math so the same helpers run outside of an ArcGIS Pro install. Backends import their dependencies lazily, see
+# LazyImport.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# ArcGIS Version:   ArcGIS Pro
+# Python Version:   3.6+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+
+# Import Modules
+import collections
+import importlib
+import importlib.util
+import os
+
+BACKEND_ENVIRONMENT_VARIABLE = "LINELIBRARY_BACKEND"
+
+# Point type of the numpy backend. It mirrors the X, Y, Z, M attributes of arcpy.Point so helpers can read both.
+LinePoint = collections.namedtuple("LinePoint", ["X", "Y", "Z", "M"])
+LinePoint.__new__.__defaults__ = (None, None)
+
+
+# Class Definitions
+class LazyImport(object):
+    """Stand in for a module that is imported on first attribute access, so importing the library does not pay for
+    arcpy, pandas, NumPy or Shapely until a helper needs them. Looked up attributes are cached on the proxy, after
+    the first call a module function costs the same as it would on the module itself."""
+
+    def __init__(self, module_name):
+        self._module_name = module_name
+        self._module = None
+
+    def load(self):
+        """Imports the module if it is not loaded yet and returns it."""
+        if self._module is None:
+            self._module = importlib.import_module(self._module_name)
+        return self._module
+
+    @property
+    def loaded(self):
+        return self._module is not None
+
+    def __getattr__(self, name):
+        value = getattr(self.load(), name)
+        setattr(self, name, value)
+        return value
+
+    def __repr__(self):
+        return "<lazy module {0}{1}>".format(self._module_name, "" if self._module is None else " (loaded)")
+
+
+# The numpy backend builds M aware WKB with linearray.PackedLines.
+linearray = LazyImport("linearray")
+
+
+class ArcpyGeometryBackend(object):
+    """Geometry backend using arcpy Polyline, Point and Array objects."""
+
+    name = "arcpy"
+
+    def __init__(self):
+        self.arcpy = LazyImport("arcpy")
+
+    def length(self, geometry):
+        return float(geometry.length)
+
+    def segment_along_line(self, geometry, start, end, use_percentage=False):
+        return geometry.segmentAlongLine(start, end, use_percentage)
+
+    def centroid(self, geometry):
+        return geometry.centroid
+
+    def first_point(self, geometry):
+        return geometry.firstPoint
+
+    def last_point(self, geometry):
+        return geometry.lastPoint
+
+    def spatial_reference(self, geometry):
+        return geometry.spatialReference
+
+    def make_point(self, x, y, z=None, m=None):
+        return self.arcpy.Point(x, y, z, m)
+
+    def parts(self, geometry):
+        """Returns a list of parts, each a list of points, of a polyline."""
+        return [[point for point in geometry.getPart(index) if point] for index in range(geometry.partCount)]
+
+    def from_wkb(self, wkb_geometries, spatial_reference=None):
+        """Converts a list of WKB geometries to polylines."""
+        return [None if wkb is None else self.arcpy.FromWKB(bytearray(wkb), spatial_reference) for wkb in wkb_geometries]
+
+    def to_wkb(self, geometries):
+        """Converts a list of polylines to WKB."""
+        return [None if geometry is None else bytes(geometry.WKB) for geometry in geometries]
+
+    def construct_polyline(self, parts, spatial_reference=None):
+        """Builds a polyline from a list of parts, each a list of points."""
+        point_array = self.arcpy.Array([self.arcpy.Array(part) for part in parts])
+        return self.arcpy.Polyline(point_array, spatial_reference)
+
+    def locate_points(self, geometry, points):
+        """Returns the distances along the polyline of the points closest to each point."""
+        return [geometry.measureOnLine(point) for point in points]
+
+    def add_measures(self, geometry, start_measure=0.0):
+        """Returns a copy of the polyline with M values set to start_measure plus the planar distance along the
+        line, measured over the parts in order without the gaps between them."""
+        measure = float(start_measure)
+        point_parts = []
+        for part in self.parts(geometry):
+            new_part = []
+            for index, point in enumerate(part):
+                if index:
+                    measure += ((point.X - part[index - 1].X) ** 2 + (point.Y - part[index - 1].Y) ** 2) ** 0.5
+                new_part.append(self.arcpy.Point(point.X, point.Y, point.Z, measure))
+            point_parts.append(self.arcpy.Array(new_part))
+        return self.arcpy.Polyline(
+            self.arcpy.Array(point_parts), geometry.spatialReference, geometry.hasZ, True
+        )
+
+
+class NumpyGeometryBackend(object):
+    """Geometry backend using Shapely LineString/MultiLineString objects for storage and NumPy for the math.
+    Distances along multipart lines are measured over the parts in order without the gaps between them, which
+    matches the arcpy segmentAlongLine behavior."""
+
+    name = "numpy"
+
+    def __init__(self):
+        self.np = LazyImport("numpy")
+        self.shapely = LazyImport("shapely")
+
+    def _part_coordinates(self, geometry):
+        """Returns a list of (n, 2+) coordinate arrays for each part of a line geometry."""
+        if geometry is None or geometry.is_empty:
+            return []
+        include_z = geometry.has_z
+        if geometry.geom_type == "LineString":
+            return [self.shapely.get_coordinates(geometry, include_z=include_z)]
+        return [self.shapely.get_coordinates(part, include_z=include_z) for part in geometry.geoms]
+
+    def length(self, geometry):
+        # Null shapes raise like arcpy, instead of the NaN length Shapely returns for them.
+        if geometry is None:
+            raise ValueError("The feature has no shape.")
+        return float(self.shapely.length(geometry))
+
+    def segment_along_line(self, geometry, start, end, use_percentage=False):
+        np = self.np
+        parts = self._part_coordinates(geometry)
+        if not parts:
+            return None
+        coords = np.concatenate(parts)
+        part_sizes = [len(part) for part in parts]
+        steps = np.hypot(*np.diff(coords[:, :2], axis=0).T)
+        # Steps bridging the gap between two parts have no length.
+        steps[np.cumsum(part_sizes)[:-1] - 1] = 0.0
+        measures = np.concatenate([[0.0], np.cumsum(steps)])
+        total = measures[-1]
+        if use_percentage:
+            start, end = start * total, end * total
+        reverse = start > end
+        start, end = sorted([min(max(float(start), 0.0), total), min(max(float(end), 0.0), total)])
+        part_index = np.repeat(np.arange(len(parts)), part_sizes)
+        new_parts = []
+        for part in range(len(parts)):
+            in_part = part_index == part
+            part_measures = measures[in_part]
+            part_coords = coords[in_part]
+            lower, upper = max(start, part_measures[0]), min(end, part_measures[-1])
+            if upper < lower or (upper == lower and len(parts) > 1 and start != end):
+                continue
+            inside = (part_measures > lower) & (part_measures < upper)
+            points = [_interpolate(np, part_measures, part_coords, lower)]
+            points.extend(part_coords[inside])
+            points.append(_interpolate(np, part_measures, part_coords, upper))
+            new_parts.append(np.asarray(points))
+        if reverse:
+            new_parts = [part[::-1] for part in new_parts[::-1]]
+        return self._from_coordinate_parts(new_parts)
+
+    def centroid(self, geometry):
+        center = self.shapely.centroid(geometry)
+        return LinePoint(center.x, center.y)
+
+    def first_point(self, geometry):
+        return LinePoint(*self._part_coordinates(geometry)[0][0])
+
+    def last_point(self, geometry):
+        return LinePoint(*self._part_coordinates(geometry)[-1][-1])
+
+    def spatial_reference(self, geometry):
+        return None
+
+    def make_point(self, x, y, z=None, m=None):
+        return LinePoint(x, y, z, m)
+
+    def parts(self, geometry):
+        """Returns a list of parts, each a list of points, of a polyline."""
+        return [[LinePoint(*vertex) for vertex in part] for part in self._part_coordinates(geometry)]
+
+    def from_wkb(self, wkb_geometries, spatial_reference=None):
+        """Converts a list of WKB geometries to Shapely geometries in one vectorized call."""
+        return list(self.shapely.from_wkb(self.np.array(wkb_geometries, dtype=object)))
+
+    def to_wkb(self, geometries):
+        """Converts a list of Shapely geometries to ISO WKB in one vectorized call. M values are kept with Shapely
+        2.1 or later."""
+        output_dimension = 4 if hasattr(self.shapely, "has_m") else 3
+        return list(
+            self.shapely.to_wkb(self.np.array(geometries, dtype=object), output_dimension=output_dimension, flavor="iso")
+        )
+
+    def construct_polyline(self, parts, spatial_reference=None):
+        """Builds a polyline from a list of parts, each a list of points."""
+        coordinate_parts = []
+        for part in parts:
+            has_z = all(point.Z is not None for point in part)
+            coordinate_parts.append(
+                self.np.array([(point.X, point.Y, point.Z) if has_z else (point.X, point.Y) for point in part])
+            )
+        return self._from_coordinate_parts(coordinate_parts)
+
+    def locate_points(self, geometry, points):
+        """Returns the distances along the line of the points closest to each point in one vectorized call."""
+        return list(self.shapely.line_locate_point(geometry, self.np.array(points, dtype=object)))
+
+    def add_measures(self, geometry, start_measure=0.0):
+        """Returns a copy of the line with M values set to start_measure plus the planar distance along the line,
+        measured over the parts in order without the gaps between them. Needs Shapely 2.1 or later for M values."""
+        np = self.np
+        parts = self._part_coordinates(geometry)
+        if not parts:
+            return geometry
+        coords = np.concatenate(parts)
+        part_sizes = [len(part) for part in parts]
+        part_offsets = np.concatenate([[0], np.cumsum(part_sizes)])
+        steps = np.hypot(*np.diff(coords[:, :2], axis=0).T)
+        steps[part_offsets[1:-1] - 1] = 0.0
+        measures = float(start_measure) + np.concatenate([[0.0], np.cumsum(steps)])
+        packed = linearray.PackedLines(
+            coords[:, :2], part_offsets, [0, len(parts)], z=coords[:, 2] if coords.shape[1] > 2 else None, m=measures
+        )
+        return self.shapely.from_wkb(linearray.packed_lines_to_wkb(packed)[0])
+
+    def _from_coordinate_parts(self, coordinate_parts):
+        if not coordinate_parts:
+            return None
+        if len(coordinate_parts) == 1:
+            return self.shapely.LineString(coordinate_parts[0])
+        return self.shapely.MultiLineString(coordinate_parts)
+
+
+# Function Definitions
+def _interpolate(np, measures, coords, distance):
+    """Interpolates a coordinate row at a distance along a single part with the given vertex measures."""
+    return np.array([np.interp(distance, measures, coords[:, column]) for column in range(coords.shape[1])])
+
+
+def module_available(module_name):
+    """Returns true if the module can be imported, without importing it."""
+    return importlib.util.find_spec(module_name) is not None
+
+
+def arcpy_available():
+    """Returns true if arcpy can be imported, without importing it."""
+    return module_available("arcpy")
+
+
+def load_geometry_backend(name=None):
+    """Returns the geometry backend with the given name (arcpy or numpy). If no name is passed the
+    LINELIBRARY_BACKEND environment variable is used, and if that is not set arcpy is used when it is available
+    and numpy otherwise.
+    :param - name - optional backend name
+    :return - geometry backend instance"""
+    name = (name or os.environ.get(BACKEND_ENVIRONMENT_VARIABLE) or "auto").lower()
+    if name == "auto":
+        name = "arcpy" if arcpy_available() else "numpy"
+    if name == "arcpy":
+        return ArcpyGeometryBackend()
+    if name in ("numpy", "shapely"):
+        return NumpyGeometryBackend()
+    raise ValueError("Unknown geometry backend {0}, use arcpy or numpy.".format(name))
@@ -0,0 +1,303 @@
+# --------------------------------
+# Name: linebatch.py
+# Purpose: Asyncio batch runner for the Feature Line tools. Jobs are read from a CSV or JSON manifest and scheduled
+# over a bounded pool of long lived lineworker processes that import the library once, so hundreds of small per
+# project runs do not each pay for a new interpreter and its imports. Progress events are streamed as JSON lines and
+# the timings and errors of all jobs are collected in one summary.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# ArcGIS Version:   ArcGIS Pro
+# Python Version:   3.7+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+#
+# Manifests hold one job per row or object with the tool name (see lineworker.TOOLS), an optional id and the tool
+# arguments. CSV columns other than id, tool and args are keyword arguments of the tool, their cells are parsed as
+# JSON when possible (30, true, null) and kept as text otherwise, so empty cells are empty text like empty tool
+# parameters in ArcGIS. JSON manifests are a list of {"id", "tool", "args", "kwargs"} objects, an object with a "jobs"
+# list, or JSON lines.
+#   python linebatch.py jobs.csv --workers 4 --summary summary.json --backend numpy
+# The exit status is 1 when any job failed, see summarize_results.
+# Options the runner does not know (--backend, --cache, --simplify-method ...) are passed to every lineworker.
+
+# Import Modules
+import argparse
+import asyncio
+import csv
+import json
+import os
+import sys
+import time
+import lineworker
+
+WORKER_SCRIPT = os.path.join(os.path.dirname(os.path.abspath(__file__)), "lineworker.py")
+DEFAULT_WORKERS = max(1, min(4, os.cpu_count() or 1))
+# Stream buffer limit of the worker pipes, responses carry the tool messages of a job on one line.
+RESPONSE_LIMIT = 2 ** 26
+# Seconds a worker gets to exit after the shutdown command before it is killed.
+SHUTDOWN_SECONDS = 10.0
+
+
+# Class Definitions
+class WorkerExited(Exception):
+    """Raised when a worker process ends before answering a job."""
+
+
+class WorkerProcess(object):
+    """A lineworker process driven over its stdin and stdout pipes, one job at a time.
+    :param - index - number of the worker in the pool
+    :param - worker_args - command line options of the worker"""
+
+    def __init__(self, index, worker_args=()):
+        self.index = index
+        self.worker_args = list(worker_args)
+        self.process = None
+        self.jobs = 0
+
+    @property
+    def pid(self):
+        return None if self.process is None else self.process.pid
+
+    async def start(self):
+        """Starts the worker with the tools and their dependencies preloaded and waits until it answers a ping, so
+        job timeouts do not include the imports.
+        :return - ping response with the pid and geometry backend of the worker"""
+        self.process = await asyncio.create_subprocess_exec(
+            sys.executable, WORKER_SCRIPT, "--preload", *self.worker_args, stdin=asyncio.subprocess.PIPE,
+            stdout=asyncio.subprocess.PIPE, limit=RESPONSE_LIMIT)
+        self.jobs = 0
+        return await self.request({"command": "ping"})
+
+    async def request(self, request, timeout=None):
+        """Sends a request line and returns the response dictionary.
+        :param - request - lineworker request dictionary
+        :param - timeout - optional seconds to wait for the response, asyncio.TimeoutError is raised past it"""
+        try:
+            self.process.stdin.write((json.dumps(request, default=str) + "\n").encode("utf-8"))
+            await self.process.stdin.drain()
+        except (BrokenPipeError, ConnectionResetError):
+            raise WorkerExited("The worker exited with code {0}.".format(self.process.returncode))
+        line = await asyncio.wait_for(self.process.stdout.readline(), timeout)
+        if not line:
+            raise WorkerExited("The worker exited with code {0}.".format(await self.process.wait()))
+        return json.loads(line.decode("utf-8"))
+
+    async def stop(self):
+        """Sends the shutdown command and waits for the worker to exit, killing it if it does not."""
+        if self.process is None or self.process.returncode is not None:
+            return
+        try:
+            await self.request({"command": "shutdown"}, SHUTDOWN_SECONDS)
+            await asyncio.wait_for(self.process.wait(), SHUTDOWN_SECONDS)
+        except (WorkerExited, asyncio.TimeoutError, ValueError):
+            await self.kill()
+
+    async def kill(self):
+        if self.process is not None and self.process.returncode is None:
+            self.process.kill()
+            await self.process.wait()
+
+
+class BatchRunner(object):
+    """Schedules jobs over a pool of lineworker processes with asyncio. Each worker takes the next job from a shared
+    queue as soon as it is free. A worker that exits or runs past the job timeout fails its job and is replaced by a
+    new one, and workers are restarted after recycle_jobs jobs to release memory held by long sessions.
+    :param - jobs - list of job dictionaries with an id, tool, args and kwargs (see read_manifest)
+    :param - workers - number of worker processes
+    :param - worker_args - command line options passed to every worker
+    :param - timeout - optional seconds a job may run
+    :param - recycle_jobs - optional number of jobs after which a worker is restarted
+    :param - on_event - function called with each progress event dictionary, defaults to print_event"""
+
+    def __init__(self, jobs, workers=DEFAULT_WORKERS, worker_args=(), timeout=None, recycle_jobs=None, on_event=None):
+        self.jobs = list(jobs)
+        self.workers = max(1, min(int(workers), len(self.jobs) or 1))
+        self.worker_args = list(worker_args)
+        self.timeout = timeout
+        self.recycle_jobs = recycle_jobs
+        self.on_event = on_event or print_event
+        self.results = {}
+        self.completed = 0
+
+    def emit(self, event, **values):
+        values["event"] = event
+        values["time"] = round(time.time(), 3)
+        self.on_event(values)
+
+    async def run(self):
+        """Runs all jobs and returns the summary dictionary."""
+        start = time.perf_counter()
+        queue = asyncio.Queue()
+        for position, job in enumerate(self.jobs):
+            queue.put_nowait((position, job))
+        self.emit("batch_started", jobs=len(self.jobs), workers=self.workers)
+        await asyncio.gather(*[self._worker_loop(WorkerProcess(index, self.worker_args), queue)
+                               for index in range(self.workers)])
+        summary = summarize_results([self.results[position] for position in range(len(self.jobs))],
+                                    time.perf_counter() - start, self.workers)
+        self.emit("batch_finished", **{key: value for key, value in summary.items() if key != "results"})
+        return summary
+
+    async def _worker_loop(self, worker, queue):
+        while not queue.empty():
+            position, job = queue.get_nowait()
+            result = {"id": job["id"], "tool": job["tool"], "worker": worker.index, "ok": False, "seconds": None,
+                      "error": None, "failed_features": 0, "feature_failures": [], "messages": []}
+            job_start = None
+            try:
+                if worker.process is None or worker.process.returncode is not None:
+                    ping = await worker.start()
+                    self.emit("worker_started", worker=worker.index, pid=worker.pid, backend=ping.get("backend"))
+                result["pid"] = worker.pid
+                self.emit("job_started", id=job["id"], tool=job["tool"], worker=worker.index)
+                job_start = time.perf_counter()
+                response = await worker.request(
+                    {"id": job["id"], "tool": job["tool"], "args": job["args"], "kwargs": job["kwargs"]}, self.timeout)
+                result.update(ok=response["ok"], seconds=response["seconds"], error=response["error"],
+                              failed_features=response.get("failed_features", 0),
+                              feature_failures=response.get("feature_failures", []), messages=response["messages"])
+            except asyncio.TimeoutError:
+                await worker.kill()
+                result["error"] = "Timed out after {0} seconds.".format(self.timeout)
+            except (WorkerExited, ValueError) as e:
+                await worker.kill()
+                result["error"] = "{0}: {1}".format(type(e).__name__, e)
+            result["elapsed"] = None if job_start is None else time.perf_counter() - job_start
+            self.results[position] = result
+            self.completed += 1
+            worker.jobs += 1
+            self.emit("job_finished", id=job["id"], tool=job["tool"], worker=worker.index, ok=result["ok"],
+                      seconds=result["seconds"], error=result["error"], failed_features=result["failed_features"],
+                      completed=self.completed, total=len(self.jobs))
+            if self.recycle_jobs and worker.jobs >= self.recycle_jobs and not queue.empty():
+                await worker.stop()
+        await worker.stop()
+
+
+# Function Definitions
+def print_event(event):
+    """Writes a progress event as a JSON line to stdout."""
+    sys.stdout.write(json.dumps(event, default=str) + "\n")
+    sys.stdout.flush()
+
+
+def parse_cell(value):
+    """Parses a CSV cell as JSON, keeping text that is not JSON as a string."""
+    try:
+        return json.loads(value)
+    except ValueError:
+        return value
+
+
+def read_manifest(path):
+    """Reads the jobs of a CSV, JSON or JSON lines manifest.
+    :param - path - manifest path, .csv files are read as CSV and other files as JSON or JSON lines
+    :return - list of job dictionaries with an id, tool, args list and kwargs dictionary"""
+    if path.lower().endswith(".csv"):
+        with open(path, newline="") as manifest:
+            rows = []
+            reader = csv.DictReader(manifest)
+            for row in reader:
+                if None in row or None in row.values():
+                    raise ValueError("Line {0} of {1} does not match the header.".format(reader.line_num, path))
+                job = {"kwargs": {}}
+                for column, value in row.items():
+                    column, value = column.strip(), value.strip()
+                    if column in ("id", "tool"):
+                        job[column] = value or None
+                    elif column == "args":
+                        job["args"] = json.loads(value or "[]")
+                    else:
+                        job["kwargs"][column] = parse_cell(value)
+                rows.append(job)
+    else:
+        with open(path) as manifest:
+            text = manifest.read()
+        try:
+            rows = json.loads(text)
+        except ValueError:
+            rows = [json.loads(line) for line in text.splitlines() if line.strip()]
+        if isinstance(rows, dict):
+            rows = rows["jobs"]
+    return [validate_job(job, position) for position, job in enumerate(rows, 1)]
+
+
+def validate_job(job, position):
+    """Fills in the defaults of a job and checks its tool name.
+    :param - job - job dictionary
+    :param - position - position of the job in the manifest, used as its id when it has none
+    :return - job dictionary with an id, tool, args and kwargs"""
+    tool = job.get("tool")
+    if tool not in lineworker.TOOLS:
+        raise ValueError("Job {0} has the unknown tool {1}, use one of {2}.".format(
+            job.get("id", position), tool, ", ".join(sorted(lineworker.TOOLS))))
+    return {"id": job.get("id") or position, "tool": tool, "args": list(job.get("args") or []),
+            "kwargs": dict(job.get("kwargs") or {})}
+
+
+def summarize_results(results, wall_seconds, workers):
+    """Collects the job results of a batch into one summary. A job failed when its tool raised or reported an error
+    that stopped it, or its worker exited or timed out. Features that failed in finished jobs are counted in
+    failed_features without failing the job.
+    :param - results - list of job result dictionaries in manifest order
+    :param - wall_seconds - duration of the batch
+    :param - workers - number of worker processes
+    :return - summary dictionary with the job counts, timings and the results"""
+    job_seconds = [result["seconds"] for result in results if result["seconds"] is not None]
+    return {
+        "jobs": len(results),
+        "ok": sum(1 for result in results if result["ok"]),
+        "failed": sum(1 for result in results if not result["ok"]),
+        "failed_features": sum(result["failed_features"] for result in results),
+        "workers": workers,
+        "wall_seconds": wall_seconds,
+        "job_seconds": sum(job_seconds),
+        "max_job_seconds": max(job_seconds) if job_seconds else None,
+        "errors": {str(result["id"]): result["error"] for result in results if not result["ok"]},
+        "results": results,
+    }
+
+
+def run_batch(jobs, workers=DEFAULT_WORKERS, worker_args=(), timeout=None, recycle_jobs=None, on_event=None):
+    """Runs a list of jobs over a pool of lineworker processes, see BatchRunner.
+    :return - summary dictionary"""
+    runner = BatchRunner(jobs, workers, worker_args, timeout, recycle_jobs, on_event)
+    return asyncio.run(runner.run())
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run a manifest of Feature Line tool jobs over lineworker processes.",
+                                     epilog="Other options are passed to every lineworker.")
+    parser.add_argument("manifest", help="CSV, JSON or JSON lines file of jobs.")
+    parser.add_argument("--workers", type=int, default=DEFAULT_WORKERS, help="Number of worker processes.")
+    parser.add_argument("--timeout", type=float, default=None, help="Seconds a job may run before it is failed.")
+    parser.add_argument("--recycle-jobs", type=int, default=None, help="Restart a worker after this many jobs.")
+    parser.add_argument("--summary", default=None, help="Path the JSON summary is written to.")
+    args, worker_args = parser.parse_known_args(argv)
+    jobs = read_manifest(args.manifest)
+    summary = run_batch(jobs, args.workers, worker_args, args.timeout, args.recycle_jobs)
+    if args.summary:
+        with open(args.summary, "w") as summary_file:
+            json.dump(summary, summary_file, indent=2, default=str)
+    return 0 if not summary["failed"] else 1
+
+
+# This test allows the script to be used from the operating
+# system command prompt (stand-alone), in a Python IDE,
+# or as a module imported in another script
+if __name__ == "__main__":
+    sys.exit(main())
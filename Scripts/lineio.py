@@ -0,0 +1,571 @@
+# --------------------------------
+# Name: lineio.py
+# Purpose: This file holds the GeoParquet and GeoPackage readers and writers used by the Feature Line tools when
+# the input or output is a file dataset instead of a geodatabase feature class. Features move in columnar batches:
+# GeoParquet row groups are streamed with pyarrow and GeoPackage tables with sqlite3 fetchmany/executemany, with
+# geometries as WKB.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# ArcGIS Version:   ArcGIS Pro
+# Python Version:   3.6+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+
+# Import Modules
+import contextlib
+import datetime
+import json
+import os
+import shutil
+import sqlite3
+import struct
+import lineprofile
+
+PARQUET_EXTENSIONS = (".parquet", ".geoparquet")
+GEOPACKAGE_EXTENSION = ".gpkg"
+DEFAULT_BATCH_SIZE = 65536
+DEFAULT_GEOMETRY_COLUMN = "geometry"
+# Field types are described with a small vocabulary shared by every format: int, float, str, date and bytes.
+ARROW_TYPE_NAMES = {"int": "int64", "float": "float64", "str": "string", "date": "timestamp[ms]", "bytes": "binary"}
+GEOPACKAGE_TYPE_NAMES = {"int": "INTEGER", "float": "DOUBLE", "str": "TEXT", "date": "DATETIME", "bytes": "BLOB"}
+GEOPACKAGE_ENVELOPE_SIZES = {0: 0, 1: 32, 2: 48, 3: 48, 4: 64}
+
+
+# Function Definitions
+def is_file_dataset(path):
+    """Returns true if the path points to a GeoParquet file or a GeoPackage (optionally with a layer name)."""
+    if not isinstance(path, str):
+        return False
+    return dataset_format(path) is not None
+
+
+def dataset_format(path):
+    """Returns parquet, gpkg or None for a dataset path."""
+    lowered = str(path).lower()
+    if lowered.endswith(PARQUET_EXTENSIONS):
+        return "parquet"
+    if GEOPACKAGE_EXTENSION in lowered:
+        file_path, _ = split_geopackage_path(path)
+        if file_path.lower().endswith(GEOPACKAGE_EXTENSION):
+            return "gpkg"
+    return None
+
+
+def split_geopackage_path(path):
+    """Splits a GeoPackage path of the form data.gpkg/layer (or the ArcGIS data.gpkg\\main.layer form) into the
+    file path and layer name. The layer is None when only the file is given."""
+    lowered = path.lower()
+    index = lowered.rfind(GEOPACKAGE_EXTENSION)
+    file_path = path[: index + len(GEOPACKAGE_EXTENSION)]
+    layer = path[index + len(GEOPACKAGE_EXTENSION) :].strip("/\\") or None
+    if layer and layer.lower().startswith("main."):
+        layer = layer[5:]
+    return file_path, layer
+
+
+def describe_line_dataset(path):
+    """Describes a file dataset.
+    :param - path - GeoParquet or GeoPackage path
+    :return - dictionary with the format, field names/types as a list of (name, type) tuples, the geometry
+    column, and the crs (PROJJSON dictionary for GeoParquet, (srs_id, definition) for GeoPackage)"""
+    if dataset_format(path) == "parquet":
+        import pyarrow.parquet as pq
+
+        schema = pq.read_schema(path)
+        geo = _parquet_geo_metadata(schema)
+        geometry_column = geo.get("primary_column", DEFAULT_GEOMETRY_COLUMN)
+        fields = [
+            (field.name, _arrow_field_type(field.type)) for field in schema if field.name != geometry_column
+        ]
+        crs = geo.get("columns", {}).get(geometry_column, {}).get("crs")
+        return {"format": "parquet", "fields": fields, "geometry_column": geometry_column, "crs": crs}
+    file_path, layer = split_geopackage_path(path)
+    with contextlib.closing(sqlite3.connect(file_path)) as connection:
+        layer = layer or _first_geopackage_layer(connection)
+        geometry_column, srs_id = connection.execute(
+            "SELECT column_name, srs_id FROM gpkg_geometry_columns WHERE lower(table_name) = lower(?)", (layer,)
+        ).fetchone()
+        definition = connection.execute(
+            "SELECT definition FROM gpkg_spatial_ref_sys WHERE srs_id = ?", (srs_id,)
+        ).fetchone()
+        columns = connection.execute('PRAGMA table_info("{0}")'.format(layer)).fetchall()
+    fields = [
+        (name, _geopackage_field_type(declared))
+        for _, name, declared, _, _, primary_key in columns
+        if name != geometry_column and not primary_key
+    ]
+    return {
+        "format": "gpkg",
+        "fields": fields,
+        "geometry_column": geometry_column,
+        "layer": layer,
+        "crs": (srs_id, definition[0] if definition else "undefined"),
+    }
+
+
+def dataset_exists(path):
+    """Returns true if a GeoParquet file or the layer of a GeoPackage exists. A GeoPackage path without a layer name
+    refers to the layer named after the file, like the layer LineDatasetWriter creates."""
+    if dataset_format(path) == "parquet":
+        return os.path.exists(path)
+    file_path, layer = split_geopackage_path(path)
+    if not os.path.exists(file_path):
+        return False
+    layer = layer or os.path.splitext(os.path.basename(file_path))[0]
+    with contextlib.closing(sqlite3.connect(file_path)) as connection:
+        try:
+            row = connection.execute(
+                "SELECT 1 FROM gpkg_contents WHERE lower(table_name) = lower(?)", (layer,)
+            ).fetchone()
+        except sqlite3.OperationalError:
+            return False
+    return row is not None
+
+
+def is_projected_crs(crs):
+    """Best effort test of a described crs, returns False only for crs definitions that are clearly geographic."""
+    if crs is None:
+        return True
+    if isinstance(crs, dict):
+        return crs.get("type") != "GeographicCRS"
+    if isinstance(crs, tuple):
+        srs_id, definition = crs
+        return not (srs_id == 0 or str(definition).upper().startswith(("GEOGCS", "GEOGCRS")))
+    return "GEOGCRS" not in str(crs).upper()[:10]
+
+
+def read_line_batches(path, fields=None, batch_size=DEFAULT_BATCH_SIZE):
+    """Generator of columnar batches from a GeoParquet file or GeoPackage layer.
+    :param - path - dataset path
+    :param - fields - attribute fields to read, defaults to all fields
+    :param - batch_size - rows per batch
+    :return - yields dictionaries {"oids": list, "wkb": list of WKB bytes (None for null shapes),
+    "columns": {field: list}}"""
+    description = describe_line_dataset(path)
+    if fields is None:
+        fields = [name for name, _ in description["fields"]]
+    geometry_column = description["geometry_column"]
+    if description["format"] == "parquet":
+        import pyarrow.parquet as pq
+
+        parquet_file = pq.ParquetFile(path)
+        row_start = 0
+        for record_batch in parquet_file.iter_batches(batch_size=batch_size, columns=list(fields) + [geometry_column]):
+            row_count = record_batch.num_rows
+            yield {
+                "oids": list(range(row_start + 1, row_start + row_count + 1)),
+                "wkb": record_batch.column(geometry_column).to_pylist(),
+                "columns": {field: record_batch.column(field).to_pylist() for field in fields},
+            }
+            row_start += row_count
+        return
+    file_path, layer = split_geopackage_path(path)
+    layer = description["layer"]
+    date_fields = [name for name, kind in description["fields"] if kind == "date" and name in fields]
+    with contextlib.closing(sqlite3.connect(file_path)) as connection:
+        primary_key = _geopackage_primary_key(connection, layer)
+        select_fields = ", ".join('"{0}"'.format(name) for name in [primary_key, geometry_column] + list(fields))
+        cursor = connection.execute('SELECT {0} FROM "{1}" ORDER BY "{2}"'.format(select_fields, layer, primary_key))
+        while True:
+            rows = cursor.fetchmany(batch_size)
+            if not rows:
+                break
+            columns = list(zip(*rows))
+            batch_columns = {field: list(values) for field, values in zip(fields, columns[2:])}
+            for field in date_fields:  # GeoPackage stores dates as ISO 8601 text
+                batch_columns[field] = [_parse_geopackage_date(value) for value in batch_columns[field]]
+            yield {
+                "oids": list(columns[0]),
+                "wkb": [geopackage_blob_to_wkb(blob) for blob in columns[1]],
+                "columns": batch_columns,
+            }
+
+
+def geopackage_blob_to_wkb(blob):
+    """Strips the GeoPackage binary header (and envelope) from a geometry blob returning the standard WKB."""
+    if blob is None:
+        return None
+    flags = blob[3]
+    if flags & 0x10:  # Empty geometry flag
+        return None
+    envelope_size = GEOPACKAGE_ENVELOPE_SIZES[(flags >> 1) & 0x07]
+    return bytes(blob[8 + envelope_size :])
+
+
+def wkb_to_geopackage_blob(wkb, srs_id):
+    """Adds a GeoPackage binary header without an envelope to a standard WKB geometry."""
+    if wkb is None:
+        return None
+    return b"GP\x00\x01" + struct.pack("<i", srs_id) + bytes(wkb)
+
+
+# Class Definitions
+class LineDatasetWriter(object):
+    """Writer of line features to a GeoParquet file or GeoPackage layer. Rows added with insertRow are buffered and
+    written in columnar batches, so it can stand in for an arcpy.da.InsertCursor. Existing outputs are replaced,
+    unless the writer resumes a checkpointed run.
+    Checkpointed runs pass resume_rows and call commit after each chunk of features. GeoPackage layers commit their
+    sqlite transaction, GeoParquet outputs close the chunk as a part file in a <path>.parts folder, since a Parquet
+    file is unreadable until its footer is written. The part files are joined into the output when the writer is
+    closed. Rows after the last commit are dropped when a run fails or is resumed.
+    Parameters
+    ----------------
+    path - output GeoParquet path or GeoPackage path with an optional layer name
+    fields - list of (name, type) tuples using the int, float, str, date and bytes type vocabulary
+    crs - crs of the output, as returned by describe_line_dataset for the same format
+    batch_size - rows buffered before a batch is written
+    to_wkb - optional function converting a list of geometries to a list of WKB, applied to the geometry column
+    of each buffered batch
+    resume_rows - optional number of committed rows of an earlier checkpointed run to keep and append to, 0 starts a
+    new checkpointed output"""
+
+    def __init__(self, path, fields, crs=None, batch_size=DEFAULT_BATCH_SIZE, to_wkb=None, resume_rows=None):
+        self.path = path
+        self.to_wkb = to_wkb
+        self.fields = list(fields)
+        self.crs = crs
+        self.batch_size = batch_size
+        self.format = dataset_format(path)
+        self.resume_rows = resume_rows
+        self.rows_written = resume_rows or 0
+        self._buffer = []
+        self._writer = None
+        self._connection = None
+        self._parts_path = path + ".parts" if resume_rows is not None and self.format == "parquet" else None
+        if self.format == "parquet":
+            self._open_parquet()
+        else:
+            self._open_geopackage()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        if exc_type is not None and self.resume_rows is not None:
+            self.abort()
+        else:
+            self.close()
+
+    def insertRow(self, row):
+        """Buffers a row of (geometry, field values...) in the order of the writer fields."""
+        self._buffer.append(row)
+        if len(self._buffer) >= self.batch_size:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered rows as one columnar batch."""
+        if not self._buffer:
+            return
+        columns = list(zip(*self._buffer))
+        self._buffer = []
+        self.write_geometries(list(columns[0]), {name: values for (name, _), values in zip(self.fields, columns[1:])})
+
+    def write_geometries(self, geometries, columns):
+        """Writes a batch of geometries of the writer geometry type (converted with to_wkb) with a dictionary of
+        field columns. Columns can be lists or NumPy arrays."""
+        with lineprofile.profiler.stage("write batches", len(geometries)):
+            if self.to_wkb is not None:
+                geometries = self.to_wkb(geometries)
+            self.write_batch(geometries, columns)
+
+    def write_batch(self, wkb_geometries, columns):
+        """Writes a batch of WKB geometries with a dictionary of field columns."""
+        if self.format == "parquet":
+            import pyarrow as pa
+
+            if self._writer is None:
+                self._open_part()
+            arrays = [pa.array(columns[name], type=self._schema.field(name).type) for name, _ in self.fields]
+            arrays.append(pa.array(wkb_geometries, type=pa.binary()))
+            self._writer.write_table(pa.Table.from_arrays(arrays, schema=self._schema))
+        else:
+            srs_id = self._srs_id
+            blobs = [wkb_to_geopackage_blob(wkb, srs_id) for wkb in wkb_geometries]
+            names = [DEFAULT_GEOMETRY_COLUMN] + [name for name, _ in self.fields]
+            rows = zip(blobs, *[[_geopackage_value(value) for value in columns[name]] for name, _ in self.fields])
+            self._connection.executemany(
+                'INSERT INTO "{0}" ({1}) VALUES ({2})'.format(
+                    self._layer, ", ".join('"{0}"'.format(name) for name in names), ", ".join("?" * len(names))
+                ),
+                rows,
+            )
+        self.rows_written += len(wkb_geometries)
+
+    def commit(self):
+        """Writes the buffered rows and makes all rows written so far durable, see resume_rows."""
+        self.flush()
+        if self._connection is not None:
+            self._connection.commit()
+        elif self._parts_path is not None and self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            os.replace(self._part_file(self._part_count) + ".tmp", self._part_file(self._part_count))
+            self._part_count += 1
+
+    def close(self):
+        if self._parts_path is not None:
+            self.commit()
+            self._join_parts()
+            return
+        self.flush()
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+        if self._connection is not None:
+            self._connection.commit()
+            self._connection.close()
+            self._connection = None
+
+    def abort(self):
+        """Drops the rows written since the last commit and closes the output, leaving the committed rows to resume
+        from."""
+        self._buffer = []
+        if self._writer is not None:
+            self._writer.close()
+            self._writer = None
+            if self._parts_path is not None:
+                os.remove(self._part_file(self._part_count) + ".tmp")
+        if self._connection is not None:
+            self._connection.rollback()
+            self._connection.close()
+            self._connection = None
+
+    def _part_file(self, index):
+        return os.path.join(self._parts_path, "part-{0:06d}.parquet".format(index))
+
+    def _open_part(self):
+        import pyarrow.parquet as pq
+
+        self._writer = pq.ParquetWriter(self._part_file(self._part_count) + ".tmp", self._schema)
+
+    def _resume_parts(self):
+        """Keeps the part files holding the first resume_rows rows and removes the rest."""
+        import pyarrow.parquet as pq
+
+        if not self.resume_rows:
+            shutil.rmtree(self._parts_path, ignore_errors=True)
+        os.makedirs(self._parts_path, exist_ok=True)
+        self._part_count = 0
+        kept_rows = 0
+        for name in sorted(os.listdir(self._parts_path)):
+            part_file = os.path.join(self._parts_path, name)
+            if kept_rows < self.resume_rows and name.endswith(".parquet"):
+                kept_rows += pq.ParquetFile(part_file).metadata.num_rows
+                self._part_count += 1
+            else:
+                os.remove(part_file)
+        if kept_rows != self.resume_rows:
+            raise ValueError(
+                "{0} holds {1} committed rows, the checkpoint expects {2}.".format(
+                    self._parts_path, kept_rows, self.resume_rows
+                )
+            )
+
+    def _join_parts(self):
+        """Copies the row groups of the part files into the output file and removes the parts."""
+        import pyarrow.parquet as pq
+
+        with pq.ParquetWriter(self.path + ".tmp", self._schema) as writer:
+            for index in range(self._part_count):
+                part = pq.ParquetFile(self._part_file(index))
+                for row_group in range(part.num_row_groups):
+                    writer.write_table(part.read_row_group(row_group))
+        os.replace(self.path + ".tmp", self.path)
+        shutil.rmtree(self._parts_path)
+
+    def _open_parquet(self):
+        import pyarrow as pa
+        import pyarrow.parquet as pq
+
+        arrow_fields = [pa.field(name, pa.type_for_alias(ARROW_TYPE_NAMES[kind])) for name, kind in self.fields]
+        arrow_fields.append(pa.field(DEFAULT_GEOMETRY_COLUMN, pa.binary()))
+        geo = {
+            "version": "1.0.0",
+            "primary_column": DEFAULT_GEOMETRY_COLUMN,
+            "columns": {
+                DEFAULT_GEOMETRY_COLUMN: {
+                    "encoding": "WKB",
+                    "geometry_types": ["LineString", "MultiLineString"],
+                }
+            },
+        }
+        if isinstance(self.crs, dict):
+            geo["columns"][DEFAULT_GEOMETRY_COLUMN]["crs"] = self.crs
+        self._schema = pa.schema(arrow_fields, metadata={b"geo": json.dumps(geo).encode("utf-8")})
+        if self._parts_path is not None:
+            self._resume_parts()
+        else:
+            self._writer = pq.ParquetWriter(self.path, self._schema)
+
+    def _open_geopackage(self):
+        file_path, layer = split_geopackage_path(self.path)
+        self._layer = layer or os.path.splitext(os.path.basename(file_path))[0]
+        self._connection = sqlite3.connect(file_path)
+        _initialize_geopackage(self._connection)
+        srs_id, definition = self.crs if isinstance(self.crs, tuple) else (-1, "undefined")
+        self._srs_id = srs_id
+        if self._connection.execute("SELECT 1 FROM gpkg_spatial_ref_sys WHERE srs_id = ?", (srs_id,)).fetchone() is None:
+            self._connection.execute(
+                "INSERT INTO gpkg_spatial_ref_sys (srs_name, srs_id, organization, organization_coordsys_id, "
+                "definition) VALUES (?, ?, ?, ?, ?)",
+                ("srs_{0}".format(srs_id), srs_id, "NONE", srs_id, definition),
+            )
+        exists = self._connection.execute(
+            "SELECT 1 FROM gpkg_contents WHERE lower(table_name) = lower(?)", (self._layer,)
+        ).fetchone()
+        if self.resume_rows:
+            self._resume_geopackage_rows(exists)
+            return
+        if exists:
+            self._connection.execute('DROP TABLE IF EXISTS "{0}"'.format(self._layer))
+            self._connection.execute("DELETE FROM gpkg_contents WHERE lower(table_name) = lower(?)", (self._layer,))
+            self._connection.execute(
+                "DELETE FROM gpkg_geometry_columns WHERE lower(table_name) = lower(?)", (self._layer,)
+            )
+        column_definitions = ", ".join(
+            '"{0}" {1}'.format(name, GEOPACKAGE_TYPE_NAMES[kind]) for name, kind in self.fields
+        )
+        self._connection.execute(
+            'CREATE TABLE "{0}" (fid INTEGER PRIMARY KEY AUTOINCREMENT, "{1}" GEOMETRY{2})'.format(
+                self._layer, DEFAULT_GEOMETRY_COLUMN, ", " + column_definitions if column_definitions else ""
+            )
+        )
+        self._connection.execute(
+            "INSERT INTO gpkg_contents (table_name, data_type, identifier, srs_id) VALUES (?, 'features', ?, ?)",
+            (self._layer, self._layer, srs_id),
+        )
+        self._connection.execute(
+            "INSERT INTO gpkg_geometry_columns (table_name, column_name, geometry_type_name, srs_id, z, m) "
+            "VALUES (?, ?, 'GEOMETRY', ?, 2, 2)",
+            (self._layer, DEFAULT_GEOMETRY_COLUMN, srs_id),
+        )
+
+    def _resume_geopackage_rows(self, exists):
+        """Keeps the first resume_rows rows of the existing layer and removes the rest."""
+        row_count = 0
+        if exists:
+            row_count = self._connection.execute('SELECT count(*) FROM "{0}"'.format(self._layer)).fetchone()[0]
+        if row_count < self.resume_rows:
+            raise ValueError(
+                "{0} holds {1} committed rows, the checkpoint expects {2}.".format(
+                    self.path, row_count, self.resume_rows
+                )
+            )
+        self._connection.execute(
+            'DELETE FROM "{0}" WHERE "{1}" NOT IN (SELECT "{1}" FROM "{0}" ORDER BY "{1}" LIMIT ?)'.format(
+                self._layer, _geopackage_primary_key(self._connection, self._layer)
+            ),
+            (self.resume_rows,),
+        )
+        self._connection.commit()
+
+
+def _initialize_geopackage(connection):
+    """Creates the required GeoPackage metadata tables if they do not exist."""
+    connection.execute("PRAGMA application_id = 1196444487")
+    connection.execute("PRAGMA user_version = 10200")
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS gpkg_spatial_ref_sys (srs_name TEXT NOT NULL, srs_id INTEGER PRIMARY KEY, "
+        "organization TEXT NOT NULL, organization_coordsys_id INTEGER NOT NULL, definition TEXT NOT NULL, "
+        "description TEXT)"
+    )
+    connection.executemany(
+        "INSERT OR IGNORE INTO gpkg_spatial_ref_sys (srs_name, srs_id, organization, organization_coordsys_id, "
+        "definition) VALUES (?, ?, ?, ?, ?)",
+        [
+            ("Undefined cartesian SRS", -1, "NONE", -1, "undefined"),
+            ("Undefined geographic SRS", 0, "NONE", 0, "undefined"),
+        ],
+    )
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS gpkg_contents (table_name TEXT NOT NULL PRIMARY KEY, data_type TEXT NOT NULL, "
+        "identifier TEXT UNIQUE, description TEXT DEFAULT '', last_change DATETIME NOT NULL DEFAULT "
+        "(strftime('%Y-%m-%dT%H:%M:%fZ','now')), min_x DOUBLE, min_y DOUBLE, max_x DOUBLE, max_y DOUBLE, "
+        "srs_id INTEGER, CONSTRAINT fk_gc_r_srs_id FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys(srs_id))"
+    )
+    connection.execute(
+        "CREATE TABLE IF NOT EXISTS gpkg_geometry_columns (table_name TEXT NOT NULL, column_name TEXT NOT NULL, "
+        "geometry_type_name TEXT NOT NULL, srs_id INTEGER NOT NULL, z TINYINT NOT NULL, m TINYINT NOT NULL, "
+        "CONSTRAINT pk_geom_cols PRIMARY KEY (table_name, column_name), "
+        "CONSTRAINT fk_gc_tn FOREIGN KEY (table_name) REFERENCES gpkg_contents(table_name), "
+        "CONSTRAINT fk_gc_srs FOREIGN KEY (srs_id) REFERENCES gpkg_spatial_ref_sys (srs_id))"
+    )
+
+
+def _first_geopackage_layer(connection):
+    row = connection.execute(
+        "SELECT table_name FROM gpkg_contents WHERE data_type = 'features' ORDER BY rowid LIMIT 1"
+    ).fetchone()
+    if row is None:
+        raise ValueError("The GeoPackage has no feature layers.")
+    return row[0]
+
+
+def _geopackage_primary_key(connection, layer):
+    for _, name, _, _, _, primary_key in connection.execute('PRAGMA table_info("{0}")'.format(layer)):
+        if primary_key:
+            return name
+    return "rowid"
+
+
+def _geopackage_value(value):
+    """Converts values sqlite3 cannot store directly."""
+    if isinstance(value, (datetime.datetime, datetime.date)):
+        return value.isoformat()
+    if hasattr(value, "item"):  # numpy scalars
+        return value.item()
+    return value
+
+
+def _parse_geopackage_date(value):
+    if not isinstance(value, str):
+        return value
+    return datetime.datetime.fromisoformat(value.rstrip("Z"))
+
+
+def _geopackage_field_type(declared):
+    declared = str(declared).upper()
+    if "INT" in declared:
+        return "int"
+    if any(name in declared for name in ("REAL", "DOUBLE", "FLOAT", "NUMERIC")):
+        return "float"
+    if "DATE" in declared:
+        return "date"
+    if "BLOB" in declared:
+        return "bytes"
+    return "str"
+
+
+def _arrow_field_type(arrow_type):
+    import pyarrow as pa
+
+    if pa.types.is_integer(arrow_type) or pa.types.is_boolean(arrow_type):
+        return "int"
+    if pa.types.is_floating(arrow_type) or pa.types.is_decimal(arrow_type):
+        return "float"
+    if pa.types.is_temporal(arrow_type):
+        return "date"
+    if pa.types.is_binary(arrow_type) or pa.types.is_large_binary(arrow_type):
+        return "bytes"
+    return "str"
+
+
+def _parquet_geo_metadata(schema):
+    metadata = schema.metadata or {}
+    if b"geo" in metadata:
+        return json.loads(metadata[b"geo"].decode("utf-8"))
+    return {}
@@ -23,19 +23,495 @@
 # --------------------------------
 
 # Import Modules
-import arcpy
 import os
+import array
+import functools
+import hashlib
 import itertools
+import json
 import math
-try:
-    import pandas as pd
-except:
-    arcpy.AddWarning("Some tools require the Pandas installed in the ArcGIS Python Install."
-                   " Might require installing pre-requisite libraries and software.")
+import operator
+import sys
+import linebackend
+import lineio
+import lineprofile
+import linestore
 
+# arcpy, pandas, NumPy and linearray are imported on first use so importing the library and the tool scripts stays
+# cheap, see linebackend.LazyImport.
+arcpy = linebackend.LazyImport("arcpy") if linebackend.arcpy_available() else None
+pd = linebackend.LazyImport("pandas")
+la = linebackend.LazyImport("linearray")
+ls = linebackend.LazyImport("lineshare")
+np = linebackend.LazyImport("numpy")
+if not linebackend.module_available("pandas"):
+    warning = ("Some tools require the Pandas installed in the ArcGIS Python Install."
+               " Might require installing pre-requisite libraries and software.")
+    # Written to stderr so the stdout of lineworker only carries its JSON responses.
+    print(warning, file=sys.stderr)
+
+# Instrumentation used by the report decorators, profile_stage and report_profile, see lineprofile.py.
+profiler = lineprofile.profiler
+profiled = lineprofile.profiled
+
+# The geometry backend is selected at import time, see linebackend.load_geometry_backend.
+geometry_backend = linebackend.load_geometry_backend()
+# Packed array stages (simplification, densification) applied to the lines read by line_search_cursor, see
+# set_geometry_stages.
+geometry_stages = []
+SIMPLIFY_METHODS = ["DOUGLAS_PEUCKER", "VISVALINGAM"]
+# The result cache is opened from the LINELIBRARY_CACHE environment variable on first use, see result_cache_session.
+result_cache = None
+_result_cache_configured = False
+CHECKPOINT_SUFFIX = ".checkpoint.json"
+DEFAULT_CHECKPOINT_FEATURES = 50000
+# Fields added to changeset outputs, see OutputChangeset.
+CHANGE_FIELD_TYPES = [("CHANGE_TYPE", "str"), ("ROW_HASH", "str")]
+# arcpy field types mapped to the lineio type vocabulary.
+ARC_FIELD_TYPES = {"SmallInteger": "int", "Integer": "int", "BigInteger": "int", "Single": "float",
+                   "Double": "float", "String": "str", "Date": "date", "Blob": "bytes", "GUID": "str",
+                   "GlobalID": "str"}
+ADD_FIELD_TYPES = {"int": "LONG", "float": "DOUBLE", "str": "TEXT", "date": "DATE", "bytes": "BLOB"}
+
+
+# Class Definitions
+class ErrorLog(object):
+    """Compact log of per feature failures in a tool run. Each failure is stored as an OID and the index of its
+    (stage, error code) pair in two typed arrays, so recording a failure is cheap and nothing is formatted until the
+    log is reported once when the tool finishes. The error code is the exception type name or a code string."""
+
+    def __init__(self):
+        self.oids = array.array("q")
+        self.keys = array.array("I")
+        self._key_index = {}
+        self._key_list = []
+        self._messages = []
+
+    def __len__(self):
+        return len(self.oids)
+
+    def record(self, oid, stage, error):
+        """Records a failure.
+        :param - oid - object id of the failed feature (None if unknown)
+        :param - stage - name of the step that failed
+        :param - error - exception raised or an error code string"""
+        code = error if isinstance(error, str) else type(error).__name__
+        index = self._key_index.get((stage, code))
+        if index is None:
+            index = self._key_index[(stage, code)] = len(self._key_list)
+            self._key_list.append((stage, code))
+            # Only the first message of each stage and code is kept.
+            self._messages.append(None if isinstance(error, str) else str(error))
+        self.oids.append(-1 if oid is None else int(oid))
+        self.keys.append(index)
+
+    def summary(self, max_oids=10):
+        """Returns a list of dictionaries with the stage, code, count, the first OIDs and the first message of each
+        stage and error code pair."""
+        counts = [0] * len(self._key_list)
+        example_oids = [[] for _ in self._key_list]
+        for oid, index in zip(self.oids, self.keys):
+            counts[index] += 1
+            if len(example_oids[index]) < max_oids:
+                example_oids[index].append(oid)
+        return [{"stage": stage, "code": code, "count": counts[index], "oids": example_oids[index],
+                 "message": self._messages[index]} for index, (stage, code) in enumerate(self._key_list)]
+
+    def report(self, max_oids=10):
+        """Adds one tool warning per stage and error code pair. Does nothing if no failures were recorded.
+        :return - number of failures"""
+        if not self.oids:
+            return 0
+        arc_warning("{0} features failed.".format(len(self.oids)))
+        summary = self.summary(max_oids)
+        tool_status.add_feature_failures(summary)
+        for entry in summary:
+            more = ", ..." if entry["count"] > len(entry["oids"]) else ""
+            arc_warning("    {stage} - {code}: {count} features (OIDs {0}{1}){2}".format(
+                ", ".join(str(oid) for oid in entry["oids"]), more,
+                " - " + entry["message"] if entry["message"] else "", **entry))
+        return len(self.oids)
+
+
+class ToolRunStatus(object):
+    """Outcome of the tool runs since the last reset: the errors that stopped a tool, and the per feature failures
+    reported by its ErrorLog. The tools catch their errors to report them as tool messages, so a caller such as
+    lineworker resets the status before a run and reads it afterwards to tell a failed run from a finished one."""
+
+    def __init__(self):
+        self.reset()
+
+    def reset(self):
+        self.errors = []
+        self.feature_failures = []
+
+    @property
+    def ok(self):
+        return not self.errors
+
+    @property
+    def failed_features(self):
+        return sum(entry["count"] for entry in self.feature_failures)
+
+    def fail(self, error):
+        """Records an error that stopped a tool and prints it as the tools report their errors.
+        :param - error - exception raised or a message string"""
+        if isinstance(error, str):
+            self.errors.append(error)
+            arc_print(error)
+        else:
+            self.errors.append("{0}: {1}".format(type(error).__name__, error))
+            arc_print(str(error) or type(error).__name__)
+
+    def add_feature_failures(self, summary):
+        """Adds the per feature failure summary of an ErrorLog (see ErrorLog.summary)."""
+        self.feature_failures.extend(summary)
+
+    def as_dict(self):
+        return {"errors": list(self.errors), "failed_features": self.failed_features,
+                "feature_failures": list(self.feature_failures)}
+
+
+# Outcome of the tool runs since the last reset, read by lineworker.
+tool_status = ToolRunStatus()
+
+
+class BroadcastRowWriter(object):
+    """Writes child geometries that share the attributes of a parent row, such as the segments of a split line.
+    The attributes are buffered once per parent and broadcast to the children by a parent index array with NumPy
+    take when a batch is written, instead of copying the attribute row for every child. File dataset writers get
+    the broadcast columns directly, arcpy insert cursors get rows assembled from them.
+    :param - cursor - insert cursor or lineio.LineDatasetWriter with fields SHAPE@ followed by the attributes
+    :param - fields - list of the cursor fields, starting with SHAPE@
+    :param - field_dict - dictionary of the input row field indexes
+    :param - batch_size - children per written batch
+    :param - child_fields - optional fields after the attributes with a value per child (see add_children)"""
+
+    def __init__(self, cursor, fields, field_dict, batch_size=lineio.DEFAULT_BATCH_SIZE, child_fields=None):
+        self.cursor = cursor
+        self.attribute_fields = list(fields[1:])
+        self.child_fields = list(child_fields or [])
+        self.batch_size = batch_size
+        self._get_attributes = compile_row_projector(["SHAPE@"] + self.attribute_fields, field_dict)
+        self._parents = []
+        self._geometries = []
+        self._parent_index = []
+        self._child_columns = [[] for _ in self.child_fields]
+        self.rows_written = 0
+
+    def add_parent(self, row):
+        """Buffers the attributes of an input row and returns its parent index for add_children."""
+        if len(self._geometries) >= self.batch_size:
+            self.flush()
+        self._parents.append(self._get_attributes(row, None)[1:])
+        return len(self._parents) - 1
+
+    def add_children(self, parent_index, geometries, child_values=None):
+        """Buffers child geometries that take the attributes of the parent.
+        :param - parent_index - index returned by add_parent
+        :param - geometries - list of child geometries
+        :param - child_values - list with a list of values per child for each of the child fields"""
+        self._geometries.extend(geometries)
+        self._parent_index.extend([parent_index] * len(geometries))
+        for column, values in zip(self._child_columns, child_values or []):
+            column.extend(values)
+
+    def flush(self):
+        """Broadcasts the buffered parent attributes to their children and writes them."""
+        if not self._geometries:
+            return
+        parent_index = np.asarray(self._parent_index, dtype=np.intp)
+        parent_columns = zip(*self._parents) if self._parents and self.attribute_fields else []
+        columns = {}
+        for field, values in zip(self.attribute_fields, parent_columns):
+            parent_values = np.empty(len(values), dtype=object)
+            parent_values[:] = values
+            columns[field] = np.take(parent_values, parent_index)
+        columns.update(zip(self.child_fields, self._child_columns))
+        if hasattr(self.cursor, "write_geometries"):
+            self.cursor.write_geometries(self._geometries, columns)
+        else:
+            for row in zip(self._geometries, *[columns[field] for field in self.attribute_fields + self.child_fields]):
+                self.cursor.insertRow(row)
+        self.rows_written += len(self._geometries)
+        self._parents, self._geometries, self._parent_index = [], [], []
+        self._child_columns = [[] for _ in self.child_fields]
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.flush()
+        return False
+
+
+class CountingInsertCursor(object):
+    """arcpy insert cursor that counts the inserted rows like lineio.LineDatasetWriter.rows_written, used by
+    checkpointed runs. An arcpy insert cursor only writes its rows for certain once it is closed, so each commit
+    closes the cursor and opens a new one on the output.
+    :param - out_fc - output feature class
+    :param - fields - list of fields of each inserted row
+    :param - rows_written - rows already in the output"""
+
+    def __init__(self, out_fc, fields, rows_written=0):
+        self.out_fc = out_fc
+        self.fields = list(fields)
+        self.cursor = arcpy.da.InsertCursor(out_fc, self.fields)
+        self.rows_written = rows_written
+
+    def insertRow(self, row):
+        self.rows_written += 1
+        return self.cursor.insertRow(row)
+
+    def commit(self):
+        """Closes the cursor, writing its rows to the feature class, and opens a new cursor for the next rows."""
+        self.cursor.__exit__(None, None, None)
+        del self.cursor
+        self.cursor = arcpy.da.InsertCursor(self.out_fc, self.fields)
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        return self.cursor.__exit__(exc_type, exc_value, traceback)
+
+
+class RunCheckpoint(object):
+    """Sidecar state of a resumable tool run. Every chunk_features input features the tracked writers are flushed
+    and committed, and the count and last OID of the finished features and the number of output rows are written to
+    a JSON file next to the output. A run with resume set skips the finished features and appends to the committed
+    output rows, rows written after the last checkpoint are dropped. Features are only counted as done once all of
+    their rows are inserted, so a feature is never partially kept. Features that failed are recorded by object id
+    and processed again by a resumed run, after the committed rows. The state file is removed when the run
+    finishes. With chunk_features of 0 and resume not set nothing is recorded.
+    :param - out_fc - output feature class or file dataset
+    :param - parameters - JSON serializable tool parameters, a resumed run must use the same parameters
+    :param - resume - if true, continue the run recorded in the state file of the output (if there is one)
+    :param - chunk_features - input features per checkpoint"""
+
+    def __init__(self, out_fc, parameters, resume=False, chunk_features=0):
+        self.path = checkpoint_path(out_fc)
+        self.parameters = json.loads(json.dumps(parameters, default=str))
+        self.chunk_features = int(chunk_features or 0)
+        self.enabled = bool(self.chunk_features or resume)
+        self.features_done = 0
+        self.last_oid = None
+        self.rows_written = 0
+        self.failed_oids = set()
+        self._skipped = 0
+        self._retrying = set()
+        self._writers = []
+        if self.enabled and not self.chunk_features:
+            self.chunk_features = DEFAULT_CHECKPOINT_FEATURES
+        if resume and os.path.exists(self.path):
+            with open(self.path) as state_file:
+                state = json.load(state_file)
+            if state["parameters"] != self.parameters:
+                raise ValueError("The checkpoint {0} was written with other tool parameters, rerun without resuming."
+                                 .format(self.path))
+            self.features_done, self.last_oid, self.rows_written = (state["features_done"], state["last_oid"],
+                                                                    state["rows_written"])
+            self.failed_oids = set(state.get("failed_oids", []))
+            arc_print("Resuming after {0} features and {1} output rows.".format(self.features_done,
+                                                                               self.rows_written), True)
+        self.resumed_features = self.features_done
+
+    @property
+    def resuming(self):
+        """True if earlier features are skipped and the output is appended to."""
+        return self.resumed_features > 0
+
+    @property
+    def resume_rows(self):
+        """Output rows to keep, passed to line_insert_cursor. None if checkpointing is off."""
+        return self.rows_written if self.enabled else None
+
+    def track(self, *writers):
+        """Sets the writers flushed at each checkpoint, in order, the last one being the output cursor."""
+        self._writers = list(writers)
+
+    def skip(self, oid):
+        """Returns true for the input features finished by the resumed run, which are read in the same order. The
+        features that failed in the resumed run are not skipped, so they are processed again.
+        :param - oid - object id of the input feature"""
+        if self._skipped >= self.resumed_features:
+            return False
+        self._skipped += 1
+        if self._skipped == self.resumed_features and oid != self.last_oid:
+            raise ValueError("The input changed since the checkpoint, feature {0} was expected at position {1} but "
+                             "{2} was read.".format(self.last_oid, self.resumed_features, oid))
+        if oid in self.failed_oids:
+            self._retrying.add(oid)
+            return False
+        return True
+
+    def feature_done(self, oid):
+        """Counts an input feature whose rows are all inserted, and commits a checkpoint after each chunk. Call it
+        only once the feature succeeded.
+        :param - oid - object id of the input feature"""
+        if oid in self._retrying:
+            self._retrying.discard(oid)
+            self.failed_oids.discard(oid)
+            return
+        self._count(oid)
+
+    def feature_failed(self, oid):
+        """Counts an input feature that failed, which a resumed run processes again.
+        :param - oid - object id of the input feature"""
+        if oid in self._retrying:
+            self._retrying.discard(oid)
+            return
+        self.failed_oids.add(oid)
+        self._count(oid)
+
+    def _count(self, oid):
+        self.features_done += 1
+        self.last_oid = oid
+        if self.enabled and self.features_done % self.chunk_features == 0:
+            self.commit()
+
+    def commit(self):
+        """Flushes and commits the tracked writers and writes the state file."""
+        for writer in self._writers:
+            if hasattr(writer, "commit"):
+                writer.commit()
+            elif hasattr(writer, "flush"):
+                writer.flush()
+        self.rows_written = self._writers[-1].rows_written
+        state = {"parameters": self.parameters, "features_done": self.features_done, "last_oid": self.last_oid,
+                 "rows_written": self.rows_written, "failed_oids": sorted(self.failed_oids)}
+        with open(self.path + ".tmp", "w") as state_file:
+            json.dump(state, state_file)
+        os.replace(self.path + ".tmp", self.path)
+
+    def finish(self):
+        """Removes the state file of a finished run."""
+        if self.enabled and os.path.exists(self.path):
+            os.remove(self.path)
+
+
+class OutputChangeset(object):
+    """Change detection between two runs of a tool writing the same output. Before the output is replaced, the key
+    fields of its rows and a 64 bit hash of their geometry WKB and attributes are read. Once the new output is written
+    it is hashed the same way, the two versions are joined on hashes of their keys with linearray.hashed_row_changes,
+    and only the inserted, updated and deleted rows are written to the changeset output with a CHANGE_TYPE (INSERT,
+    UPDATE or DELETE) and ROW_HASH field. Deleted rows only hold their keys and no geometry. Without a changeset
+    output nothing is read or written.
+    :param - out_fc - output feature class or file dataset of the tool
+    :param - changeset_fc - optional changeset feature class or file dataset
+    :param - key_fields - list (or semicolon delimited string) of output fields identifying a row across runs, such
+    as PARENT_OID and SEG_INDEX
+    :param - out_fields - optional fields of the new output the key fields are checked against
+    :param - resuming - true when the run appends to the output of a checkpointed run, which has no previous output"""
+
+    def __init__(self, out_fc, changeset_fc, key_fields, out_fields=None, resuming=False):
+        self.out_fc = out_fc
+        self.changeset_fc = changeset_fc or None
+        if isinstance(key_fields, str):
+            key_fields = [field for field in key_fields.split(";") if field]
+        self.key_fields = list(key_fields or [])
+        self.previous = None
+        if self.changeset_fc is None:
+            return
+        if not self.key_fields:
+            raise ValueError("A changeset needs key fields identifying the output rows.")
+        missing = [field for field in self.key_fields if out_fields is not None and field not in out_fields]
+        if missing:
+            raise ValueError("The changeset key fields {0} are not output fields.".format(", ".join(missing)))
+        if resuming:
+            raise ValueError("A resumed run has no previous output to compare, rerun without resuming.")
+        if os.path.normcase(os.path.abspath(self.changeset_fc)) == os.path.normcase(os.path.abspath(out_fc)):
+            raise ValueError("The changeset must not be written to the output.")
+        exists = lineio.dataset_exists(out_fc) if lineio.is_file_dataset(out_fc) else arcpy.Exists(out_fc)
+        if exists:
+            with profiler.stage("hash previous output") as stage:
+                self.previous = self.hash_rows(out_fc)
+                stage.rows = len(self.previous[0])
+
+    @property
+    def enabled(self):
+        return self.changeset_fc is not None
+
+    def hash_rows(self, in_fc):
+        """Reads the key values of the rows of an output and hashes their keys and content.
+        :param - in_fc - output feature class or file dataset
+        :return - tuple of the uint64 key hash array, the uint64 content hash array and the list of key tuples"""
+        fields = get_fields(in_fc)
+        missing = [field for field in self.key_fields if field not in fields]
+        if missing:
+            raise ValueError("{0} has no fields {1}.".format(in_fc, ", ".join(missing)))
+        key_index = [fields.index(field) for field in self.key_fields]
+        key_values, key_digests, content_digests = [], [], []
+        for row in line_search_cursor(in_fc, ["SHAPE@WKB"] + fields, stages=[]):
+            keys = tuple(row[index + 1] for index in key_index)
+            key_values.append(keys)
+            key_digests.append(hashlib.blake2b(json.dumps(keys, default=str).encode("utf-8"), digest_size=8).digest())
+            content = hashlib.blake2b(json.dumps(row[1:], default=str).encode("utf-8"), digest_size=8)
+            content.update(bytes(row[0] or b""))
+            content_digests.append(content.digest())
+        return (np.frombuffer(b"".join(key_digests), dtype=np.uint64),
+                np.frombuffer(b"".join(content_digests), dtype=np.uint64), key_values)
+
+    def write(self):
+        """Hashes the new output, joins it with the previous output and writes the changed rows to the changeset.
+        :return - dictionary of INSERT, UPDATE and DELETE row counts, or None without a changeset output"""
+        if self.changeset_fc is None:
+            return None
+        with profiler.stage("hash new output") as stage:
+            new_keys, new_hashes, _ = self.hash_rows(self.out_fc)
+            stage.rows = len(new_keys)
+        old_keys, old_hashes, old_key_values = self.previous or (np.empty(0, np.uint64), np.empty(0, np.uint64), [])
+        inserted, updated, deleted = la.hashed_row_changes(old_keys, old_hashes, new_keys, new_hashes)
+        change_types = {index: "INSERT" for index in inserted.tolist()}
+        change_types.update((index, "UPDATE") for index in updated.tolist())
+        fields = get_fields(self.out_fc)
+        change_fields = [name for name, _ in CHANGE_FIELD_TYPES]
+        with profiler.stage("write changeset", len(change_types) + len(deleted)):
+            create_line_feature_class(self.changeset_fc, self.out_fc, None, CHANGE_FIELD_TYPES)
+            with line_insert_cursor(self.changeset_fc, ["SHAPE@"] + fields + change_fields, self.out_fc,
+                                    field_types=get_field_types(self.out_fc, fields) + CHANGE_FIELD_TYPES) as cursor:
+                if change_types:
+                    for index, row in enumerate(line_search_cursor(self.out_fc, ["SHAPE@"] + fields, stages=[])):
+                        if index in change_types:
+                            cursor.insertRow(list(row) + [change_types[index], format(int(new_hashes[index]), "016x")])
+                key_positions = {field: position for position, field in enumerate(self.key_fields)}
+                for index in deleted.tolist():
+                    keys = old_key_values[index]
+                    cursor.insertRow([None] + [keys[key_positions[field]] if field in key_positions else None
+                                               for field in fields] + ["DELETE", format(int(old_hashes[index]), "016x")])
+        counts = {"INSERT": len(inserted), "UPDATE": len(updated), "DELETE": len(deleted)}
+        arc_print("Changeset: {0} inserted, {1} updated and {2} deleted rows of {3} written to {4}.".format(
+            counts["INSERT"], counts["UPDATE"], counts["DELETE"], len(new_keys), self.changeset_fc), True)
+        return counts
 
 
 # Function Definitions
+def __getattr__(name):
+    """Resolves ExecuteError on first use so the except clauses of the tools do not import arcpy. Outside of ArcGIS
+    it is a placeholder that is never raised."""
+    global ExecuteError
+    if name == "ExecuteError":
+        ExecuteError = arcpy.ExecuteError if arcpy else type("ExecuteError", (Exception,), {})
+        return ExecuteError
+    raise AttributeError("module {0} has no attribute {1}".format(__name__, name))
+
+
+def compact_argument_repr(args, max_length=60):
+    """Short description of function arguments for failure messages. Numbers, booleans and (truncated) strings are
+    shown, other objects such as geometries and cursor rows only by type and size so they are not serialized."""
+    descriptions = []
+    for value in args:
+        if value is None or isinstance(value, (bool, int, float)):
+            descriptions.append(repr(value))
+        elif isinstance(value, str):
+            descriptions.append(repr(value if len(value) <= max_length else value[:max_length] + "..."))
+        elif isinstance(value, (list, tuple)):
+            descriptions.append("<{0} of {1}>".format(type(value).__name__, len(value)))
+        else:
+            descriptions.append("<{0}>".format(type(value).__name__))
+    return "(" + ", ".join(descriptions) + ")"
+
+
 def func_report(function=None, reportBool=False):
     """This decorator function is designed to be used as a wrapper with other functions to enable basic try and except
      reporting (if function fails it will report the name of the function that failed and its arguments. If a report
@@ -43,16 +519,21 @@ def func_report(function=None, reportBool=False):
 
     def func_report_decorator(function):
         def func_wrapper(*args, **kwargs):
+            start = lineprofile.perf_counter() if profiler.enabled else None
             try:
                 func_result = function(*args, **kwargs)
+                if start is not None:
+                    profiler.record_call(function.__name__, lineprofile.perf_counter() - start)
                 if reportBool:
                     print("Function:{0}".format(str(function.__name__)))
                     print("     Input(s):{0}".format(str(args)))
                     print("     Output(s):{0}".format(str(func_result)))
                 return func_result
             except Exception as e:
-                print(
-                    "{0} - function failed -|- Function arguments were:{1}.".format(str(function.__name__), str(args)))
+                if start is not None:
+                    profiler.record_call(function.__name__, lineprofile.perf_counter() - start, True)
+                print("{0} - function failed -|- Function arguments were:{1}.".format(
+                    str(function.__name__), compact_argument_repr(args)))
                 print(e.args[0])
 
         return func_wrapper
@@ -73,8 +554,11 @@ def arc_tool_report(function=None, arcToolMessageBool=False, arcProgressorBool=F
 
     def arc_tool_report_decorator(function):
         def func_wrapper(*args, **kwargs):
+            start = lineprofile.perf_counter() if profiler.enabled else None
             try:
                 func_result = function(*args, **kwargs)
+                if start is not None:
+                    profiler.record_call(function.__name__, lineprofile.perf_counter() - start)
                 if arcToolMessageBool:
                     arcpy.AddMessage("Function:{0}".format(str(function.__name__)))
                     arcpy.AddMessage("     Input(s):{0}".format(str(args)))
@@ -85,11 +569,13 @@ def arc_tool_report(function=None, arcToolMessageBool=False, arcProgressorBool=F
                     arcpy.SetProgressorLabel("     Output(s):{0}".format(str(func_result)))
                 return func_result
             except Exception as e:
-                arcpy.AddWarning(
-                    "{0} - function failed -|- Function arguments were:{1}.".format(str(function.__name__),
-                                                                                    str(args)))
-                print(
-                    "{0} - function failed -|- Function arguments were:{1}.".format(str(function.__name__), str(args)))
+                if start is not None:
+                    profiler.record_call(function.__name__, lineprofile.perf_counter() - start, True)
+                message = "{0} - function failed -|- Function arguments were:{1}.".format(
+                    str(function.__name__), compact_argument_repr(args))
+                if arcpy:
+                    arcpy.AddWarning(message)
+                print(message)
                 print(e.args[0])
 
         return func_wrapper
@@ -108,7 +594,9 @@ def arc_print(string, progressor_Bool=False):
     """ This function is used to simplify using arcpy reporting for tool creation,if progressor bool is true it will
     create a tool label."""
     casted_string = str(string)
-    if progressor_Bool:
+    if arcpy is None:
+        print(casted_string)
+    elif progressor_Bool:
         arcpy.SetProgressorLabel(casted_string)
         arcpy.AddMessage(casted_string)
         print(casted_string)
@@ -228,13 +716,55 @@ def copy_altered_row(row, field_list, field_dict, replacement_dict):
     except:
         arc_print("Could not get row fields for the following input {0}, returned an empty list.".format(str(row)),
                   True)
-        arcpy.AddWarning(
-            "Could not get row fields for the following input {0}, returned an empty list.".format(str(row)))
+        if arcpy:
+            arcpy.AddWarning(
+                "Could not get row fields for the following input {0}, returned an empty list.".format(str(row)))
         new_row = []
         return new_row
 
 
-@arc_tool_report
+def compile_row_projector(field_list, field_dict, replacement_fields=("SHAPE@",)):
+    """Compiles the row copy done by copy_altered_row once per tool run. Field positions are resolved up front, so
+    projecting a row is a single itemgetter call plus one slot assignment per replaced field, with no per field
+    lookups or branching. Fields missing from the field dictionary are output as null values like copy_altered_row.
+    :param - field_list - list of output field names
+    :param - field_dict - dictionary of input row fields and their indexes as values
+    :param - replacement_fields - fields whose values are passed to the projector instead of read from the row
+    :return - function(row, *replacement_values) returning the output row as a list"""
+    positions = {field: position for position, field in enumerate(field_list)}
+    replacement_positions = [positions[field] for field in replacement_fields]
+    null_positions = [position for position, field in enumerate(field_list)
+                      if field not in field_dict and field not in replacement_fields]
+    if null_positions:
+        arc_print("Could not find fields {0} in the input rows, they will be null. Check field names for match.".format(
+            [field_list[position] for position in null_positions]), True)
+    source_indexes = [field_dict.get(field, 0) for field in field_list]
+    if len(source_indexes) == 1:
+        index = source_indexes[0]
+        getter = lambda row: (row[index],)
+    else:
+        getter = operator.itemgetter(*source_indexes)
+    if len(replacement_positions) == 1 and not null_positions:
+        replacement_position = replacement_positions[0]
+
+        def project_single_replacement(row, value):
+            new_row = list(getter(row))
+            new_row[replacement_position] = value
+            return new_row
+
+        return project_single_replacement
+    fixed_positions = replacement_positions + null_positions
+    null_values = [None] * len(null_positions)
+
+    def project(row, *values):
+        new_row = list(getter(row))
+        for position, value in zip(fixed_positions, list(values) + null_values):
+            new_row[position] = value
+        return new_row
+
+    return project
+
+
 def line_length(row, field, constant_len, f_dict, print_bool=False):
     """Returns the appropriate value type  based on the options selected: retrieved form field or uses a constant
     :param - row - cursor row as a list
@@ -264,8 +794,12 @@ def get_fields(feature_class, excluded_tolkens=["OID", "Geometry"], excluded_fie
             fcName = os.path.split(feature_class)[1]
         except:  # If a Feature Layer, just print the Layer Name
             fcName = feature_class
-        field_list = [f.name for f in arcpy.ListFields(feature_class) if f.type not in excluded_tolkens
-                      and f.name.lower() not in excluded_fields]
+        if lineio.is_file_dataset(feature_class):
+            field_list = [name for name, _ in lineio.describe_line_dataset(feature_class)["fields"]
+                          if name.lower() not in excluded_fields]
+        else:
+            field_list = [f.name for f in arcpy.ListFields(feature_class) if f.type not in excluded_tolkens
+                          and f.name.lower() not in excluded_fields]
         arc_print("The field list for {0} is:{1}".format(str(fcName), str(field_list)), True)
         return field_list
     except:
@@ -273,13 +807,213 @@ def get_fields(feature_class, excluded_tolkens=["OID", "Geometry"], excluded_fie
             "Could not get fields for the following input {0}, returned an empty list.".format(
                 str(feature_class)),
             True)
-        arcpy.AddWarning(
-            "Could not get fields for the following input {0}, returned an empty list.".format(
-                str(feature_class)))
+        if arcpy:
+            arcpy.AddWarning(
+                "Could not get fields for the following input {0}, returned an empty list.".format(
+                    str(feature_class)))
         field_list = []
         return field_list
 
 
+def get_field_types(feature_class, field_names):
+    """Get the types of the passed fields of a feature class or file dataset in the type vocabulary used by lineio
+    (int, float, str, date and bytes).
+    :param - feature_class - Feature class, GeoParquet file or GeoPackage layer
+    :param - field_names - list of field names
+    :return - list of (field name, type) tuples"""
+    if lineio.is_file_dataset(feature_class):
+        type_lookup = dict(lineio.describe_line_dataset(feature_class)["fields"])
+    else:
+        type_lookup = {f.name: ARC_FIELD_TYPES.get(f.type, "str") for f in arcpy.ListFields(feature_class)}
+    return [(name, type_lookup.get(name, "str")) for name in field_names]
+
+
+def create_line_feature_class(out_fc, template_fc, field_types=None, extra_field_types=None, has_m=False):
+    """Creates (overwriting) an output polyline feature class with the fields of the template. The output or the
+    template can be a file dataset (GeoParquet or GeoPackage), file outputs are created by line_insert_cursor.
+    :param - out_fc - output feature class path
+    :param - template_fc - feature class or file dataset whose fields are copied
+    :param - field_types - optional list of (field name, type) tuples in the lineio type vocabulary that are created
+    instead of the template fields
+    :param - extra_field_types - optional list of (field name, type) tuples added after the fields
+    :param - has_m - if true the output is M enabled, otherwise M follows the template"""
+    if lineio.is_file_dataset(out_fc):
+        return
+    arcpy.env.overwriteOutput = True
+    out_workspace, file_name = os.path.split(out_fc)
+    m_setting = "ENABLED" if has_m else "SAME_AS_TEMPLATE"
+    if lineio.is_file_dataset(template_fc):
+        arcpy.CreateFeatureclass_management(out_workspace, file_name, "POLYLINE",
+                                            has_m="ENABLED" if has_m else "DISABLED")
+        field_types = field_types or lineio.describe_line_dataset(template_fc)["fields"]
+    elif field_types is not None:
+        desc = arcpy.Describe(template_fc)
+        arcpy.CreateFeatureclass_management(out_workspace, file_name, "POLYLINE", spatial_reference=template_fc,
+                                            has_m="ENABLED" if has_m or desc.hasM else "DISABLED",
+                                            has_z="ENABLED" if desc.hasZ else "DISABLED")
+    else:
+        arcpy.CreateFeatureclass_management(out_workspace, file_name, "POLYLINE", template_fc,
+                                            spatial_reference=template_fc, has_m=m_setting,
+                                            has_z="SAME_AS_TEMPLATE")
+        field_types = []
+    for name, kind in list(field_types) + list(extra_field_types or []):
+        add_new_field(out_fc, name, ADD_FIELD_TYPES[kind])
+
+
+def line_search_cursor(in_fc, fields, query="", batch_size=lineio.DEFAULT_BATCH_SIZE, stages=None):
+    """Returns a search cursor over a feature class or a row generator over a file dataset. File datasets are read
+    in columnar batches and their WKB is converted to geometries of the active geometry backend once per batch.
+    Besides attribute fields, SHAPE@, SHAPE@WKB and OID@ are supported for file datasets. When geometry stages are
+    set, the line shapes are read as WKB batches and simplified or densified in packed arrays before they are
+    returned, for feature classes and file datasets alike.
+    :param - in_fc - feature class, GeoParquet file or GeoPackage layer
+    :param - fields - list of fields to return in each row
+    :param - query - sql query for feature classes (not supported for file datasets)
+    :param - stages - optional list of packed array stages, defaults to the stages from set_geometry_stages. Pass
+    an empty list when reading points.
+    :return - iterable of rows"""
+    stages = geometry_stages if stages is None else stages
+    if not {"SHAPE@", "SHAPE@WKB"} & set(fields):
+        stages = []
+    if not lineio.is_file_dataset(in_fc):
+        if not stages:
+            return arcpy.da.SearchCursor(in_fc, fields, where_clause=query)
+        return _staged_search_rows(in_fc, fields, query, batch_size, stages)
+    return _file_search_rows(in_fc, fields, batch_size, stages)
+
+
+def _staged_search_rows(in_fc, fields, query, batch_size, stages):
+    read_fields = ["SHAPE@WKB" if field == "SHAPE@" else field for field in fields]
+    wkb_index = read_fields.index("SHAPE@WKB")
+    spatial_reference = arcpy.Describe(in_fc).spatialReference
+    with arcpy.da.SearchCursor(in_fc, read_fields, where_clause=query) as cursor:
+        while True:
+            rows = list(itertools.islice(cursor, batch_size))
+            if not rows:
+                break
+            wkb_geometries = apply_geometry_stages([row[wkb_index] for row in rows], stages)
+            geometries = wkb_geometries
+            if "SHAPE@" in fields:
+                geometries = geometry_backend.from_wkb(wkb_geometries, spatial_reference)
+            for row, wkb, geometry in zip(rows, wkb_geometries, geometries):
+                yield tuple(geometry if field == "SHAPE@" else wkb if field == "SHAPE@WKB" else value
+                            for field, value in zip(fields, row))
+
+
+def _file_search_rows(in_fc, fields, batch_size, stages=()):
+    attribute_fields = [field for field in fields if field not in ("SHAPE@", "SHAPE@WKB", "OID@")]
+    batches = lineio.read_line_batches(in_fc, attribute_fields, batch_size)
+    while True:
+        stage = profiler.stage("read batches")
+        batch = next(batches, None)
+        if batch is None:
+            break
+        columns = dict(batch["columns"])
+        columns["OID@"] = batch["oids"]
+        columns["SHAPE@WKB"] = batch["wkb"]
+        if stages:
+            columns["SHAPE@WKB"] = apply_geometry_stages(batch["wkb"], stages)
+        if "SHAPE@" in fields:
+            columns["SHAPE@"] = geometry_backend.from_wkb(columns["SHAPE@WKB"])
+        stage.stop(len(batch["oids"]))
+        for row in zip(*[columns[field] for field in fields]):
+            yield row
+
+
+def line_insert_cursor(out_fc, fields, template_fc, batch_size=lineio.DEFAULT_BATCH_SIZE, field_types=None,
+                       resume_rows=None):
+    """Returns an insert cursor for a feature class, or a buffered columnar writer for a file dataset output. The
+    first field must be SHAPE@ holding geometries of the active geometry backend.
+    :param - out_fc - output feature class, GeoParquet file or GeoPackage layer
+    :param - fields - list of fields of each inserted row, starting with SHAPE@
+    :param - template_fc - input the field types and coordinate system are taken from
+    :param - batch_size - rows per written batch of file outputs
+    :param - field_types - optional list of (field name, type) tuples of the fields after SHAPE@, used instead of
+    the template field types
+    :param - resume_rows - optional output rows of a checkpointed run to keep and append to (see RunCheckpoint)
+    :return - cursor usable as a context manager with an insertRow method"""
+    if not lineio.is_file_dataset(out_fc):
+        if resume_rows is None:
+            return arcpy.da.InsertCursor(out_fc, fields)
+        if resume_rows:
+            _truncate_feature_class(out_fc, resume_rows)
+        return CountingInsertCursor(out_fc, fields, resume_rows)
+    output_format = lineio.dataset_format(out_fc)
+    crs = None
+    if lineio.is_file_dataset(template_fc):
+        description = lineio.describe_line_dataset(template_fc)
+        if description["format"] == output_format:
+            crs = description["crs"]
+    elif arcpy:
+        spatial_reference = arcpy.Describe(template_fc).spatialReference
+        if output_format == "gpkg" and spatial_reference.factoryCode:
+            crs = (spatial_reference.factoryCode, spatial_reference.exportToString())
+    if field_types is None:
+        field_types = get_field_types(template_fc, fields[1:])
+    return lineio.LineDatasetWriter(out_fc, field_types, crs, batch_size, geometry_backend.to_wkb, resume_rows)
+
+
+def _truncate_feature_class(out_fc, keep_rows):
+    """Deletes the rows of a feature class after its first keep_rows rows in object id order."""
+    oid_field = arcpy.Describe(out_fc).OIDFieldName
+    row_count = 0
+    with arcpy.da.UpdateCursor(out_fc, ["OID@"], sql_clause=(None, "ORDER BY " + oid_field)) as cursor:
+        for _ in cursor:
+            row_count += 1
+            if row_count > keep_rows:
+                cursor.deleteRow()
+    if row_count < keep_rows:
+        raise ValueError("{0} holds {1} rows, the checkpoint expects {2}.".format(out_fc, row_count, keep_rows))
+
+
+def checkpoint_path(out_fc):
+    """Returns the path of the checkpoint state file of an output. It is written next to file datasets and next to
+    the geodatabase or GeoPackage holding an output layer.
+    :param - out_fc - output feature class or file dataset
+    :return - path of the JSON state file"""
+    workspace, name = os.path.split(out_fc)
+    while workspace and os.path.splitext(workspace)[1].lower() not in (".gdb", ".gpkg", ".sde"):
+        workspace = os.path.dirname(workspace) if os.path.dirname(workspace) != workspace else ""
+    if not workspace:
+        return out_fc + CHECKPOINT_SUFFIX
+    return os.path.join(os.path.dirname(workspace), "{0}.{1}{2}".format(os.path.basename(workspace), name,
+                                                                       CHECKPOINT_SUFFIX))
+
+
+def describe_line_spatial_reference(in_fc):
+    """Returns the spatial reference of a feature class or file dataset and whether it is projected. File datasets
+    return None for the spatial reference.
+    :param - in_fc - feature class, GeoParquet file or GeoPackage layer
+    :return - tuple of (spatial reference, is_projected boolean)"""
+    if lineio.is_file_dataset(in_fc):
+        return None, lineio.is_projected_crs(lineio.describe_line_dataset(in_fc)["crs"])
+    spatial_reference = arcpy.Describe(in_fc).spatialReference
+    return spatial_reference, spatial_reference.type == "Projected"
+
+
+def arc_warning(string):
+    """Adds a tool warning when running in ArcGIS and prints it."""
+    if arcpy:
+        arcpy.AddWarning(str(string))
+    print(str(string))
+
+
+def profile_stage(name, rows=0):
+    """Starts a timed tool stage for the profile, used as a context manager or stopped with stage.stop(rows). It
+    only records when profiling is enabled (see lineprofile.py).
+    :param - name - stage name, repeated stages are accumulated
+    :param - rows - optional starting row count of the stage
+    :return - lineprofile.Stage"""
+    return profiler.stage(name, rows)
+
+
+def report_profile(tool_name):
+    """Writes the JSON profile of a finished tool run when profiling is enabled, and resets it for the next run.
+    :param - tool_name - name recorded in the profile
+    :return - profile dictionary or None"""
+    return profiler.write(tool_name, arc_print)
+
+
 def construct_index_dict(field_names, index_start=0):
     """This function will construct a dictionary used to retrieve indexes for cursors.
     :param - field_names - list of strings (field names) to load as keys into a dictionary
@@ -318,20 +1052,26 @@ def convert_to_azimuth(angle):
 
 def arc_calculate_segment_bearing(shape_obj, method="GEODESIC"):
     """Calculate the bearing from a single shape object and return the angle.
-    @param - shape object from arcpy for a polyline. Uses Arc methods.
+    @param - shape object from arcpy for a polyline. Uses Arc methods. With the numpy geometry backend a planar
+    azimuth from the first to the last point is returned instead.
     returns - angle - float - angle in degrees (not azimuth)"""
+    if geometry_backend.name != "arcpy":
+        first_point = geometry_backend.first_point(shape_obj)
+        last_point = geometry_backend.last_point(shape_obj)
+        return math.degrees(math.atan2(last_point.X - first_point.X, last_point.Y - first_point.Y))
     sr = shape_obj.spatialReference
     first_point = arcpy.PointGeometry(shape_obj.firstPoint, sr)
     last_point = arcpy.PointGeometry(shape_obj.lastPoint, sr)
     angle, dist = first_point.angleAndDistanceTo(last_point, method)
     return angle
 
+@profiled
 def calculate_segment_bearing(shape_obj):
     """Calculate the bearing from a single shape object and return the angle. Assumes projected coords.
     @param - shape object from arcpy for a polyline
     returns - angle - float - angle in degrees (not azimuth)"""
-    first_point = shape_obj.firstPoint
-    last_point = shape_obj.lastPoint
+    first_point = geometry_backend.first_point(shape_obj)
+    last_point = geometry_backend.last_point(shape_obj)
     first_x = first_point.X
     first_y = first_point.Y
     last_x = last_point.X
@@ -368,6 +1108,108 @@ def calculate_line_bearing(in_fc, field, convert_azimuth=False):
     return return_oid_bearing_dict
 
 
+@arc_tool_report
+def feature_class_to_packed_lines(in_fc, query=""):
+    """Reads the line geometries of a feature class, layer or file dataset into linearray.PackedLines using a single
+    cursor pass over the WKB of each shape, so downstream geometry work can be done in vectorized NumPy passes.
+    :param - in_fc - input polyline feature class, layer or file dataset
+    :param - query - sql query to grab appropriate features (not supported for file datasets)
+    :returns - linearray.PackedLines with object ids of the input features"""
+    oids = []
+    wkb_geometries = []
+    for oid, wkb in line_search_cursor(in_fc, ["OID@", "SHAPE@WKB"], query):
+        oids.append(oid)
+        wkb_geometries.append(wkb)
+    return la.packed_lines_from_wkb(wkb_geometries, oids)
+
+
+def line_length_index(in_fc, mode="PLANAR", query=""):
+    """Reads the lines of a feature class, layer or file dataset into packed arrays and builds their cumulative length
+    index (see linearray.LengthIndex), so the lengths and distance along line lookups of every feature come from one
+    vectorized pass with compensated sums instead of a length call per geometry.
+    :param - in_fc - input polyline feature class, layer or file dataset
+    :param - mode - PLANAR, 3D (Z aware) or GEODESIC (longitude and latitude in degrees, lengths in meters)
+    :param - query - sql query to grab appropriate features (not supported for file datasets)
+    :returns - linearray.LengthIndex, its packed attribute holds the lines with the object ids of the features"""
+    return la.LengthIndex(feature_class_to_packed_lines(in_fc, query), mode)
+
+
+def split_packed_lines(packed, split_value, split_method="LENGTH", overlap=0.0, best_fit=True, workers=1):
+    """Splits packed lines into segments of a target length or count (see split_measures_by_length and
+    split_measures_by_count) in vectorized passes. With more than one worker the lines are shared with a pool of
+    worker processes through shared memory and each worker splits a balanced range of features, see lineshare.
+    :param - packed - linearray.PackedLines
+    :param - split_value - target segment length or count, a scalar or one value per feature
+    :param - split_method - LENGTH or COUNT
+    :param - overlap - overlap as a share of the segment length
+    :param - best_fit - with LENGTH, if true the segments of a line have equal lengths
+    :param - workers - number of processes, 1 splits in this process
+    :returns - tuple of the segment PackedLines (oids are the parent oids), the segment offsets per feature and the
+    from and to measures of each segment"""
+    if workers is not None and int(workers) <= 1:
+        return la.split_lines(packed, split_value, split_method, overlap, best_fit)
+    return ls.split_lines_shared(packed, split_value, split_method, overlap, best_fit, workers)
+
+
+def _query_measures(index, features, values, use_percentage):
+    """Broadcasts query distances (or fractions of the feature lengths) to one float per query."""
+    values = np.broadcast_to(np.asarray(values, dtype=np.float64), features.shape)
+    return values * index.lengths[features] if use_percentage else values
+
+
+def segments_along_lines(packed, features, starts, ends, use_percentage=False, index=None):
+    """Batch form of segmentAlongLine: cuts the sub-line between the start and end distance of every query out of
+    packed lines in one call, with one binary search over the cumulative length index and interpolated cut points
+    (see linearray.extract_intervals). As with geometry_backend.segment_along_line, a query with its start after its
+    end returns the reversed sub-line.
+    :param - packed - linearray.PackedLines
+    :param - features - feature index of each query
+    :param - starts - start distance of each query, a scalar or one value per query
+    :param - ends - end distance of each query, a scalar or one value per query
+    :param - use_percentage - if true starts and ends are fractions (0-1) of the feature lengths
+    :param - index - optional linearray.LengthIndex of the packed lines, a planar index is built if None
+    :returns - linearray.PackedLines with one feature per query and the oids of the queried features"""
+    index = index or la.LengthIndex(packed)
+    features = np.asarray(features, dtype=np.int64)
+    starts = _query_measures(index, features, starts, use_percentage)
+    ends = _query_measures(index, features, ends, use_percentage)
+    segments = la.extract_intervals(packed, features, np.minimum(starts, ends), np.maximum(starts, ends), index)
+    reverse = starts > ends
+    if np.any(reverse):
+        segments = la.reverse_lines(segments, reverse)
+    return segments
+
+
+def points_along_lines(packed, features, distances, use_percentage=False, index=None, at_part_end=False):
+    """Batch form of positionAlongLine: returns the point at a distance along the feature of every query in one
+    call (see linearray.points_along_lines).
+    :param - packed - linearray.PackedLines
+    :param - features - feature index of each query
+    :param - distances - distance of each query, a scalar or one value per query
+    :param - use_percentage - if true distances are fractions (0-1) of the feature lengths
+    :param - index - optional linearray.LengthIndex of the packed lines, a planar index is built if None
+    :param - at_part_end - if true points on part boundaries are the end of the preceding part instead of the start
+    of the following one, as for the end point of a segment ending there
+    :returns - tuple of the (n, 2) coordinates and the (n) Z and M values, None when the lines have none"""
+    index = index or la.LengthIndex(packed)
+    features = np.asarray(features, dtype=np.int64)
+    return la.points_along_lines(packed, features, _query_measures(index, features, distances, use_percentage),
+                                 index, at_part_end)
+
+
+@arc_tool_report
+def line_descriptor_df(in_fc, query=""):
+    """Function will build a pandas dataframe of per feature line descriptors (length, length weighted mean bearing,
+    principal (PCA) bearing and oriented bounding box) with an object ID index. See linearray.line_descriptor_table.
+    :param - in_fc - input polyline feature class or layer
+    :param - query - sql query to grab appropriate features
+    :returns - pandas.DataFrame"""
+    descriptor_table = la.line_descriptor_table(feature_class_to_packed_lines(in_fc, query))
+    descriptor_df = pd.DataFrame(descriptor_table)
+    descriptor_df = descriptor_df.set_index("OID", drop=True)
+    return descriptor_df
+
+
 def find_smallest_angle_from_intersecting_lines(angle_1, angle_2, angle_1_inverse=None, angle_2_inverse=None):
     """Given two angles indicating a lines orientation, this function will determine the inverse versions of their angles, and
     test every combination of angle to determine the smallest possible angle between them.
@@ -407,6 +1249,83 @@ def find_smallest_angle_column(df, bearing_column_1, bearing_column_2, new_field
     ), axis=1)
     return df
 
+def set_geometry_backend(name=None):
+    """Switches the geometry backend used by the geometry helpers of this library (arcpy or numpy). Without a name
+    the LINELIBRARY_BACKEND environment variable or the best available backend is used.
+    @param: name - optional backend name
+    @returns - the geometry backend instance"""
+    global geometry_backend
+    geometry_backend = linebackend.load_geometry_backend(name)
+    return geometry_backend
+
+def set_geometry_stages(simplify_method=None, simplify_tolerance=0.0, densify_interval=0.0):
+    """Sets the packed array stages applied to every line read by line_search_cursor, so any tool can simplify noisy
+    lines or densify them before its own geometry work. Lines are simplified first and densified second.
+    @param: simplify_method - optional DOUGLAS_PEUCKER (tolerance is a distance) or VISVALINGAM (tolerance is an area)
+    @param: simplify_tolerance - simplification tolerance, 0 does not simplify
+    @param: densify_interval - maximum segment length after densification, 0 does not densify
+    @returns - the list of stages"""
+    global geometry_stages
+    stages = []
+    if simplify_method and simplify_tolerance:
+        simplify_method = str(simplify_method).upper()
+        if simplify_method not in SIMPLIFY_METHODS:
+            raise ValueError("Unknown simplification method {0}, use {1}.".format(simplify_method,
+                                                                                  " or ".join(SIMPLIFY_METHODS)))
+        stages.append(functools.partial(la.simplify_lines, tolerance=float(simplify_tolerance),
+                                        method=simplify_method))
+    if densify_interval:
+        stages.append(functools.partial(la.densify_lines, interval=float(densify_interval)))
+    geometry_stages = stages
+    return geometry_stages
+
+def set_result_cache(path=None, max_megabytes=linestore.DEFAULT_CACHE_MB):
+    """Opens the on disk result cache the tools look up unchanged features in, see linestore.ResultCache. Without a
+    path the cache is turned off.
+    @param: path - optional path of the sqlite cache database
+    @param: max_megabytes - size limit of the cache, least recently used results are evicted past it
+    @returns - the linestore.ResultCache or None"""
+    global result_cache, _result_cache_configured
+    if result_cache is not None:
+        result_cache.close()
+    result_cache = linestore.ResultCache(path, max_megabytes * 2 ** 20) if path else None
+    _result_cache_configured = True
+    return result_cache
+
+def result_cache_session(tool_name, parameters):
+    """Returns a linestore.CacheSession of the result cache for a tool run, or None when no cache is set.
+    @param: tool_name - name of the tool
+    @param: parameters - JSON serializable tool parameters that change the results
+    @returns - linestore.CacheSession or None"""
+    global result_cache, _result_cache_configured
+    if not _result_cache_configured:
+        result_cache = linestore.cache_from_environment()
+        _result_cache_configured = True
+    return None if result_cache is None else result_cache.session(tool_name, parameters)
+
+def report_result_cache(session):
+    """Closes a result cache session and prints its hit and miss statistics. Does nothing for a None session.
+    @param: session - linestore.CacheSession or None
+    @returns - statistics dictionary or None"""
+    if session is None:
+        return None
+    stats = session.close()
+    hit_rate = "" if stats["hit_rate"] is None else " ({0:.1%} hit rate)".format(stats["hit_rate"])
+    arc_print("Result cache: {0} hits, {1} misses{2}, {3} entries evicted, {4} entries using {5:.1f} MB.".format(
+        stats["hits"], stats["misses"], hit_rate, stats["evicted"], stats["entries"], stats["bytes"] / 2.0 ** 20))
+    return stats
+
+def apply_geometry_stages(wkb_geometries, stages):
+    """Packs a batch of line WKB, runs the packed array stages over it and returns the new WKB of each line.
+    @param: wkb_geometries - list of line WKB, None for null shapes
+    @param: stages - list of functions taking and returning linearray.PackedLines
+    @returns - list of WKB"""
+    with profiler.stage("geometry stages", len(wkb_geometries)):
+        packed = la.packed_lines_from_wkb(wkb_geometries)
+        for stage in stages:
+            packed = stage(packed)
+        return la.packed_lines_to_wkb(packed)
+
 def get_angle_difference(angle, difference=90):
     """Given an azimuth angle (0-360), it will return the two azimuth angles (0-360) as a tuple that are perpendicular to it."""
     angle_lower, angle_higher = (angle + difference) % 360, (angle - difference) % 360
@@ -419,67 +1338,230 @@ def translate_point(point, angle, radius, is_degree=True):
         angle = math.radians(angle)
     new_x = math.cos(angle) * radius + point.X
     new_y = math.sin(angle) * radius + point.Y
-    new_point = arcpy.Point(new_x, new_y)
+    new_point = geometry_backend.make_point(new_x, new_y)
     return new_point
 
+@profiled
 def sample_line_from_center(polyline, length_to_sample):
     """Takes a polyline and samples it a target length using the segmentAlongLine method."""
-    line_length = float(polyline.length)
-    half_way_point = float(polyline.length) / 2
+    line_length = geometry_backend.length(polyline)
+    half_way_point = line_length / 2
     start_point = half_way_point - length_to_sample / 2
     end_point = half_way_point + length_to_sample / 2
     if line_length <= length_to_sample / 2:
         start_point = 0
         end_point = line_length
-    segment_returned = polyline.segmentAlongLine(start_point, end_point)
+    segment_returned = geometry_backend.segment_along_line(polyline, start_point, end_point)
     return segment_returned
 
+@profiled
 def generate_whisker_from_polyline(linegeometry, whisker_width):
     """This function will take an ArcPolyline and a target whisker width,and it will create a new line from the
     lines centroid (or label point) that is perpendicular to the bearing of the current polyline. """
     segment_returned = None
-    center = linegeometry.centroid
-    sr = linegeometry.spatialReference
+    center = geometry_backend.centroid(linegeometry)
+    sr = geometry_backend.spatial_reference(linegeometry)
     line_heading = arc_calculate_segment_bearing(linegeometry)
     line_heading = convert_to_azimuth(line_heading)
     perpendicular_angle_start, perpendicular_angle_end = get_angle_difference(line_heading)
     point_start = translate_point(center, perpendicular_angle_start, whisker_width)
     point_end = translate_point(center, perpendicular_angle_end, whisker_width)
-    inputs_line = arcpy.Array([point_start, point_end])
-    segment_returned = arcpy.Polyline(inputs_line, sr)
+    segment_returned = geometry_backend.construct_polyline([[point_start, point_end]], sr)
     # This function fails if the line is shorter than the pull value, in this case no geometry is returned.
     return segment_returned
 
-def split_segment_by_length(linegeometry,split_value,overlap_percentage = 0, best_fit_bool=True):
-    """This function will take an ArcPolyline, a split value of a target length for a split segment, and
-    boolean that determines if the lines split are the best of fit based on the length. 
+
+def sample_lines_from_center(packed, length_to_sample, index=None):
+    """Batch form of sample_line_from_center: samples every packed line a target length around its middle in one
+    segments_along_lines query.
+    :param - packed - linearray.PackedLines
+    :param - length_to_sample - target length, a scalar or one value per feature
+    :param - index - optional linearray.LengthIndex of the packed lines, a planar index is built if None
+    :returns - linearray.PackedLines with one sample per feature"""
+    index = index or la.LengthIndex(packed)
+    lengths = index.lengths
+    half_sample = np.broadcast_to(np.asarray(length_to_sample, dtype=np.float64), lengths.shape) / 2
+    whole = lengths <= half_sample
+    starts = np.where(whole, 0.0, lengths / 2 - half_sample)
+    ends = np.where(whole, lengths, lengths / 2 + half_sample)
+    return segments_along_lines(packed, np.arange(packed.feature_count), starts, ends, index=index)
+
+
+def whiskers_from_packed_lines(packed, whisker_width, index=None, label_points=False, sample_length=0):
+    """Batch form of generate_whisker_from_polyline: builds the whisker of every packed line, a two point line through
+    the line centroid perpendicular to the bearing from its first to its last point, with planar math in one pass.
+    Whiskers of lines with Z or M values take the values at the middle of the line.
+    :param - packed - linearray.PackedLines
+    :param - whisker_width - distance from the centroid to each whisker end, a scalar or one value per feature
+    :param - index - optional linearray.LengthIndex of the packed lines, a planar index is built if needed
+    :param - label_points - if true, lines whose centroid is not on the line are centered on the point halfway along
+    the line, like the label point arcpy returns as the centroid of such a polyline. The numpy backend centroid is
+    the true centroid, as without this option.
+    :param - sample_length - if set, the whiskers are those of the samples of this length from the center of each
+    line (see sample_lines_from_center). A sample has the same middle as its line, so the Z and M values and label
+    points are found with the index of the lines and the samples need no index of their own. The samples are cut
+    from the 2D lines, as the Z and M values are taken from the lines.
+    :returns - linearray.PackedLines with one whisker per feature and the oids of the lines"""
+    lines = packed
+    if sample_length:
+        index = index or la.LengthIndex(packed)
+        planar = la.PackedLines(packed.coords, packed.part_offsets, packed.feature_offsets, packed.oids)
+        lines = sample_lines_from_center(planar, sample_length, index)
+    vertex_offsets = lines.vertex_offsets
+    first = np.take(lines.coords, vertex_offsets[:-1], axis=0)
+    last = np.take(lines.coords, vertex_offsets[1:] - 1, axis=0)
+    # Same angle conventions as arc_calculate_segment_bearing, convert_to_azimuth and get_angle_difference.
+    heading = np.degrees(np.arctan2(last[:, 0] - first[:, 0], last[:, 1] - first[:, 1]))
+    heading = np.where((heading <= 180) & (heading > 90), 360.0 - (heading - 90), np.abs(heading - 90))
+    center = la.line_centroids(lines)
+    if label_points:
+        index = index or la.LengthIndex(packed)
+        with np.errstate(invalid="ignore"):
+            off_line = np.flatnonzero(la.feature_point_distances(lines, center) > la.CUT_TOLERANCE * index.lengths)
+        if len(off_line):
+            center[off_line] = points_along_lines(packed, off_line, 0.5, True, index)[0]
+    width = np.broadcast_to(np.asarray(whisker_width, dtype=np.float64), heading.shape)
+    ends = []
+    for angle in ((heading + 90) % 360, (heading - 90) % 360):
+        radians = np.radians(angle)
+        ends.append(center + width[:, np.newaxis] * np.column_stack([np.cos(radians), np.sin(radians)]))
+    coords = np.stack(ends, axis=1).reshape(-1, 2)
+    offsets = np.arange(0, 2 * packed.feature_count + 1, 2)
+    zm = None
+    if packed.z is not None or packed.m is not None:
+        _, z_values, m_values = points_along_lines(packed, np.arange(packed.feature_count), 0.5, True, index)
+        zm = np.repeat(np.column_stack([values for values in (z_values, m_values) if values is not None]), 2, axis=0)
+    return la.PackedLines.from_zm_columns(coords, offsets, np.arange(packed.feature_count + 1), packed.oids, zm,
+                                          packed.z is not None, packed.m is not None)
+
+def split_measures_by_length(line_length, split_value, overlap_percentage=0, best_fit_bool=True):
+    """Returns the (from, to) distances along a line of the segments split_segment_by_length creates. The distances
+    are the linear referencing measures of the segments and are computed from the line length alone.
     Parameters
     ----------------
-    linegeometry - arc polyline
-    split_value - the length in the current projection
-    overlap_percentage - the degree of overlap as a percentage of the line length
+    line_length - length of the line in the current projection
+    split_value - the target segment length in the current projection
+    overlap_percentage - the degree of overlap as a percentage of the segment length
     best_fit_bool -  determines if the length is rounded to be segments of equal length.
     Returns
     ----------------
-    segment_list - list of split geometries."""
-    segment_list = []
-    line_length = float(linegeometry.length)
+    list of (from measure, to measure) tuples."""
     if not best_fit_bool:
         segment_total = int(math.ceil(line_length / float(split_value)))
-        percent_split = False
+        segment_length = float(split_value)
     else:
-        segmentation_value = int(max([1, round(line_length / float(split_value))]))
-        segment_total = segmentation_value
-        percent_split = True
+        segment_total = int(max([1, round(line_length / float(split_value))]))
+        segment_length = line_length / float(segment_total)
+    return _split_measures(line_length, segment_total, segment_length, overlap_percentage)
+
+
+def split_measures_by_count(line_length, split_count, overlap_percentage=0.0):
+    """Returns the (from, to) distances along a line of the segments split_segment_by_count creates.
+    Parameters
+    ----------------
+    line_length - length of the line in the current projection
+    split_count - the count of the number of segments
+    overlap_percentage - the degree of overlap as a percentage of the segment length
+    Returns
+    ----------------
+    list of (from measure, to measure) tuples."""
+    segment_total = int(round(max([1, split_count])))
+    return _split_measures(line_length, segment_total, line_length / float(segment_total), overlap_percentage)
+
+
+def _split_measures(line_length, segment_total, segment_length, overlap_percentage):
+    measures = []
     for line_seg_index in range(0, segment_total):
         line_seg_index_start = line_seg_index if overlap_percentage == 0  else max([0,float(line_seg_index)-float(overlap_percentage)])
-        start_position = (line_seg_index_start * float(split_value)) if not percent_split else (line_seg_index_start / float(segmentation_value))
         line_seg_index_end = line_seg_index if overlap_percentage == 0  else min([segment_total,float(line_seg_index)+float(overlap_percentage)])
-        end_position = ((line_seg_index_end+ 1) * float(split_value)) if not percent_split else ((line_seg_index_end +1) / float(segmentation_value))
-        seg = linegeometry.segmentAlongLine(start_position, end_position, percent_split)
-        segment_list.append(seg)
+        measures.append((min(line_seg_index_start * segment_length, line_length),
+                         min((line_seg_index_end + 1) * segment_length, line_length)))
+    return measures
+
+
+def split_measures_by_curvature(linegeometry, turn_angle, min_length=0.0, max_length=None, curvature=None):
+    """Returns the (from, to) distances along a line of pieces split where the line bends, see
+    linearray.curvature_split_measures. Batches of lines are faster to split with that function directly.
+    Parameters
+    ----------------
+    linegeometry - arc polyline
+    turn_angle - cumulative turning angle in degrees between split points
+    min_length - minimum length of a piece
+    max_length - optional maximum length of a piece
+    curvature - optional curvature in degrees per unit of length that always splits at a vertex
+    Returns
+    ----------------
+    list of (from measure, to measure) tuples."""
+    packed = la.packed_lines_from_wkb(geometry_backend.to_wkb([linegeometry]))
+    _, from_measures, to_measures = la.curvature_split_measures(packed, turn_angle, min_length, max_length,
+                                                                curvature)
+    return list(zip(from_measures.tolist(), to_measures.tolist()))
+
+
+def split_measures_at_cuts(line_length, cut_measures, measure_piece=None, min_spacing=0.0):
+    """Returns the (from, to) distances along a line that is cut at the cut measures, with each piece between cuts
+    split again by measure_piece.
+    Parameters
+    ----------------
+    line_length - length of the line in the current projection
+    cut_measures - list of distances along the line to cut at
+    measure_piece - optional function returning the (from, to) measures within a piece of a given length, such as
+    split_measures_by_length, pieces are not split again if it is None
+    min_spacing - cuts within this distance of a line end or of the previous cut are dropped
+    Returns
+    ----------------
+    list of (from measure, to measure) tuples."""
+    boundaries = [0.0]
+    for cut in sorted(cut_measures):
+        if cut - boundaries[-1] > min_spacing and line_length - cut > min_spacing:
+            boundaries.append(cut)
+    boundaries.append(line_length)
+    measures = []
+    for start, end in zip(boundaries[:-1], boundaries[1:]):
+        if measure_piece is None:
+            measures.append((start, end))
+        else:
+            measures.extend((start + from_measure, start + to_measure)
+                            for from_measure, to_measure in measure_piece(end - start))
+    return measures
+
+
+def split_segments_at_measures(linegeometry, measures, populate_m=False):
+    """Returns the segments of a line between each (from, to) pair of distances along it.
+    Parameters
+    ----------------
+    linegeometry - arc polyline
+    measures - list of (from measure, to measure) tuples, see split_measures_by_length
+    populate_m - if true the M values of the segments are set to their measure along the input line
+    Returns
+    ----------------
+    segment_list - list of split geometries."""
+    segment_list = [geometry_backend.segment_along_line(linegeometry, from_measure, to_measure, False)
+                    for from_measure, to_measure in measures]
+    if populate_m:
+        segment_list = [geometry_backend.add_measures(segment, from_measure) if segment is not None else None
+                        for segment, (from_measure, _) in zip(segment_list, measures)]
     return segment_list
 
+
+@profiled
+def split_segment_by_length(linegeometry,split_value,overlap_percentage = 0, best_fit_bool=True):
+    """This function will take an ArcPolyline, a split value of a target length for a split segment, and
+    boolean that determines if the lines split are the best of fit based on the length. 
+    Parameters
+    ----------------
+    linegeometry - arc polyline
+    split_value - the length in the current projection
+    overlap_percentage - the degree of overlap as a percentage of the line length
+    best_fit_bool -  determines if the length is rounded to be segments of equal length.
+    Returns
+    ----------------
+    segment_list - list of split geometries."""
+    measures = split_measures_by_length(geometry_backend.length(linegeometry), split_value, overlap_percentage,
+                                        best_fit_bool)
+    return split_segments_at_measures(linegeometry, measures)
+
+@profiled
 def split_segment_by_count(linegeometry,split_count,overlap_percentage=0.0):
     """This function will take an ArcPolyline, a split count for the number of lines to return. The function returns a list of
     line geometries whose length and number are determined by the split value, split method, and best fit settings.
@@ -490,15 +1572,60 @@ def split_segment_by_count(linegeometry,split_count,overlap_percentage=0.0):
     Returns
     ----------------
     segment_list - list of split geometries."""
-    segment_list = []
-    segmentation_value = int(round(max([1, split_count])))
-    for line_seg_index in range(0, segmentation_value):
-        line_seg_index_start = line_seg_index if overlap_percentage == 0  else max([0,float(line_seg_index)-float(overlap_percentage)])
-        line_seg_index_end = line_seg_index if overlap_percentage == 0  else min([segmentation_value,float(line_seg_index)+float(overlap_percentage)])
-        seg = linegeometry.segmentAlongLine((line_seg_index_start / float(segmentation_value)),
-                                                ((line_seg_index_end+ 1) / float(segmentation_value)), True)
-        segment_list.append(seg)
-    return segment_list
+    measures = split_measures_by_count(geometry_backend.length(linegeometry), split_count, overlap_percentage)
+    return split_segments_at_measures(linegeometry, measures)
+
+
+def read_line_events(event_table, route_field, measure_field=None, value_fields=None):
+    """Reads an event table of (route OID, measure) records, or of point events on routes when there is no measure
+    field, into columns. Events are sorted by route so the events of a route are a contiguous slice.
+    Parameters
+    ----------------
+    event_table - table, feature class or file dataset with the events
+    route_field - field holding the OID of the route (line) of each event
+    measure_field - optional field holding the distance of each event along its route, if empty the event shapes
+    are located on the routes later, see locate_points_on_line
+    value_fields - optional list of numeric fields to aggregate
+    Returns
+    ----------------
+    dictionary with ROUTE and MEASURE float arrays (NaN for nulls, MEASURE is None for point events), a POINTS list
+    of event shapes for point events and a VALUES dictionary of value arrays"""
+    value_fields = list(value_fields or [])
+    location_field = measure_field if measure_field else "SHAPE@"
+    columns = list(zip(*line_search_cursor(event_table, [route_field, location_field] + value_fields,
+                                              stages=[])))
+    if not columns:
+        columns = [()] * (2 + len(value_fields))
+
+    def to_array(values):
+        return np.array([np.nan if value is None else value for value in values], dtype=np.float64)
+
+    routes = to_array(columns[0])
+    order = np.argsort(routes, kind="stable")
+    events = {"ROUTE": routes[order], "MEASURE": None, "POINTS": None, "VALUES": {}}
+    if measure_field:
+        events["MEASURE"] = to_array(columns[1])[order]
+    else:
+        events["POINTS"] = [columns[1][index] for index in order]
+    for field, values in zip(value_fields, columns[2:]):
+        events["VALUES"][field] = to_array(values)[order]
+    return events
+
+
+def locate_points_on_line(linegeometry, points):
+    """Returns an array of the distances along a line of each point, null points get NaN.
+    Parameters
+    ----------------
+    linegeometry - arc polyline
+    points - list of point geometries snapped to (or near) the line
+    Returns
+    ----------------
+    float array of measures."""
+    measures = np.full(len(points), np.nan)
+    located = [index for index, point in enumerate(points) if point is not None]
+    if located:
+        measures[located] = geometry_backend.locate_points(linegeometry, [points[index] for index in located])
+    return measures
 # End do_analysis function
 
 # This test allows the script to be used from the operating
@@ -0,0 +1,215 @@
+# --------------------------------
+# Name: lineprofile.py
+# Purpose: This file holds the optional instrumentation used by the linelibrary decorators and the Feature Line
+# tools. When profiling is enabled it collects per function call counts and latencies and per stage row
+# throughput, and writes a JSON profile at the end of each tool run. Enable it with the LINELIBRARY_PROFILE
+# environment variable: 1 prints the profile with the tool messages, any other value is a file path the profiles are
+# appended to as JSON lines.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# Python Version:   3.6+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+
+# Import Modules
+import array
+import functools
+import json
+import os
+import time
+
+PROFILE_ENVIRONMENT_VARIABLE = "LINELIBRARY_PROFILE"
+PERCENTILES = (50, 90, 99)
+perf_counter = time.perf_counter
+
+
+# Class Definitions
+class FunctionStats(object):
+    """Call count, failures and latency samples of one instrumented function. Samples are kept in a compact double
+    array so percentiles are exact."""
+
+    __slots__ = ("calls", "failures", "seconds", "samples")
+
+    def __init__(self):
+        self.calls = 0
+        self.failures = 0
+        self.seconds = 0.0
+        self.samples = array.array("d")
+
+    def summary(self):
+        samples = sorted(self.samples)
+        result = {
+            "calls": self.calls,
+            "failures": self.failures,
+            "total_seconds": self.seconds,
+            "mean_ms": 1000.0 * self.seconds / self.calls if self.calls else None,
+            "max_ms": 1000.0 * samples[-1] if samples else None,
+        }
+        for q in PERCENTILES:
+            result["p{0}_ms".format(q)] = 1000.0 * percentile(samples, q) if samples else None
+        return result
+
+
+class Stage(object):
+    """A timed tool stage, used as a context manager or stopped explicitly with the number of rows it handled.
+    Stages with the same name are accumulated, so a stage can be entered once per batch."""
+
+    __slots__ = ("profiler", "name", "start", "rows")
+
+    def __init__(self, profiler, name, rows=0):
+        self.profiler = profiler
+        self.name = name
+        self.rows = rows
+        self.start = perf_counter() if profiler.enabled else None
+
+    def stop(self, rows=None):
+        if rows is not None:
+            self.rows = rows
+        if self.start is not None:
+            self.profiler.record_stage(self.name, perf_counter() - self.start, self.rows)
+            self.start = None
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.stop()
+        return False
+
+
+class Profiler(object):
+    """Collects function and stage statistics while enabled. When disabled, instrumented code only pays for a check of
+    the enabled attribute."""
+
+    def __init__(self, enabled=False, output=None):
+        self.enabled = enabled
+        self.output = output
+        self.reset()
+
+    def reset(self):
+        """Clears the collected statistics and restarts the wall clock of the profile."""
+        self.functions = {}
+        self.stages = {}
+        self.started = perf_counter()
+
+    def enable(self, output=None):
+        self.enabled = True
+        self.output = output
+        self.reset()
+
+    def disable(self):
+        self.enabled = False
+
+    def record_call(self, name, seconds, failed=False):
+        stats = self.functions.get(name)
+        if stats is None:
+            stats = self.functions[name] = FunctionStats()
+        stats.calls += 1
+        stats.failures += failed
+        stats.seconds += seconds
+        stats.samples.append(seconds)
+
+    def record_stage(self, name, seconds, rows=0):
+        stats = self.stages.setdefault(name, {"calls": 0, "seconds": 0.0, "rows": 0})
+        stats["calls"] += 1
+        stats["seconds"] += seconds
+        stats["rows"] += rows
+
+    def stage(self, name, rows=0):
+        """Starts a stage, see Stage."""
+        return Stage(self, name, rows)
+
+    def report(self, tool_name=None):
+        """Returns the collected statistics as a JSON serializable dictionary."""
+        stages = {}
+        for name, stats in self.stages.items():
+            stages[name] = dict(stats)
+            stages[name]["rows_per_sec"] = stats["rows"] / stats["seconds"] if stats["seconds"] > 0 else None
+        return {
+            "tool": tool_name,
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "pid": os.getpid(),
+            "wall_seconds": perf_counter() - self.started,
+            "functions": {name: stats.summary() for name, stats in sorted(self.functions.items())},
+            "stages": stages,
+        }
+
+    def write(self, tool_name=None, print_function=print):
+        """Writes the profile of the finished tool run and resets the statistics for the next run. Profiles are
+        appended as JSON lines to the output file, or printed when there is no output file.
+        :param - tool_name - name recorded in the profile
+        :param - print_function - function used to print the profile when there is no output file
+        :return - the profile dictionary, or None when profiling is disabled"""
+        if not self.enabled:
+            return None
+        profile = self.report(tool_name)
+        if self.output:
+            with open(self.output, "a") as output_file:
+                output_file.write(json.dumps(profile) + "\n")
+        else:
+            print_function(json.dumps(profile, indent=2))
+        self.reset()
+        return profile
+
+
+# Function Definitions
+def percentile(sorted_samples, q):
+    """Returns the q-th percentile of sorted samples with linear interpolation between the closest ranks."""
+    position = (len(sorted_samples) - 1) * q / 100.0
+    lower = int(position)
+    upper = min(lower + 1, len(sorted_samples) - 1)
+    return sorted_samples[lower] + (sorted_samples[upper] - sorted_samples[lower]) * (position - lower)
+
+
+def profiler_from_environment():
+    """Returns a profiler configured from the LINELIBRARY_PROFILE environment variable."""
+    setting = os.environ.get(PROFILE_ENVIRONMENT_VARIABLE, "").strip()
+    if setting.lower() in ("", "0", "false", "no", "off"):
+        return Profiler(False)
+    if setting.lower() in ("1", "true", "yes", "on"):
+        return Profiler(True)
+    return Profiler(True, setting)
+
+
+profiler = profiler_from_environment()
+
+
+def profiled(function=None, name=None):
+    """Decorator recording call counts and latencies of a hot helper. The wrapper is only added when profiling is
+    enabled at import time, otherwise the function is returned unchanged and has no overhead."""
+
+    def profiled_decorator(function):
+        if not profiler.enabled:
+            return function
+        label = name or function.__name__
+
+        @functools.wraps(function)
+        def profiled_wrapper(*args, **kwargs):
+            start = perf_counter()
+            failed = True
+            try:
+                result = function(*args, **kwargs)
+                failed = False
+                return result
+            finally:
+                profiler.record_call(label, perf_counter() - start, failed)
+
+        return profiled_wrapper
+
+    if function is None:
+        return profiled_decorator
+    return profiled_decorator(function)
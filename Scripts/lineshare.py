@@ -0,0 +1,268 @@
+# --------------------------------
+# Name: lineshare.py
+# Purpose: Shared memory handoff of packed lines to worker processes. The coordinate and offset arrays of
+# linearray.PackedLines are placed in one multiprocessing.shared_memory block that workers attach to by name, so a
+# parallel run pickles a block name and feature ranges instead of geometries. Workers read their feature ranges
+# without copying them and write their results into shared output buffers that are preallocated from a first pass
+# estimate of the output size.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# ArcGIS Version:   ArcGIS Pro
+# Python Version:   3.8+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+#
+# Worker functions are pickled by reference, so they must be defined at module level, and scripts that start a pool
+# on Windows (where workers are spawned) must guard their entry point with if __name__ == "__main__".
+
+# Import Modules
+import math
+import multiprocessing
+import os
+from multiprocessing import shared_memory
+import numpy as np
+import linearray as la
+
+# Byte alignment of each array in a shared block.
+ALIGNMENT = 64
+PACKED_ARRAYS = ["coords", "part_offsets", "feature_offsets", "oids", "z", "m"]
+# Feature ranges per worker, more ranges balance uneven lines at the cost of more tasks.
+RANGES_PER_WORKER = 4
+
+# Blocks attached by a worker process when it starts, see _attach_worker.
+_attached = {}
+
+
+# Class Definitions
+class SharedArrays(object):
+    """Named NumPy arrays placed in one shared memory block. The process that creates the block owns it and unlinks
+    it on close. Other processes attach with the handle, the block name and the array layout, and get views of the
+    same memory. Views must be dropped before the block is closed.
+    :param - layout - dictionary of name: (byte offset, dtype string, shape)
+    :param - name - name of the block to attach to, a new block is created if None"""
+
+    def __init__(self, layout, name=None):
+        self.layout = {key: (int(offset), str(dtype), tuple(shape)) for key, (offset, dtype, shape) in layout.items()}
+        self.owner = name is None
+        size = max([offset + int(np.prod(shape)) * np.dtype(dtype).itemsize
+                    for offset, dtype, shape in self.layout.values()] + [1])
+        if self.owner:
+            self.block = shared_memory.SharedMemory(create=True, size=size)
+        else:
+            self.block = shared_memory.SharedMemory(name=name)
+        self.arrays = {key: np.ndarray(shape, dtype, buffer=self.block.buf, offset=offset)
+                       for key, (offset, dtype, shape) in self.layout.items()}
+
+    @classmethod
+    def allocate(cls, specs):
+        """Creates a block for arrays of the given shapes and dtypes, filled with zeros.
+        :param - specs - dictionary of name: (shape, dtype)
+        :return - SharedArrays"""
+        layout, offset = {}, 0
+        for key, (shape, dtype) in specs.items():
+            shape = tuple(np.atleast_1d(shape).astype(int).tolist())
+            layout[key] = (offset, np.dtype(dtype).str, shape)
+            offset += int(math.ceil(int(np.prod(shape)) * np.dtype(dtype).itemsize / float(ALIGNMENT))) * ALIGNMENT
+        shared = cls(layout)
+        for array in shared.arrays.values():
+            array.fill(0)
+        return shared
+
+    @classmethod
+    def from_arrays(cls, arrays):
+        """Creates a block holding copies of the arrays in a dictionary, None values are left out."""
+        arrays = {key: np.asarray(value) for key, value in arrays.items() if value is not None}
+        for key, value in arrays.items():
+            if value.dtype.hasobject:
+                raise ValueError("The {0} array holds Python objects and can not be shared.".format(key))
+        shared = cls.allocate({key: (value.shape, value.dtype) for key, value in arrays.items()})
+        for key, value in arrays.items():
+            shared.arrays[key][...] = value
+        return shared
+
+    @classmethod
+    def attach(cls, handle):
+        """Attaches to the block of a handle from another process."""
+        return cls(handle["layout"], handle["name"])
+
+    @property
+    def handle(self):
+        """Block name and layout, all another process needs to attach."""
+        return {"name": self.block.name, "layout": self.layout}
+
+    @property
+    def nbytes(self):
+        return self.block.size
+
+    def close(self):
+        """Drops the views and closes the block, the owner also unlinks it."""
+        self.arrays = {}
+        self.block.close()
+        if self.owner:
+            self.block.unlink()
+
+    def __enter__(self):
+        return self
+
+    def __exit__(self, exc_type, exc_value, traceback):
+        self.close()
+        return False
+
+
+# Function Definitions
+def share_packed_lines(packed, extra_arrays=None):
+    """Copies packed lines and optional per feature arrays into a shared block.
+    :param - packed - linearray.PackedLines
+    :param - extra_arrays - optional dictionary of more arrays to share, such as per feature split values
+    :return - SharedArrays, see packed_lines_view"""
+    arrays = {key: getattr(packed, key) for key in PACKED_ARRAYS}
+    arrays.update(extra_arrays or {})
+    return SharedArrays.from_arrays(arrays)
+
+
+def packed_lines_view(arrays):
+    """Returns PackedLines over the shared arrays of share_packed_lines without copying them."""
+    return la.PackedLines(arrays["coords"], arrays["part_offsets"], arrays["feature_offsets"], arrays["oids"],
+                          arrays.get("z"), arrays.get("m"))
+
+
+def balanced_feature_ranges(packed, range_count):
+    """Splits the features into contiguous ranges with about the same number of vertices each.
+    :param - packed - linearray.PackedLines
+    :param - range_count - number of ranges wanted
+    :return - list of (start, end) feature index ranges, none of them empty"""
+    vertex_offsets = packed.vertex_offsets
+    targets = np.linspace(0, vertex_offsets[-1], max(int(range_count), 1) + 1)
+    bounds = np.unique(np.concatenate([[0], np.searchsorted(vertex_offsets, targets[1:-1]), [packed.feature_count]]))
+    return [(int(start), int(end)) for start, end in zip(bounds[:-1], bounds[1:]) if end > start]
+
+
+def _attach_worker(handles):
+    """Pool initializer, attaches the shared blocks once per worker process."""
+    for key, handle in handles.items():
+        _attached[key] = SharedArrays.attach(handle)
+
+
+def _run_range(function, start, end, args):
+    return function(_attached["inputs"].arrays, _attached["outputs"].arrays, start, end, *args)
+
+
+def map_feature_ranges(function, inputs, outputs, ranges, args=(), workers=None):
+    """Runs function(input arrays, output arrays, start, end, *args) for every feature range in a pool of worker
+    processes. Workers attach to the input and output blocks by name when they start, so only the function reference,
+    the ranges, the arguments and the return values are pickled.
+    :param - function - module level function writing the results of features start:end into the output arrays
+    :param - inputs - SharedArrays read by the workers
+    :param - outputs - SharedArrays written by the workers, each range must write its own region
+    :param - ranges - list of (start, end) feature ranges
+    :param - args - extra picklable arguments of the function
+    :param - workers - number of processes, defaults to the CPU count
+    :return - list of the function return values in range order"""
+    workers = max(1, min(int(workers or os.cpu_count() or 1), len(ranges) or 1))
+    handles = {"inputs": inputs.handle, "outputs": outputs.handle}
+    with multiprocessing.Pool(workers, _attach_worker, (handles,)) as pool:
+        return pool.starmap(_run_range, [(function, start, end, tuple(args)) for start, end in ranges])
+
+
+def split_output_bounds(packed, counts, overlap=0.0):
+    """Upper bounds of the split output of every feature from its segment count. A segment covers the vertices of
+    its line once (up to 1 + 2 * ceil(overlap) times with overlap), crosses at most the part gaps of its line, and
+    adds a start and end point to each of its parts.
+    :param - packed - linearray.PackedLines
+    :param - counts - (n_features) segment counts from linearray.split_segment_counts
+    :param - overlap - overlap as a share of the segment length
+    :return - tuple of the (n_features) piece (output part) and vertex bounds"""
+    coverage = 1 + 2 * int(math.ceil(float(overlap)))
+    part_counts = np.diff(packed.feature_offsets)
+    pieces = counts + coverage * np.maximum(part_counts - 1, 0)
+    return pieces, coverage * np.diff(packed.vertex_offsets) + 2 * pieces
+
+
+def _split_range(inputs, outputs, start, end, overlap):
+    """Worker function of split_lines_shared, splits features start:end into their output regions."""
+    packed = la.feature_range(packed_lines_view(inputs), start, end)
+    segment_offsets = inputs["segment_offsets"]
+    offsets, from_measures, to_measures = la.split_interval_measures(
+        inputs["lengths"][start:end], np.diff(segment_offsets[start:end + 1]), inputs["segment_lengths"][start:end],
+        overlap)
+    features = np.repeat(np.arange(end - start), np.diff(offsets))
+    pieces = la.extract_intervals(packed, features, from_measures, to_measures)
+    first_segment, last_segment = segment_offsets[start], segment_offsets[end]
+    piece_start, vertex_start = inputs["piece_bounds"][start], inputs["vertex_bounds"][start]
+    if (piece_start + pieces.part_count > inputs["piece_bounds"][end] or
+            vertex_start + pieces.vertex_count > inputs["vertex_bounds"][end]):
+        raise ValueError("The split output of features {0} to {1} is larger than its buffer.".format(start, end))
+    outputs["from_measures"][first_segment:last_segment] = from_measures
+    outputs["to_measures"][first_segment:last_segment] = to_measures
+    outputs["segment_pieces"][first_segment:last_segment] = np.diff(pieces.feature_offsets)
+    outputs["piece_vertices"][piece_start:piece_start + pieces.part_count] = np.diff(pieces.part_offsets)
+    for key in ("coords", "z", "m"):
+        if key in outputs:
+            outputs[key][vertex_start:vertex_start + pieces.vertex_count] = getattr(pieces, key)
+    return pieces.part_count, pieces.vertex_count
+
+
+def split_lines_shared(packed, split_value, split_method="LENGTH", overlap=0.0, best_fit=True, workers=None):
+    """Splits packed lines like linearray.split_lines in a pool of worker processes. The parent computes the line
+    lengths and segment counts in a first pass and allocates the shared output buffers from them (exact for the
+    segment measures, upper bounds for the segment vertices, see split_output_bounds). Each worker attaches to the
+    shared lines, splits balanced feature ranges and writes its segments into the reserved regions, and the parent
+    gathers the used part of each region.
+    :param - packed - linearray.PackedLines
+    :param - split_value - target segment length or count, a scalar or (n_features) array
+    :param - split_method - LENGTH or COUNT
+    :param - overlap - overlap as a share of the segment length
+    :param - best_fit - with LENGTH, if true the segments of a line have equal lengths
+    :param - workers - number of processes, defaults to the CPU count
+    :return - tuple of the segment PackedLines (oids are the parent oids), the (n_features + 1) segment offsets per
+    feature and the (n_segments) from and to measures"""
+    workers = int(workers or os.cpu_count() or 1)
+    _, lengths = la.vertex_measures(packed)
+    counts, segment_lengths = la.split_segment_counts(lengths, split_value, split_method, best_fit)
+    piece_bounds, vertex_bounds = split_output_bounds(packed, counts, overlap)
+
+    def offsets(values):
+        return np.concatenate([[0], np.cumsum(values, dtype=np.int64)])
+
+    segment_offsets, piece_offsets, vertex_offsets = offsets(counts), offsets(piece_bounds), offsets(vertex_bounds)
+    ranges = balanced_feature_ranges(packed, workers * RANGES_PER_WORKER)
+    output_specs = {"from_measures": (segment_offsets[-1], np.float64), "to_measures": (segment_offsets[-1], np.float64),
+                    "segment_pieces": (segment_offsets[-1], np.int64), "piece_vertices": (piece_offsets[-1], np.int64),
+                    "coords": ((vertex_offsets[-1], 2), np.float64)}
+    for key in ("z", "m"):
+        if getattr(packed, key) is not None:
+            output_specs[key] = (vertex_offsets[-1], np.float64)
+    with share_packed_lines(packed, {"lengths": lengths, "segment_lengths": segment_lengths,
+                                     "segment_offsets": segment_offsets, "piece_bounds": piece_offsets,
+                                     "vertex_bounds": vertex_offsets}) as inputs, \
+            SharedArrays.allocate(output_specs) as outputs:
+        used = map_feature_ranges(_split_range, inputs, outputs, ranges, (overlap,), workers)
+        result = outputs.arrays
+
+        def gather(key, bounds, position):
+            return np.concatenate([result[key][bounds[start]:bounds[start] + sizes[position]]
+                                   for (start, _), sizes in zip(ranges, used)] or [result[key][:0]])
+
+        piece_vertices = gather("piece_vertices", piece_offsets, 0)
+        columns = {key: gather(key, vertex_offsets, 1) for key in ("coords", "z", "m") if key in result}
+        from_measures, to_measures = result["from_measures"].copy(), result["to_measures"].copy()
+        segment_pieces = result["segment_pieces"].copy()
+        del result
+    features = np.repeat(np.arange(packed.feature_count), counts)
+    pieces = la.PackedLines(columns["coords"], offsets(piece_vertices), offsets(segment_pieces), packed.oids[features],
+                            columns.get("z"), columns.get("m"))
+    return pieces, segment_offsets, from_measures, to_measures
@@ -0,0 +1,226 @@
+# --------------------------------
+# Name: linestore.py
+# Purpose: This file holds the optional on disk result cache of the Feature Line tools. Tool results are stored per
+# input feature under a hash of the feature geometry bytes, its per feature values and the tool parameters, so a
+# rerun with the same parameters only recomputes the features that changed. The store is a sqlite database with
+# least recently used eviction by size. Enable it with the LINELIBRARY_CACHE environment variable set to the path of
+# the database, LINELIBRARY_CACHE_MB sets its size limit.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# Python Version:   3.6+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+
+# Import Modules
+import hashlib
+import json
+import os
+import sqlite3
+import struct
+import time
+
+CACHE_ENVIRONMENT_VARIABLE = "LINELIBRARY_CACHE"
+CACHE_SIZE_ENVIRONMENT_VARIABLE = "LINELIBRARY_CACHE_MB"
+DEFAULT_CACHE_MB = 1024
+# Buffered results and last use times of a session written per transaction.
+WRITE_BATCH_SIZE = 10000
+_COUNT = struct.Struct("<I")
+_LENGTH = struct.Struct("<i")
+
+
+# Class Definitions
+class ResultCache(object):
+    """Content addressed store of per feature tool results in a sqlite database. Each entry holds a list of WKB
+    geometries and optional JSON values. The last use time of each entry is kept, and when the database is over
+    its size limit the least recently used entries are removed.
+    Parameters
+    ----------------
+    path - path of the sqlite database, created if it does not exist
+    max_bytes - size limit of the stored results"""
+
+    def __init__(self, path, max_bytes=DEFAULT_CACHE_MB * 2 ** 20):
+        self.path = path
+        self.max_bytes = int(max_bytes)
+        self._connection = sqlite3.connect(path, timeout=30)
+        self._connection.execute(
+            "CREATE TABLE IF NOT EXISTS results (key BLOB PRIMARY KEY, value BLOB NOT NULL, size INTEGER NOT NULL, "
+            "last_used REAL NOT NULL)"
+        )
+        self._connection.execute("CREATE INDEX IF NOT EXISTS results_last_used ON results (last_used)")
+        self._connection.commit()
+
+    def session(self, tool_name, parameters):
+        """Returns a CacheSession for a tool run with the given parameters."""
+        return CacheSession(self, tool_name, parameters)
+
+    def get(self, key):
+        """Returns the stored value of a key or None."""
+        row = self._connection.execute("SELECT value FROM results WHERE key = ?", (key,)).fetchone()
+        return None if row is None else bytes(row[0])
+
+    def put_many(self, items, last_used):
+        """Stores a list of (key, value) pairs."""
+        self._connection.executemany(
+            "INSERT OR REPLACE INTO results (key, value, size, last_used) VALUES (?, ?, ?, ?)",
+            [(key, value, len(value), last_used) for key, value in items],
+        )
+
+    def touch_many(self, keys, last_used):
+        """Sets the last use time of a list of keys."""
+        self._connection.executemany(
+            "UPDATE results SET last_used = ? WHERE key = ?", [(last_used, key) for key in keys]
+        )
+
+    def size(self):
+        """Returns the number of entries and their total size in bytes."""
+        count, total = self._connection.execute("SELECT count(*), coalesce(sum(size), 0) FROM results").fetchone()
+        return count, total
+
+    def evict(self):
+        """Removes the least recently used entries until the results fit the size limit.
+        :return - number of removed entries"""
+        _, total = self.size()
+        if total <= self.max_bytes:
+            return 0
+        removed = []
+        for key, size in self._connection.execute("SELECT key, size FROM results ORDER BY last_used"):
+            if total <= self.max_bytes:
+                break
+            removed.append((key,))
+            total -= size
+        self._connection.executemany("DELETE FROM results WHERE key = ?", removed)
+        return len(removed)
+
+    def commit(self):
+        self._connection.commit()
+
+    def close(self):
+        self._connection.commit()
+        self._connection.close()
+
+
+class CacheSession(object):
+    """View of a ResultCache for one tool run. Keys combine a digest of the tool name and parameters with the
+    geometry bytes and per feature values (such as a split value read from a field) of each feature. New results and
+    last use times are buffered and written in batches, and closing the session evicts old entries and returns the
+    hit and miss counts.
+    Parameters
+    ----------------
+    cache - ResultCache
+    tool_name - name of the tool
+    parameters - JSON serializable tool parameters that change the results"""
+
+    def __init__(self, cache, tool_name, parameters):
+        self.cache = cache
+        self.prefix = hashlib.sha256(
+            json.dumps([tool_name, parameters], default=str, sort_keys=True).encode("utf-8")
+        ).digest()
+        self.hits = 0
+        self.misses = 0
+        self._pending = []
+        self._touched = []
+
+    def key(self, geometry_wkb, *feature_values):
+        """Returns the cache key of a feature from its geometry WKB and per feature values."""
+        digest = hashlib.sha256(self.prefix)
+        digest.update(json.dumps(feature_values, default=str).encode("utf-8"))
+        digest.update(bytes(geometry_wkb or b""))
+        return digest.digest()
+
+    def lookup(self, key):
+        """Returns the stored (list of WKB geometries, values) of a key, or None on a miss."""
+        value = self.cache.get(key)
+        if value is None:
+            self.misses += 1
+            return None
+        self.hits += 1
+        self._touched.append(key)
+        if len(self._touched) >= WRITE_BATCH_SIZE:
+            self.flush()
+        return decode_result(value)
+
+    def store(self, key, wkb_geometries, values=None):
+        """Buffers the result of a feature, a list of WKB geometries (None for null shapes) and optional JSON
+        serializable values."""
+        self._pending.append((key, encode_result(wkb_geometries, values)))
+        if len(self._pending) >= WRITE_BATCH_SIZE:
+            self.flush()
+
+    def flush(self):
+        """Writes the buffered results and last use times in one transaction."""
+        now = time.time()
+        self.cache.touch_many(self._touched, now)
+        self.cache.put_many(self._pending, now)
+        self.cache.commit()
+        self._pending, self._touched = [], []
+
+    def close(self):
+        """Writes the buffered results, evicts old entries and returns the statistics of the run."""
+        self.flush()
+        evicted = self.cache.evict()
+        self.cache.commit()
+        entries, total = self.cache.size()
+        lookups = self.hits + self.misses
+        return {
+            "hits": self.hits,
+            "misses": self.misses,
+            "hit_rate": self.hits / float(lookups) if lookups else None,
+            "evicted": evicted,
+            "entries": entries,
+            "bytes": total,
+        }
+
+
+# Function Definitions
+def encode_result(wkb_geometries, values=None):
+    """Packs a list of WKB geometries and optional JSON values into bytes: a geometry count, a length prefixed
+    blob per geometry (-1 for None) and the JSON values."""
+    chunks = [_COUNT.pack(len(wkb_geometries))]
+    for wkb in wkb_geometries:
+        if wkb is None:
+            chunks.append(_LENGTH.pack(-1))
+        else:
+            chunks.append(_LENGTH.pack(len(wkb)))
+            chunks.append(bytes(wkb))
+    chunks.append(json.dumps(values).encode("utf-8"))
+    return b"".join(chunks)
+
+
+def decode_result(value):
+    """Unpacks bytes written by encode_result into (list of WKB geometries, values)."""
+    (count,) = _COUNT.unpack_from(value, 0)
+    position = _COUNT.size
+    wkb_geometries = []
+    for _ in range(count):
+        (length,) = _LENGTH.unpack_from(value, position)
+        position += _LENGTH.size
+        if length < 0:
+            wkb_geometries.append(None)
+        else:
+            wkb_geometries.append(value[position : position + length])
+            position += length
+    return wkb_geometries, json.loads(value[position:].decode("utf-8"))
+
+
+def cache_from_environment():
+    """Returns a ResultCache at the LINELIBRARY_CACHE path with the LINELIBRARY_CACHE_MB size limit, or None if the
+    variable is not set."""
+    path = os.environ.get(CACHE_ENVIRONMENT_VARIABLE, "").strip()
+    if not path:
+        return None
+    megabytes = float(os.environ.get(CACHE_SIZE_ENVIRONMENT_VARIABLE) or DEFAULT_CACHE_MB)
+    return ResultCache(path, megabytes * 2 ** 20)
@@ -0,0 +1,182 @@
+# --------------------------------
+# Name: lineworker.py
+# Purpose: Long lived worker process for the Feature Line tools. A batch runner starts the worker once and sends it
+# tool jobs as JSON lines on stdin, each job gets one JSON line back on stdout. Python startup, the library imports
+# and the arcpy/NumPy/Shapely imports are paid once per worker instead of once per job.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# ArcGIS Version:   ArcGIS Pro
+# Python Version:   3.7+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+#
+# Protocol, one JSON object per line:
+#   request  {"id": 1, "tool": "split", "args": [...], "kwargs": {...}}
+#   response {"id": 1, "ok": true, "seconds": 0.12, "messages": [...], "error": null, "failed_features": 0,
+#             "feature_failures": [...]}
+# The commands {"command": "ping"} and {"command": "shutdown"} are also accepted. Tool messages printed with
+# arc_print are returned in "messages" so stdout only carries responses. A job is not ok when the tool raised or
+# reported an error that stopped it (see linelibrary.ToolRunStatus), features that failed in a finished run are
+# counted in "failed_features" with their ErrorLog summary in "feature_failures".
+
+# Import Modules
+import argparse
+import contextlib
+import importlib
+import io
+import json
+import os
+import sys
+import time
+import linebackend
+import linestore
+
+# Messages printed while the library is imported, such as missing dependency warnings, go to stderr so stdout only
+# carries responses.
+with contextlib.redirect_stdout(sys.stderr):
+    import linelibrary as fll
+
+# Tool name mapped to the script module and the tool function.
+TOOLS = {
+    "split": ("FeatureLineSplit", "feature_line_split"),
+    "pull": ("FeatureLinePull", "feature_line_pull"),
+    "roll": ("FeatureLineRoll", "feature_line_roll"),
+    "whisker": ("FeatureLineWhiskers", "feature_line_whisker"),
+    "corridor": ("FeatureLineCorridorAssembly", "assemble_corridors_from_network"),
+    "dynseg": ("FeatureLineDynamicSegmentation", "feature_line_dynamic_segmentation"),
+    "rolling": ("FeatureLineRollingStatistics", "feature_line_rolling_statistics"),
+}
+# Modules imported up front with --preload so the first job does not pay for them.
+PRELOAD_MODULES = ["numpy", "shapely", "pandas", "pyarrow.parquet", "arcpy", "linearray"]
+
+_tool_cache = {}
+
+
+# Function Definitions
+def load_tool(tool_name):
+    """Returns the tool function for a tool name, importing its script on the first call."""
+    if tool_name not in _tool_cache:
+        if tool_name not in TOOLS:
+            raise ValueError("Unknown tool {0}, use one of {1}.".format(tool_name, ", ".join(sorted(TOOLS))))
+        module_name, function_name = TOOLS[tool_name]
+        _tool_cache[tool_name] = getattr(importlib.import_module(module_name), function_name)
+    return _tool_cache[tool_name]
+
+
+def preload(tool_names=None):
+    """Imports the tool scripts and their heavy dependencies that are installed.
+    :param - tool_names - tools to import, defaults to all tools
+    :return - list of the modules that were imported"""
+    loaded = []
+    for module_name in PRELOAD_MODULES:
+        if linebackend.module_available(module_name.split(".")[0]):
+            importlib.import_module(module_name)
+            loaded.append(module_name)
+    for tool_name in tool_names or sorted(TOOLS):
+        load_tool(tool_name)
+        loaded.append(TOOLS[tool_name][0])
+    return loaded
+
+
+def run_job(request):
+    """Runs a single job request and returns its response dictionary. Tool output is captured, and exceptions and
+    the errors the tools catch and report themselves are returned in the response instead of ending the worker."""
+    response = {"id": request.get("id")}
+    captured = io.StringIO()
+    start = time.perf_counter()
+    fll.tool_status.reset()
+    try:
+        with contextlib.redirect_stdout(captured):
+            command = request.get("command")
+            if command == "ping":
+                response["pid"] = os.getpid()
+                response["backend"] = fll.geometry_backend.name
+            elif command is not None:
+                raise ValueError("Unknown command {0}.".format(command))
+            else:
+                tool = load_tool(request["tool"])
+                tool(*request.get("args", []), **request.get("kwargs", {}))
+    except Exception as e:
+        fll.tool_status.errors.append("{0}: {1}".format(type(e).__name__, e))
+    response["ok"] = fll.tool_status.ok
+    response["error"] = "; ".join(fll.tool_status.errors) or None
+    response["failed_features"] = fll.tool_status.failed_features
+    response["feature_failures"] = fll.tool_status.feature_failures
+    response["seconds"] = time.perf_counter() - start
+    response["messages"] = captured.getvalue().splitlines()
+    return response
+
+
+def serve(input_stream=None, output_stream=None, max_jobs=None):
+    """Reads job requests line by line until shutdown, end of input or max_jobs jobs, writing one response line
+    per request. A runner can restart the worker after max_jobs to release memory held by long sessions.
+    :param - input_stream - stream of JSON requests, defaults to stdin
+    :param - output_stream - stream responses are written to, defaults to stdout
+    :param - max_jobs - optional number of tool jobs after which the worker exits
+    :return - number of tool jobs run"""
+    input_stream = input_stream or sys.stdin
+    output_stream = output_stream or sys.stdout
+    job_count = 0
+    for line in input_stream:
+        if not line.strip():
+            continue
+        try:
+            request = json.loads(line)
+        except ValueError as e:
+            response = {"id": None, "ok": False, "error": "Invalid request: {0}".format(e)}
+        else:
+            if request.get("command") == "shutdown":
+                output_stream.write(json.dumps({"id": request.get("id"), "ok": True}) + "\n")
+                output_stream.flush()
+                break
+            response = run_job(request)
+            job_count += "tool" in request
+        output_stream.write(json.dumps(response, default=str) + "\n")
+        output_stream.flush()
+        if max_jobs and job_count >= max_jobs:
+            break
+    return job_count
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run Feature Line tool jobs read as JSON lines from stdin.")
+    parser.add_argument("--backend", default=None, help="Geometry backend, arcpy or numpy.")
+    parser.add_argument("--preload", action="store_true", help="Import the tools and dependencies at startup.")
+    parser.add_argument("--max-jobs", type=int, default=None, help="Exit after this many tool jobs.")
+    parser.add_argument("--simplify-method", default=None, help="Simplify input lines, DOUGLAS_PEUCKER or VISVALINGAM.")
+    parser.add_argument("--simplify-tolerance", type=float, default=0.0, help="Simplification distance or area.")
+    parser.add_argument("--densify-interval", type=float, default=0.0, help="Densify input lines to this spacing.")
+    parser.add_argument("--cache", default=None, help="Path of the sqlite result cache database.")
+    parser.add_argument("--cache-mb", type=float, default=None, help="Size limit of the result cache in megabytes.")
+    args = parser.parse_args(argv)
+    if args.backend:
+        fll.set_geometry_backend(args.backend)
+    if args.cache:
+        fll.set_result_cache(args.cache, args.cache_mb or linestore.DEFAULT_CACHE_MB)
+    fll.set_geometry_stages(args.simplify_method, args.simplify_tolerance, args.densify_interval)
+    if args.preload:
+        with contextlib.redirect_stdout(sys.stderr):
+            preload()
+    serve(max_jobs=args.max_jobs)
+    return 0
+
+
+# This test allows the script to be used from the operating
+# system command prompt (stand-alone), in a Python IDE,
+# or as a module imported in another script
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,504 @@
+# --------------------------------
+# Name: behavior_checks.py
+# Purpose: Headless behavior checks for the study line editor library kernels and tools. Each check builds a small
+# seeded network, runs a kernel or a tool on file datasets and compares its results to expected values or a brute
+# force reference, some with a time limit for inputs that used to blow up. Exits with a status of 1 when a check fails.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# Python Version:   3.6+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+
+# Import Modules
+import argparse
+import collections
+import contextlib
+import importlib.util
+import io
+import os
+import sys
+import tempfile
+import time
+import numpy as np
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "Scripts"))
+# Checks are headless, the per geometry helpers run on the numpy geometry backend.
+os.environ.setdefault("LINELIBRARY_BACKEND", "numpy")
+import synthetic_networks as sn
+import linearray as la
+import linelibrary as fll
+import lineio
+import FeatureLinePull
+import FeatureLineRoll
+import FeatureLineSplit
+import FeatureLineWhiskers
+
+CHECKS = {}
+# Attribute fields of the file datasets written by the tool checks.
+LINE_FIELD_TYPES = [("NAME", "str"), ("RANK", "int"), ("WEIGHT", "float")]
+
+
+# Function Definitions
+def register_check(name):
+    """Decorator registering a behavior check. A check returns a list of failure messages, empty when it passes."""
+
+    def register(function):
+        CHECKS[name] = function
+        return function
+
+    return register
+
+
+def _timed(function, *args, **kwargs):
+    """Returns the result of a call and the seconds it took."""
+    start = time.perf_counter()
+    result = function(*args, **kwargs)
+    return result, time.perf_counter() - start
+
+
+@register_check("points_near_long_segments")
+def points_near_long_segments(tolerance=1.0, time_limit=5.0):
+    """Short curvy trails mixed with very long diagonal segments, compared to a brute force search of every point
+    against every segment. Long segments used to be registered in every grid cell of their bounding box."""
+    trails = sn.curvy_trails(300, seed=0, step=2.0, extent=2e4)
+    long_lines = np.array([[0.0, 0.0], [2e4, 2e4], [2e4, 0.0], [0.0, 2e4], [-5e3, 1e4], [2.5e4, 1e4]])
+    coords = np.concatenate([trails.coords, long_lines])
+    vertex_counts = np.concatenate([np.diff(trails.vertex_offsets), [2, 2, 2]])
+    packed = sn.pack_single_parts(coords, vertex_counts)
+    rng = np.random.default_rng(1)
+    points = np.concatenate([rng.uniform(0, 2e4, (300, 2)), trails.coords[rng.integers(0, trails.vertex_count, 300)]])
+    (point_index, features, measures, distances), seconds = _timed(la.points_near_lines, packed, points, tolerance)
+    failures = []
+    if seconds > time_limit:
+        failures.append("points_near_lines took {0:.2f}s, over the {1:.2f}s limit.".format(seconds, time_limit))
+    # Brute force nearest distance of every (point, feature) pair.
+    starts = la.segment_index(packed)
+    origin, direction = packed.coords[starts], packed.coords[starts + 1] - packed.coords[starts]
+    offset = points[:, np.newaxis, :] - origin[np.newaxis, :, :]
+    squared_length = np.maximum(np.einsum("ij,ij->i", direction, direction), 1e-300)
+    t = np.clip(np.einsum("pij,ij->pi", offset, direction) / squared_length, 0.0, 1.0)
+    distance = np.hypot(*np.moveaxis(offset - t[:, :, np.newaxis] * direction, 2, 0))
+    segment_feature = packed.vertex_feature_index()[starts]
+    nearest = np.full((len(points), packed.feature_count), np.inf)
+    np.minimum.at(nearest, (np.repeat(np.arange(len(points)), len(starts)), np.tile(segment_feature, len(points))),
+                  distance.ravel())
+    expected = set(zip(*np.nonzero(nearest <= tolerance)))
+    found = set(zip(point_index.tolist(), features.tolist()))
+    if found != expected:
+        failures.append("points_near_lines found {0} pairs, the brute force search {1} ({2} differ).".format(
+            len(found), len(expected), len(found ^ expected)))
+    elif not np.allclose(distances, nearest[point_index, features]):
+        failures.append("points_near_lines distances differ from the brute force search.")
+    return failures
+
+
+
+@register_check("visvalingam_even_spacing")
+def visvalingam_even_spacing(vertex_count=32000, time_limit=2.0):
+    """A long straight line and an evenly spaced arc, whose triangles all have the same area. Ties used to remove
+    one vertex of a run per pass, 51.7 seconds for a straight line of 32,000 vertices."""
+    failures = []
+    x = np.linspace(0.0, 1e4, vertex_count)
+    angle = np.linspace(0.0, np.pi, vertex_count)
+    coords = np.concatenate([np.column_stack([x, np.zeros(vertex_count)]),
+                             np.column_stack([1e3 * np.cos(angle), 1e3 * np.sin(angle)])])
+    packed = sn.pack_single_parts(coords, [vertex_count, vertex_count])
+    keep, seconds = _timed(la.visvalingam_keep, packed, 1.0)
+    if seconds > time_limit:
+        failures.append("visvalingam_keep took {0:.2f}s, over the {1:.2f}s limit.".format(seconds, time_limit))
+    straight_kept = np.flatnonzero(keep[:vertex_count])
+    if straight_kept.tolist() != [0, vertex_count - 1]:
+        failures.append("The straight line kept {0} vertices instead of its two ends.".format(len(straight_kept)))
+    arc = la.select_vertices(packed, keep).coords[2:]
+    # Vertex triangles of an arc with chord c and radius r have an area of about c ** 3 / (8 r).
+    chord = np.hypot(*np.diff(arc, axis=0).T)
+    if not np.all(chord ** 3 / 8e3 < 4.0):
+        failures.append("The arc kept chords up to {0:.1f} long, too long for the area tolerance.".format(chord.max()))
+    return failures
+
+
+@register_check("interpolated_z_and_m")
+def interpolated_z_and_m(tolerance=1e-6):
+    """Split, pull, roll and whisker outputs of single and multipart lines whose M is the distance along the line and
+    whose Z rises linearly with it, so every output vertex must keep Z = 5 + M / 10 and its M must match the measure
+    the kernel cut, pulled, extended or sampled it at. Outputs are read back from their WKB."""
+    failures = []
+    for name in ("curvy_trails", "multipart_lines"):
+        network = sn.GENERATORS[name](200, seed=3)
+        measures, lengths = la.vertex_measures(network)
+        packed = la.PackedLines(network.coords, network.part_offsets, network.feature_offsets, network.oids,
+                                5.0 + measures / 10.0, measures)
+
+        def check(stage, lines, first_m, last_m):
+            lines = la.packed_lines_from_wkb(la.packed_lines_to_wkb(lines))
+            if lines.z is None or lines.m is None:
+                failures.append("{0} {1} lost its Z or M values.".format(name, stage))
+                return
+            vertex_offsets = lines.vertex_offsets
+            has_vertices = np.diff(vertex_offsets) > 0
+            errors = [np.abs(lines.z - (5.0 + lines.m / 10.0)).max(initial=0.0),
+                      np.abs(lines.m[vertex_offsets[:-1][has_vertices]] - first_m[has_vertices]).max(initial=0.0),
+                      np.abs(lines.m[vertex_offsets[1:][has_vertices] - 1] - last_m[has_vertices]).max(initial=0.0)]
+            if max(errors) > tolerance:
+                failures.append("{0} {1} is off by {2:.2e} in Z and {3:.2e}, {4:.2e} in its first and last M.".format(
+                    name, stage, *errors))
+
+        pieces, _, from_measures, to_measures = fll.split_packed_lines(packed, 40.0, "LENGTH")
+        check("split", pieces, from_measures, to_measures)
+        pulled = FeatureLinePull.pull_packed_lines(packed, 5.0, True, True)
+        check("pull", pulled, np.full(packed.feature_count, 5.0), lengths - 5.0)
+        # Roll extends 10 from the start sample and the line end, M changes at its rate between them and the ends.
+        rolled = FeatureLineRoll.roll_packed_lines(packed, 10.0, 0.1)
+        features = np.arange(packed.feature_count)
+        start_sample = fll.points_along_lines(packed, features, 0.1, True, at_part_end=True)[0]
+        end_sample = fll.points_along_lines(packed, features, 0.9, True)[0]
+        start_span = np.hypot(*(packed.coords[packed.vertex_offsets[:-1]] - start_sample).T)
+        end_span = np.hypot(*(packed.coords[packed.vertex_offsets[1:] - 1] - end_sample).T)
+        check("roll", rolled, 0.1 * lengths * (1.0 - 10.0 / start_span), lengths * (1.0 + 1.0 / end_span))
+        whiskers = fll.whiskers_from_packed_lines(packed, 10.0)
+        check("whiskers", whiskers, lengths / 2, lengths / 2)
+        sampled = fll.whiskers_from_packed_lines(packed, 10.0, sample_length=20.0)
+        check("sampled whiskers", sampled, lengths / 2, lengths / 2)
+    return failures
+
+
+@register_check("z_or_m_alone")
+def z_or_m_alone():
+    """Split, pull, roll and whisker outputs of lines with only Z or only M values, which are moved as a single
+    column, compared to the same column of the outputs of the lines with both. Also checks that M values replaced
+    after packing, as the split tool does when it populates M, are the ones written to WKB."""
+    failures = []
+    network = sn.with_z_and_m(sn.GENERATORS["multipart_lines"](200, seed=5))
+    kernels = {"split": lambda lines: la.split_lines(lines, 40.0, "LENGTH", 0.2, True)[0],
+               "pull": lambda lines: FeatureLinePull.pull_packed_lines(lines, 5.0, True, True),
+               "roll": lambda lines: FeatureLineRoll.roll_packed_lines(lines, 10.0, 0.1),
+               "whiskers": lambda lines: fll.whiskers_from_packed_lines(lines, 10.0, sample_length=20.0)}
+    for stage, kernel in kernels.items():
+        both = kernel(network)
+        for key in ("z", "m"):
+            values = {key: getattr(network, key)}
+            alone = kernel(la.packed_lines_from_wkb(la.packed_lines_to_wkb(la.PackedLines(
+                network.coords, network.part_offsets, network.feature_offsets, network.oids, **values))))
+            other = "m" if key == "z" else "z"
+            if getattr(alone, other) is not None or getattr(alone, key) is None:
+                failures.append("{0} of lines with only {1} returned the wrong columns.".format(stage, key.upper()))
+            elif not np.array_equal(getattr(alone, key), getattr(both, key)) or \
+                    not np.array_equal(alone.coords, both.coords):
+                failures.append("{0} of lines with only {1} differs from the lines with Z and M.".format(
+                    stage, key.upper()))
+    pieces = la.split_lines(network, 40.0, "LENGTH", 0, True)[0]
+    pieces.m = pieces.m + 1000.0
+    if not np.array_equal(la.packed_lines_from_wkb(la.packed_lines_to_wkb(pieces)).m, pieces.m):
+        failures.append("M values replaced after packing were not written to WKB.")
+    return failures
+
+
+def _without_repeated_points(packed, tolerance=1e-6):
+    """Drops the vertices that repeat the vertex before them and the parts left with fewer than two vertices. The per
+    feature helpers keep repeated cut points and zero length parts that the packed kernels leave out (see
+    linearray.CUT_TOLERANCE), they are dropped from both before comparing them."""
+    keep = np.ones(packed.vertex_count, dtype=bool)
+    keep[1:] = np.hypot(*np.diff(packed.coords, axis=0).T) > tolerance
+    keep[packed.part_offsets[:-1][np.diff(packed.part_offsets) > 0]] = True
+    lines = la.select_vertices(packed, keep)
+    part_sizes = np.diff(lines.part_offsets)
+    kept_parts = part_sizes > 1
+    kept_before = np.concatenate([[0], np.cumsum(kept_parts)])
+    return la.PackedLines(lines.coords[np.repeat(kept_parts, part_sizes)],
+                          np.concatenate([[0], np.cumsum(part_sizes[kept_parts])]), kept_before[lines.feature_offsets])
+
+
+@register_check("packed_matches_per_feature")
+def packed_matches_per_feature(tolerance=1e-6):
+    """2D split, pull, roll and whisker outputs of the packed kernels compared to the per feature helpers the tools
+    fall back to, run on geometries of the geometry backend. Whiskers are compared on the same center samples, the
+    per feature samples without their repeated points."""
+    failures = []
+    backend = fll.geometry_backend
+
+    def packed_geometries(geometries):
+        return la.packed_lines_from_wkb(backend.to_wkb(geometries))
+
+    for name in sn.GENERATORS:
+        packed = sn.GENERATORS[name](200, seed=4)
+        geometries = backend.from_wkb(la.packed_lines_to_wkb(packed))
+        samples = backend.from_wkb(la.packed_lines_to_wkb(_without_repeated_points(packed_geometries(
+            [fll.sample_line_from_center(geometry, 20.0) for geometry in geometries]))))
+        cases = {
+            "split": ([piece for geometry in geometries for piece in fll.split_segment_by_length(geometry, 40.0, 0)],
+                      la.split_lines(packed, 40.0, "LENGTH", 0, True)[0]),
+            "pull": ([FeatureLinePull.pull_line_geometry(geometry, 5.0, True, True) for geometry in geometries],
+                     FeatureLinePull.pull_packed_lines(packed, 5.0, True, True)),
+            "roll": ([FeatureLineRoll.roll_line_geometry(geometry, 10.0, 0.1) for geometry in geometries],
+                     FeatureLineRoll.roll_packed_lines(packed, 10.0, 0.1)),
+            "whiskers": ([fll.generate_whisker_from_polyline(sample, 10.0) for sample in samples],
+                         fll.whiskers_from_packed_lines(packed, 10.0, sample_length=20.0))}
+        for stage, (expected, lines) in cases.items():
+            expected, lines = _without_repeated_points(packed_geometries(expected)), _without_repeated_points(lines)
+            if not (np.array_equal(expected.feature_offsets, lines.feature_offsets) and
+                    np.array_equal(expected.part_offsets, lines.part_offsets)):
+                failures.append("{0} {1} has {2} parts and {3} vertices, the per feature helpers {4} and {5}.".format(
+                    name, stage, lines.part_count, lines.vertex_count, expected.part_count, expected.vertex_count))
+            elif not np.allclose(expected.coords, lines.coords, rtol=0.0, atol=tolerance):
+                failures.append("{0} {1} is up to {2:.2e} from the per feature helpers.".format(
+                    name, stage, np.abs(expected.coords - lines.coords).max()))
+    return failures
+
+
+class _Crash(BaseException):
+    """Stops a tool run like a killed process, past the error handling of the tool."""
+
+
+def _run_tool(function, *args, **kwargs):
+    """Runs a tool with its messages silenced and returns the errors that stopped it (see fll.tool_status)."""
+    fll.tool_status.reset()
+    with contextlib.redirect_stdout(io.StringIO()):
+        function(*args, **kwargs)
+    return list(fll.tool_status.errors)
+
+
+def _file_formats(directory):
+    """Returns the GeoParquet (when pyarrow is installed) and GeoPackage dataset paths of a name in a directory."""
+    formats = [os.path.join(directory, "{0}.gpkg")]
+    if importlib.util.find_spec("pyarrow") is not None:
+        formats.insert(0, os.path.join(directory, "{0}.parquet"))
+    return formats
+
+
+def _write_lines(path, packed, names=None, seed=0):
+    """Writes packed lines to a file dataset with the LINE_FIELD_TYPES fields and returns their WKB and columns.
+    NAME defaults to the position of each line, RANK and WEIGHT are seeded random values."""
+    rng = np.random.default_rng(seed)
+    wkb = la.packed_lines_to_wkb(packed)
+    columns = {"NAME": list(names) if names is not None else ["line{0}".format(i) for i in range(len(wkb))],
+               "RANK": rng.integers(0, 100, len(wkb)).tolist(), "WEIGHT": rng.uniform(0, 1, len(wkb)).tolist()}
+    with lineio.LineDatasetWriter(path, LINE_FIELD_TYPES) as writer:
+        writer.write_batch(wkb, columns)
+    return wkb, columns
+
+
+def _read_rows(path, fields=None):
+    """Returns the rows of a file dataset as (WKB, field values...) tuples in order."""
+    rows = []
+    for batch in lineio.read_line_batches(path, fields):
+        names = fields or list(batch["columns"])
+        rows.extend(zip(batch["wkb"], *[batch["columns"][name] for name in names]))
+    return [tuple(bytes(value) if isinstance(value, (bytes, bytearray, memoryview)) else value for value in row)
+            for row in rows]
+
+
+@register_check("file_dataset_round_trip")
+def file_dataset_round_trip():
+    """Multipart lines with Z and M values and typed attributes written to GeoParquet and GeoPackage and read back
+    unchanged, and split from each format into the other with the same segments."""
+    failures = []
+    packed = sn.with_z_and_m(sn.multipart_lines(150, seed=5))
+    with tempfile.TemporaryDirectory() as directory:
+        paths = [path.format("lines") for path in _file_formats(directory)]
+        for path in paths:
+            wkb, columns = _write_lines(path, packed, seed=5)
+            rows = _read_rows(path, [name for name, _ in LINE_FIELD_TYPES])
+            expected = list(zip(wkb, *[columns[name] for name, _ in LINE_FIELD_TYPES]))
+            if rows != expected:
+                changed = sum(row != row_expected for row, row_expected in zip(rows, expected))
+                failures.append("{0} read {1} rows back, {2} of the {3} written differ.".format(
+                    os.path.basename(path), len(rows), changed + abs(len(rows) - len(expected)), len(expected)))
+        outputs = []
+        for source, target in zip(paths, reversed(paths)):
+            out_fc = os.path.join(directory, "split_of_" + os.path.basename(target))
+            errors = _run_tool(FeatureLineSplit.feature_line_split, source, 40.0, None, "LENGTH", 0, True, out_fc)
+            failures.extend("split {0}: {1}".format(os.path.basename(source), error) for error in errors)
+            outputs.append(_read_rows(out_fc) if not errors else None)
+        if len(outputs) == 2 and None not in outputs and outputs[0] != outputs[1]:
+            failures.append("The GeoParquet and GeoPackage splits wrote {0} and {1} rows that differ.".format(
+                len(outputs[0]), len(outputs[1])))
+    return failures
+
+
+@register_check("checkpoint_resume")
+def checkpoint_resume(chunk_features=40, crash_at=130, failing=(7, 95)):
+    """Split runs with checkpoints stopped part way and resumed. A resumed run writes the rows of a clean run in the
+    same order, and features that failed before the stop are split again by the resumed run."""
+    failures = []
+    packed = sn.curvy_trails(300, seed=6)
+    count_feature = fll.RunCheckpoint._count
+    reference_values = FeatureLineSplit.linear_reference_values
+
+    def crash(checkpoint, oid):
+        if checkpoint.features_done == crash_at:
+            raise _Crash()
+        return count_feature(checkpoint, oid)
+
+    def flaky(parent_oid, *args):
+        if parent_oid in failing:
+            raise IOError("Feature {0} could not be written.".format(parent_oid))
+        return reference_values(parent_oid, *args)
+
+    with tempfile.TemporaryDirectory() as directory:
+        for path in _file_formats(directory):
+            in_fc = path.format("lines")
+            _write_lines(in_fc, packed, seed=6)
+            parameters = [in_fc, 40.0, None, "LENGTH", 0, True]
+            _run_tool(FeatureLineSplit.feature_line_split, *parameters, path.format("clean"))
+            expected = _read_rows(path.format("clean"))
+            for name, patch_values in (("stopped", False), ("stopped_after_failures", True)):
+                out_fc = path.format(name)
+                fll.RunCheckpoint._count = crash
+                if patch_values:
+                    FeatureLineSplit.linear_reference_values = flaky
+                try:
+                    _run_tool(FeatureLineSplit.feature_line_split, *parameters, out_fc,
+                              checkpoint_features=chunk_features)
+                    failures.append("{0} {1} was not stopped.".format(os.path.basename(out_fc), name))
+                except _Crash:
+                    pass
+                finally:
+                    fll.RunCheckpoint._count = count_feature
+                    FeatureLineSplit.linear_reference_values = reference_values
+                if not os.path.exists(fll.checkpoint_path(out_fc)):
+                    failures.append("{0} has no checkpoint after the stop.".format(os.path.basename(out_fc)))
+                errors = _run_tool(FeatureLineSplit.feature_line_split, *parameters, out_fc, resume_bool=True,
+                                   checkpoint_features=chunk_features)
+                failures.extend("{0} resume: {1}".format(os.path.basename(out_fc), error) for error in errors)
+                rows = _read_rows(out_fc)
+                # Features split again after a failure are appended after the committed rows.
+                same_rows = collections.Counter(rows) == collections.Counter(expected) if patch_values else (
+                    rows == expected)
+                if not same_rows:
+                    failures.append("{0} resumed to {1} rows unlike the {2} rows of a clean run.".format(
+                        os.path.basename(out_fc), len(rows), len(expected)))
+                if os.path.exists(fll.checkpoint_path(out_fc)):
+                    failures.append("{0} kept its checkpoint after finishing.".format(os.path.basename(out_fc)))
+    return failures
+
+
+@register_check("result_cache_hits")
+def result_cache_hits(changed=(3, 40, 41, 250)):
+    """Split and whisker reruns with a result cache. A rerun of the same input is all hits and writes the same rows,
+    and a rerun with a few changed lines only misses those."""
+    failures = []
+    packed = sn.grid_streets(300, seed=7)
+    moved = la.PackedLines(packed.coords.copy(), packed.part_offsets, packed.feature_offsets)
+    for feature in changed:
+        moved.coords[moved.vertex_offsets[feature]:moved.vertex_offsets[feature + 1]] += 0.5
+    tools = {"split": (FeatureLineSplit.feature_line_split, [40.0, None, "LENGTH", 0, True]),
+             "whiskers": (FeatureLineWhiskers.feature_line_whisker, [10.0, None, 20.0])}
+    report_result_cache = fll.report_result_cache
+    statistics = []
+
+    def record(session):
+        result = report_result_cache(session)
+        statistics.append(result)
+        return result
+
+    with tempfile.TemporaryDirectory() as directory:
+        in_fc, moved_fc = os.path.join(directory, "lines.gpkg"), os.path.join(directory, "moved.gpkg")
+        _write_lines(in_fc, packed, seed=7)
+        _write_lines(moved_fc, moved, seed=7)
+        fll.set_result_cache(os.path.join(directory, "cache.sqlite"))
+        fll.report_result_cache = record
+        try:
+            for name, (tool, parameters) in tools.items():
+                outputs = []
+                runs = ((in_fc, 0, packed.feature_count), (in_fc, packed.feature_count, 0),
+                        (moved_fc, packed.feature_count - len(changed), len(changed)))
+                for run, (source, hits, misses) in enumerate(runs):
+                    out_fc = os.path.join(directory, "{0}{1}.gpkg".format(name, run))
+                    del statistics[:]
+                    errors = _run_tool(tool, source, *(parameters + [out_fc]))
+                    failures.extend("{0} run {1}: {2}".format(name, run, error) for error in errors)
+                    outputs.append(_read_rows(out_fc))
+                    if not statistics or (statistics[0]["hits"], statistics[0]["misses"]) != (hits, misses):
+                        found = (statistics[0]["hits"], statistics[0]["misses"]) if statistics else None
+                        failures.append("{0} run {1} had (hits, misses) {2}, expected {3}.".format(
+                            name, run, found, (hits, misses)))
+                if outputs[0] != outputs[1]:
+                    failures.append("{0} wrote other rows from the cache than on the first run.".format(name))
+        finally:
+            fll.report_result_cache = report_result_cache
+            fll.set_result_cache(None)
+    return failures
+
+
+@register_check("changeset_classification")
+def changeset_classification():
+    """Pull reruns writing a changeset keyed on NAME. The first run inserts every line. After moving some lines,
+    changing an attribute of one, deleting two and adding two, the rerun reports exactly those updates, deletes and
+    inserts."""
+    failures = []
+    packed = sn.curvy_trails(120, seed=8)
+    names = ["line{0}".format(i) for i in range(packed.feature_count)]
+    with tempfile.TemporaryDirectory() as directory:
+        path = _file_formats(directory)[0]
+        in_fc, out_fc, changeset_fc = path.format("lines"), path.format("pulled"), path.format("changes")
+        wkb, columns = _write_lines(in_fc, packed, names, seed=8)
+        errors = _run_tool(FeatureLinePull.feature_line_pull, in_fc, 5.0, None, True, True, out_fc,
+                           changeset_fc=changeset_fc, changeset_key_fields=["NAME"])
+        changes = {name: kind for _, name, kind in _read_rows(changeset_fc, ["NAME", "CHANGE_TYPE"])}
+        if changes != {name: "INSERT" for name in names}:
+            failures.append("The first run changeset has {0} rows, not an INSERT of each of the {1} lines.".format(
+                len(changes), len(names)))
+        # Lines 0 to 2 move, line 3 changes weight, lines 4 and 5 are deleted and two new lines are added.
+        moved = la.PackedLines(packed.coords.copy(), packed.part_offsets, packed.feature_offsets)
+        moved.coords[:moved.vertex_offsets[3]] += 1.0
+        keep = [i for i in range(packed.feature_count) if i not in (4, 5)]
+        added = sn.curvy_trails(2, seed=9)
+        new_wkb = [la.packed_lines_to_wkb(moved)[i] for i in keep] + la.packed_lines_to_wkb(added)
+        new_columns = {field: [columns[field][i] for i in keep] for field in columns}
+        new_columns["NAME"] += ["new0", "new1"]
+        new_columns["RANK"] += [1, 2]
+        new_columns["WEIGHT"] += [0.5, 0.25]
+        new_columns["WEIGHT"][3] += 1.0
+        os.remove(in_fc)
+        with lineio.LineDatasetWriter(in_fc, LINE_FIELD_TYPES) as writer:
+            writer.write_batch(new_wkb, new_columns)
+        errors += _run_tool(FeatureLinePull.feature_line_pull, in_fc, 5.0, None, True, True, out_fc,
+                            changeset_fc=changeset_fc, changeset_key_fields=["NAME"])
+        failures.extend(errors)
+        changes = {name: kind for _, name, kind in _read_rows(changeset_fc, ["NAME", "CHANGE_TYPE"])}
+        expected = {"line0": "UPDATE", "line1": "UPDATE", "line2": "UPDATE", "line3": "UPDATE", "line4": "DELETE",
+                    "line5": "DELETE", "new0": "INSERT", "new1": "INSERT"}
+        if changes != expected:
+            failures.append("The rerun changeset is {0}, expected {1}.".format(sorted(changes.items()),
+                                                                                sorted(expected.items())))
+    return failures
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Run behavior checks of the library kernels.")
+    parser.add_argument("--checks", nargs="+", choices=sorted(CHECKS), default=list(CHECKS))
+    args = parser.parse_args(argv)
+    failures = []
+    for name in args.checks:
+        messages, seconds = _timed(CHECKS[name])
+        print("{0:<40} {1:>8.3f}s  {2}".format(name, seconds, "FAILED" if messages else "ok"))
+        failures.extend("{0}: {1}".format(name, message) for message in messages)
+    if failures:
+        print("BEHAVIOR CHECK FAILURES:")
+        for message in failures:
+            print("    " + message)
+        return 1
+    return 0
+
+
+# This test allows the script to be used from the operating
+# system command prompt (stand-alone), in a Python IDE,
+# or as a module imported in another script
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,104 @@
+# --------------------------------
+# Name: import_budget.py
+# Purpose: Checks the import time of the library and the tool scripts against a budget. Each module is imported in
+# a fresh interpreter several times, the median time is compared to the budget, and the heavy dependencies
+# (arcpy, pandas, NumPy, Shapely, pyarrow) must not be loaded by the import itself. Exits with a status of 1 when
+# a module is over budget or imports a heavy dependency eagerly.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# Python Version:   3.7+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+
+# Import Modules
+import argparse
+import json
+import os
+import statistics
+import subprocess
+import sys
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+SCRIPTS_DIR = os.path.abspath(os.path.join(BENCHMARK_DIR, "..", "Scripts"))
+MODULES = [
+    "linelibrary",
+    "lineworker",
+    "linebatch",
+    "FeatureLineSplit",
+    "FeatureLinePull",
+    "FeatureLineRoll",
+    "FeatureLineWhiskers",
+    "FeatureLineCorridorAssembly",
+    "FeatureLineDynamicSegmentation",
+    "FeatureLineRollingStatistics",
+]
+HEAVY_MODULES = ["arcpy", "pandas", "numpy", "shapely", "pyarrow"]
+# Measured in the child so interpreter startup is excluded and only the module import is timed.
+_PROBE = """
+import json, sys, time
+start = time.perf_counter()
+import {module}
+seconds = time.perf_counter() - start
+print(json.dumps({{"seconds": seconds, "heavy": [name for name in {heavy!r} if name in sys.modules]}}))
+"""
+
+
+# Function Definitions
+def measure_import(module_name, runs=5):
+    """Imports a module in fresh interpreters and returns the median import time and the heavy modules it loaded."""
+    timings, heavy = [], set()
+    for _ in range(runs):
+        output = subprocess.run(
+            [sys.executable, "-c", _PROBE.format(module=module_name, heavy=HEAVY_MODULES)],
+            cwd=SCRIPTS_DIR,
+            check=True,
+            stdout=subprocess.PIPE,
+        ).stdout
+        result = json.loads(output.decode().strip().splitlines()[-1])
+        timings.append(result["seconds"])
+        heavy.update(result["heavy"])
+    return {"module": module_name, "seconds": statistics.median(timings), "heavy": sorted(heavy)}
+
+
+def main(argv=None):
+    parser = argparse.ArgumentParser(description="Check the import time of the library and tool scripts.")
+    parser.add_argument("--budget", type=float, default=0.15, help="Median import budget in seconds.")
+    parser.add_argument("--runs", type=int, default=5, help="Fresh interpreters per module.")
+    parser.add_argument("--modules", nargs="+", default=MODULES)
+    args = parser.parse_args(argv)
+    failures = []
+    for module_name in args.modules:
+        result = measure_import(module_name, args.runs)
+        print("{module:<32} {seconds:>8.4f}s  heavy: {0}".format(", ".join(result["heavy"]) or "-", **result))
+        if result["seconds"] > args.budget:
+            failures.append("{0} imports in {1:.3f}s, over the {2:.3f}s budget.".format(
+                module_name, result["seconds"], args.budget))
+        if result["heavy"]:
+            failures.append("{0} eagerly imports {1}.".format(module_name, ", ".join(result["heavy"])))
+    if failures:
+        print("IMPORT BUDGET FAILURES:")
+        for message in failures:
+            print("    " + message)
+        return 1
+    return 0
+
+
+# This test allows the script to be used from the operating
+# system command prompt (stand-alone), in a Python IDE,
+# or as a module imported in another script
+if __name__ == "__main__":
+    sys.exit(main())
@@ -0,0 +1,354 @@
+# --------------------------------
+# Name: kernels.py
+# Purpose: Registry of the library kernels timed by run_benchmarks.py. Each kernel takes a synthetic
+# linearray.PackedLines network, prepares its inputs outside of the timed region, and then runs a library call.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# Python Version:   3.6+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+
+# Import Modules
+import hashlib
+import os
+import tempfile
+import numpy as np
+import synthetic_networks as sn
+import linearray as la
+import linestore
+
+# Benchmarks are headless, the per geometry helpers run on the numpy geometry backend.
+os.environ.setdefault("LINELIBRARY_BACKEND", "numpy")
+import linelibrary as fll
+import FeatureLinePull
+import FeatureLineRoll
+
+KERNELS = {}
+
+
+# Function Definitions
+def register_kernel(name, tool, setup=None, generators=None, variant_of=None):
+    """Decorator registering a benchmark kernel.
+    :param - name - unique kernel name used in result keys and on the command line
+    :param - tool - the tool the kernel serves (split, pull, roll, whisker, corridor, dynamic_segmentation, rolling_statistics, geometry_stages or io)
+    :param - setup - optional function mapping the packed network to the kernel input, it is not timed
+    :param - generators - optional list of generator names the kernel runs on, defaults to all generators
+    :param - variant_of - optional name of the kernel this one times on a variant of the same input, such as the
+    network with Z and M values, run_benchmarks reports the time of the variant over the time of that kernel"""
+
+    def register(function):
+        KERNELS[name] = {
+            "tool": tool,
+            "setup": setup or (lambda packed: packed),
+            "run": function,
+            "generators": generators or list(sn.GENERATORS),
+            "variant_of": variant_of,
+        }
+        return function
+
+    return register
+
+
+def _backend_geometries(packed):
+    """Converts the packed network to geometries of the active linelibrary geometry backend."""
+    import shapely
+
+    return list(shapely.from_wkb(la.packed_lines_to_wkb(packed)))
+
+
+def _random_near_pairs(packed, neighbours=4, seed=0):
+    """Descriptor table with random near pairs standing in for a GenerateNearTable result."""
+    rng = np.random.default_rng(seed)
+    table = la.line_descriptor_table(packed)
+    in_fid = np.repeat(np.arange(packed.feature_count), neighbours)
+    near_fid = rng.integers(0, max(packed.feature_count, 1), len(in_fid))
+    return table, in_fid, near_fid
+
+
+def _wide_rows(packed, attribute_count=30):
+    """Search cursor style rows of SHAPE@, 30 attribute fields and OID@, with WKB standing in for the geometry."""
+    fields = ["SHAPE@"] + ["FIELD_{0}".format(index) for index in range(attribute_count)]
+    attributes = tuple(range(attribute_count))
+    rows = [(wkb,) + attributes + (oid,) for oid, wkb in enumerate(la.packed_lines_to_wkb(packed), 1)]
+    return rows, fields, fll.construct_index_dict(fields + ["OID@"])
+
+
+@register_kernel("wkb_packing", "io", setup=la.packed_lines_to_wkb)
+def wkb_packing(wkb_geometries):
+    return la.packed_lines_from_wkb(wkb_geometries)
+
+
+@register_kernel("corridor_descriptors", "corridor")
+def corridor_descriptors(packed):
+    return la.line_descriptor_table(packed)
+
+
+@register_kernel("corridor_parallel_test", "corridor", setup=_random_near_pairs)
+def corridor_parallel_test(data, parallel_threshold=15):
+    table, in_fid, near_fid = data
+    bearing = table["PCA_BEARING"]
+    return la.smallest_axial_angle(bearing[in_fid], bearing[near_fid]) <= parallel_threshold
+
+
+@register_kernel("split_by_length", "split", setup=_backend_geometries)
+def split_by_length(geometries, split_value=50.0):
+    for geometry in geometries:
+        fll.split_segment_by_length(geometry, split_value, 0, True)
+
+
+@register_kernel("split_by_count", "split", setup=_backend_geometries)
+def split_by_count(geometries, split_count=4):
+    for geometry in geometries:
+        fll.split_segment_by_count(geometry, split_count)
+
+
+def _line_lengths(packed):
+    return la.vertex_measures(packed)[1]
+
+
+@register_kernel("length_index", "split")
+def length_index(packed):
+    return la.LengthIndex(packed)
+
+
+def _geographic_lines(packed):
+    """The network scaled to about 0.1 degree across and moved to longitudes and latitudes near 40N 105W."""
+    coords = packed.coords - packed.coords.min(axis=0)
+    coords = coords / max(coords.max(), 1.0) * 0.1 + np.array([-105.0, 40.0])
+    return la.PackedLines(coords, packed.part_offsets, packed.feature_offsets, packed.oids)
+
+
+@register_kernel("geodesic_length_index", "split", setup=_geographic_lines)
+def geodesic_length_index(packed):
+    return la.LengthIndex(packed, "GEODESIC")
+
+
+@register_kernel("split_output_sizing", "split", setup=_line_lengths)
+def split_output_sizing(lengths, split_value=50.0):
+    counts, segment_lengths = la.split_segment_counts(lengths, split_value, "LENGTH", True)
+    return la.split_interval_measures(lengths, counts, segment_lengths)
+
+
+@register_kernel("split_lines_vectorized", "split")
+def split_lines_vectorized(packed, split_value=50.0):
+    return la.split_lines(packed, split_value, "LENGTH", 0, True)
+
+
+@register_kernel("split_lines_shared", "split")
+def split_lines_shared(packed, split_value=50.0, workers=2):
+    return fll.split_packed_lines(packed, split_value, "LENGTH", 0, True, workers)
+
+
+@register_kernel("split_row_projection", "split", setup=_wide_rows, generators=["grid_streets"])
+def split_row_projection(data, segments_per_row=4):
+    rows, fields, f_dict = data
+    project_row = fll.compile_row_projector(fields, f_dict)
+    for row in rows:
+        for _ in range(segments_per_row):
+            project_row(row, row[0])
+
+
+@register_kernel("whisker_from_center", "whisker", setup=_backend_geometries)
+def whisker_from_center(geometries, sample_length=20.0, whisker_width=10.0):
+    for geometry in geometries:
+        sample = fll.sample_line_from_center(geometry, sample_length)
+        fll.generate_whisker_from_polyline(sample, whisker_width)
+
+
+@register_kernel("pull_both_ends", "pull", setup=_backend_geometries)
+def pull_both_ends(geometries, pull_value=5.0):
+    for geometry in geometries:
+        FeatureLinePull.pull_line_geometry(geometry, pull_value, True, True)
+
+
+@register_kernel("roll_extend", "roll", setup=_backend_geometries)
+def roll_extend(geometries, extension_distance=10.0, end_sampling_percentage=0.1):
+    for geometry in geometries:
+        FeatureLineRoll.roll_line_geometry(geometry, extension_distance, end_sampling_percentage)
+
+
+@register_kernel("whisker_packed", "whisker")
+def whisker_packed(packed, sample_length=20.0, whisker_width=10.0):
+    return fll.whiskers_from_packed_lines(packed, whisker_width, sample_length=sample_length)
+
+
+@register_kernel("pull_packed", "pull")
+def pull_packed(packed, pull_value=5.0):
+    return FeatureLinePull.pull_packed_lines(packed, pull_value, True, True)
+
+
+@register_kernel("roll_packed", "roll")
+def roll_packed(packed, extension_distance=10.0, end_sampling_percentage=0.1):
+    return FeatureLineRoll.roll_packed_lines(packed, extension_distance, end_sampling_percentage)
+
+
+@register_kernel("split_lines_zm", "split", setup=sn.with_z_and_m, variant_of="split_lines_vectorized")
+def split_lines_zm(packed, split_value=50.0):
+    return la.split_lines(packed, split_value, "LENGTH", 0, True)
+
+
+@register_kernel("whisker_packed_zm", "whisker", setup=sn.with_z_and_m, variant_of="whisker_packed")
+def whisker_packed_zm(packed, sample_length=20.0, whisker_width=10.0):
+    return whisker_packed(packed, sample_length, whisker_width)
+
+
+@register_kernel("pull_packed_zm", "pull", setup=sn.with_z_and_m, variant_of="pull_packed")
+def pull_packed_zm(packed, pull_value=5.0):
+    return pull_packed(packed, pull_value)
+
+
+@register_kernel("roll_packed_zm", "roll", setup=sn.with_z_and_m, variant_of="roll_packed")
+def roll_packed_zm(packed, extension_distance=10.0, end_sampling_percentage=0.1):
+    return roll_packed(packed, extension_distance, end_sampling_percentage)
+
+
+@register_kernel("split_lines_fragmented", "split", setup=sn.fragment_parts)
+def split_lines_fragmented(packed, split_value=50.0):
+    return la.split_lines(packed, split_value, "LENGTH", 0, True)
+
+
+def _fragmented_geometries(packed):
+    """Backend geometries of the network with every part broken into short parts, see fragment_parts."""
+    return _backend_geometries(sn.fragment_parts(packed))
+
+
+@register_kernel("roll_extend_fragmented", "roll", setup=_fragmented_geometries)
+def roll_extend_fragmented(geometries, extension_distance=10.0, end_sampling_percentage=0.1):
+    roll_extend(geometries, extension_distance, end_sampling_percentage)
+
+
+@register_kernel("roll_packed_fragmented", "roll", setup=sn.fragment_parts)
+def roll_packed_fragmented(packed, extension_distance=10.0, end_sampling_percentage=0.1):
+    return roll_packed(packed, extension_distance, end_sampling_percentage)
+
+
+def _along_line_queries(packed, queries_per_feature=4, seed=0):
+    """The network with its length index and random (feature, start, end) queries, a quarter of them reversed."""
+    rng = np.random.default_rng(seed)
+    index = la.LengthIndex(packed)
+    features = np.repeat(np.arange(packed.feature_count), queries_per_feature)
+    starts = rng.random(len(features)) * index.lengths[features]
+    ends = starts + (rng.random(len(features)) - 0.25) * index.lengths[features] / 2
+    return packed, index, features, starts, ends
+
+
+@register_kernel("segments_along_lines", "split", setup=_along_line_queries)
+def segments_along_lines(data):
+    packed, index, features, starts, ends = data
+    return fll.segments_along_lines(packed, features, starts, ends, index=index)
+
+
+def _segment_events(packed, split_value=50.0, events_per_feature=20, seed=0):
+    """Cut measures of every line split by length and random (route, measure) events along the lines."""
+    rng = np.random.default_rng(seed)
+    lengths = la.line_descriptor_table(packed)["LENGTH"]
+    cuts = [fll.split_measures_by_length(length, split_value) for length in lengths.tolist()]
+    offsets = np.concatenate([[0], np.cumsum([len(measures) for measures in cuts], dtype=np.int64)])
+    starts = np.array([start for measures in cuts for start, _ in measures])
+    ends = np.array([end for measures in cuts for _, end in measures])
+    routes = rng.integers(0, max(packed.feature_count, 1), packed.feature_count * events_per_feature)
+    measures = rng.uniform(0.0, 1.0, len(routes)) * lengths[routes]
+    return offsets, starts, ends, routes, measures, rng.uniform(0.0, 10.0, len(routes))
+
+
+@register_kernel("event_segmentation", "dynamic_segmentation", setup=_segment_events)
+def event_segmentation(data):
+    offsets, starts, ends, routes, measures, values = data
+    interval_index = la.locate_in_intervals(offsets, starts, ends, routes, measures)
+    return la.interval_aggregates(interval_index, len(starts), {"VALUE": values})
+
+
+def _route_segments(packed, split_value=50.0, seed=0):
+    """Midpoint measures of every line split by length, with the line as the route and a random value per segment."""
+    rng = np.random.default_rng(seed)
+    lengths = la.line_descriptor_table(packed)["LENGTH"]
+    cuts = [fll.split_measures_by_length(length, split_value) for length in lengths.tolist()]
+    groups = np.repeat(np.arange(len(cuts)), [len(measures) for measures in cuts])
+    measures = np.array([(start + end) / 2.0 for measures in cuts for start, end in measures])
+    return groups, measures, rng.uniform(0.0, 10.0, len(measures))
+
+
+@register_kernel("rolling_statistics", "rolling_statistics", setup=_route_segments)
+def rolling_statistics(data, window_length=200.0):
+    groups, measures, values = data
+    return la.rolling_window_statistics(groups, measures, {"VALUE": values}, window_length)
+
+
+@register_kernel("curvature_split_measures", "split")
+def curvature_split_measures(packed, turn_angle=30.0, min_length=10.0, max_length=200.0):
+    return la.curvature_split_measures(packed, turn_angle, min_length, max_length)
+
+
+@register_kernel("line_end_cuts", "split")
+def line_end_cuts(packed, tolerance=1.0):
+    end_points, end_features = la.line_end_points(packed)
+    return la.points_near_lines(packed, end_points, tolerance, end_features)
+
+
+@register_kernel("simplify_douglas_peucker", "geometry_stages")
+def simplify_douglas_peucker(packed, tolerance=1.0):
+    return la.simplify_lines(packed, tolerance, "DOUGLAS_PEUCKER")
+
+
+@register_kernel("simplify_visvalingam", "geometry_stages")
+def simplify_visvalingam(packed, min_area=1.0):
+    return la.simplify_lines(packed, min_area, "VISVALINGAM")
+
+
+@register_kernel("densify_lines", "geometry_stages")
+def densify_lines(packed, interval=5.0):
+    return la.densify_lines(packed, interval)
+
+
+def _cached_results(packed):
+    """Stores the WKB of every feature in a temporary result cache and returns a session and the feature WKB."""
+    wkb_geometries = la.packed_lines_to_wkb(packed)
+    cache = linestore.ResultCache(os.path.join(tempfile.mkdtemp(), "results.sqlite"))
+    session = cache.session("benchmark", [])
+    for wkb in wkb_geometries:
+        session.store(session.key(wkb), [wkb])
+    session.flush()
+    return session, wkb_geometries
+
+
+@register_kernel("result_cache_lookup", "io", setup=_cached_results)
+def result_cache_lookup(data):
+    session, wkb_geometries = data
+    return [session.lookup(session.key(wkb)) for wkb in wkb_geometries]
+
+
+def _changed_versions(packed, change_share=0.01, seed=0):
+    """Key and content hashes of two versions of the network rows, shuffled, with a share of the rows of the new
+    version updated, deleted and inserted."""
+    rng = np.random.default_rng(seed)
+    wkb_geometries = la.packed_lines_to_wkb(packed)
+    keys = np.arange(len(wkb_geometries), dtype=np.uint64) * np.uint64(0x9E3779B97F4A7C15)
+    hashes = np.frombuffer(b"".join(hashlib.blake2b(wkb, digest_size=8).digest() for wkb in wkb_geometries),
+                           dtype=np.uint64)
+    changed = rng.random(len(keys)) < change_share
+    deleted = rng.random(len(keys)) < change_share
+    inserted = int(change_share * len(keys))
+    new_keys = np.concatenate([keys[~deleted], rng.integers(2 ** 62, 2 ** 63, inserted).astype(np.uint64)])
+    new_hashes = np.concatenate([np.where(changed, hashes + np.uint64(1), hashes)[~deleted],
+                                 rng.integers(0, 2 ** 63, inserted).astype(np.uint64)])
+    old_order, new_order = rng.permutation(len(keys)), rng.permutation(len(new_keys))
+    return keys[old_order], hashes[old_order], new_keys[new_order], new_hashes[new_order]
+
+
+@register_kernel("output_changeset", "io", setup=_changed_versions)
+def output_changeset(data):
+    return la.hashed_row_changes(*data)
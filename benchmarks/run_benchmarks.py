@@ -0,0 +1,239 @@
+# --------------------------------
+# Name: run_benchmarks.py
+# Purpose: Headless benchmark runner for the study line editor library kernels. Every kernel is run on every
+# seeded synthetic network at each requested size in a fresh process, and the time, peak RSS and features per
+# second are written to JSON. Results are compared against a baseline recorded on the same machine and regressions
+# fail the run. The baseline is machine specific and is not committed, see --update-baseline.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# Python Version:   3.6+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+
+# Import Modules
+import argparse
+import concurrent.futures
+import json
+import multiprocessing
+import os
+import platform
+import sys
+import time
+
+BENCHMARK_DIR = os.path.dirname(os.path.abspath(__file__))
+# Local baseline file, ignored by git since the timings only hold on the machine that recorded them.
+DEFAULT_BASELINE = os.path.join(BENCHMARK_DIR, "baseline.json")
+sys.path.insert(0, BENCHMARK_DIR)
+sys.path.insert(0, os.path.join(BENCHMARK_DIR, "..", "Scripts"))
+
+
+# Function Definitions
+def peak_rss_mb():
+    """Returns the peak resident set size of the current process in megabytes."""
+    import resource
+
+    peak = resource.getrusage(resource.RUSAGE_SELF).ru_maxrss
+    return peak / 1024.0 if sys.platform != "darwin" else peak / (1024.0 * 1024.0)
+
+
+def run_case(kernel_name, generator_name, size, seed, repeat, min_time=0.05):
+    """Runs a single kernel/generator/size case and returns its measurements. Intended to be run in a fresh
+    process so the peak RSS belongs to this case alone."""
+    import synthetic_networks as sn
+    import kernels
+
+    kernel = kernels.KERNELS[kernel_name]
+    packed = sn.GENERATORS[generator_name](size, seed=seed)
+    data = kernel["setup"](packed)
+    rss_before = peak_rss_mb()
+    # Calibrate the number of calls per timing so small cases are not dominated by timer noise.
+    number = 1
+    while True:
+        start = time.perf_counter()
+        for _ in range(number):
+            kernel["run"](data)
+        elapsed = time.perf_counter() - start
+        if elapsed >= min_time or number >= 1024:
+            break
+        number *= 2
+    timings = [elapsed / number]
+    for _ in range(repeat - 1):
+        start = time.perf_counter()
+        for _ in range(number):
+            kernel["run"](data)
+        timings.append((time.perf_counter() - start) / number)
+    best = min(timings)
+    return {
+        "key": case_key(kernel_name, generator_name, size),
+        "kernel": kernel_name,
+        "tool": kernel["tool"],
+        "generator": generator_name,
+        "features": size,
+        "vertices": int(packed.vertex_count),
+        "seconds": best,
+        "mean_seconds": sum(timings) / len(timings),
+        "calls_per_timing": number,
+        "features_per_sec": size / best if best > 0 else float("inf"),
+        "peak_rss_mb": peak_rss_mb(),
+        "setup_rss_mb": rss_before,
+    }
+
+
+def case_key(kernel_name, generator_name, size):
+    """Key used to match results with the baseline."""
+    return "{0}/{1}/{2}".format(kernel_name, generator_name, size)
+
+
+def run_isolated(kernel_name, generator_name, size, seed, repeat):
+    """Runs a case in a freshly spawned worker process. The worker is not a daemon, so kernels can start their own
+    worker processes."""
+    context = multiprocessing.get_context("spawn")
+    with concurrent.futures.ProcessPoolExecutor(1, mp_context=context) as executor:
+        return executor.submit(run_case, kernel_name, generator_name, size, seed, repeat).result()
+
+
+def compare_to_baseline(results, baseline, tolerance):
+    """Compares features per second against the baseline, returning a list of regression messages."""
+    baseline_lookup = {result["key"]: result for result in baseline.get("results", [])}
+    regressions = []
+    for result in results:
+        reference = baseline_lookup.get(result["key"])
+        if reference is None:
+            result["baseline_ratio"] = None
+            continue
+        ratio = result["features_per_sec"] / reference["features_per_sec"]
+        result["baseline_ratio"] = ratio
+        if ratio < 1.0 - tolerance:
+            regressions.append(
+                "{0}: {1:,.0f} features/sec is {2:.0%} of the baseline {3:,.0f} features/sec.".format(
+                    result["key"], result["features_per_sec"], ratio, reference["features_per_sec"]
+                )
+            )
+    return regressions
+
+
+def variant_ratios(results, kernel_registry):
+    """Returns the time of each variant kernel over the time of its base kernel on the same generator and size, for
+    the pairs that ran in this run (see register_kernel variant_of). Ratios are only taken within one run, timings
+    of different runs or machines are not comparable.
+    :return - list of dictionaries with the variant and base keys and the time ratio"""
+    lookup = {result["key"]: result for result in results}
+    ratios = []
+    for result in results:
+        base_kernel = kernel_registry[result["kernel"]]["variant_of"]
+        base = lookup.get(case_key(base_kernel, result["generator"], result["features"])) if base_kernel else None
+        if base is not None:
+            ratios.append({"key": result["key"], "base_key": base["key"], "ratio": result["seconds"] / base["seconds"]})
+    return ratios
+
+
+def parse_arguments(argv=None):
+    import kernels
+    import synthetic_networks as sn
+
+    parser = argparse.ArgumentParser(description="Benchmark the study line editor library kernels.")
+    parser.add_argument("--sizes", nargs="+", default=["1e3", "1e4"], help="Feature counts, 1e3-1e7.")
+    parser.add_argument("--kernels", nargs="+", default=sorted(kernels.KERNELS), choices=sorted(kernels.KERNELS))
+    parser.add_argument("--tools", nargs="+", default=None, help="Only run kernels for these tools.")
+    parser.add_argument(
+        "--generators", nargs="+", default=sorted(sn.GENERATORS), choices=sorted(sn.GENERATORS)
+    )
+    parser.add_argument("--seed", type=int, default=0)
+    parser.add_argument("--repeat", type=int, default=3, help="Timed repetitions, the best time is kept.")
+    parser.add_argument("--output", default=None, help="JSON file for the results.")
+    parser.add_argument("--baseline", default=DEFAULT_BASELINE, help="Baseline JSON to compare against.")
+    parser.add_argument("--tolerance", type=float, default=0.3, help="Allowed slowdown ratio before failing.")
+    parser.add_argument("--update-baseline", action="store_true", help="Write the results as the new baseline.")
+    parser.add_argument("--in-process", action="store_true", help="Do not spawn a process per case.")
+    return parser.parse_args(argv)
+
+
+def main(argv=None):
+    import kernels
+
+    args = parse_arguments(argv)
+    sizes = [int(float(size)) for size in args.sizes]
+    results = []
+    for kernel_name in args.kernels:
+        kernel = kernels.KERNELS[kernel_name]
+        if args.tools and kernel["tool"] not in args.tools:
+            continue
+        for generator_name in args.generators:
+            if generator_name not in kernel["generators"]:
+                continue
+            for size in sizes:
+                runner = run_case if args.in_process else run_isolated
+                result = runner(kernel_name, generator_name, size, args.seed, args.repeat)
+                results.append(result)
+                print(
+                    "{key:<60} {seconds:>10.4f}s {features_per_sec:>14,.0f} features/sec "
+                    "{peak_rss_mb:>9.1f} MB".format(**result)
+                )
+                sys.stdout.flush()
+    ratios = variant_ratios(results, kernels.KERNELS)
+    for ratio in ratios:
+        print("{key:<60} {ratio:>10.2f}x the time of {base_key}".format(**ratio))
+    regressions = []
+    if not args.update_baseline and args.baseline and os.path.exists(args.baseline):
+        with open(args.baseline) as baseline_file:
+            regressions = compare_to_baseline(results, json.load(baseline_file), args.tolerance)
+    elif not args.update_baseline and args.baseline:
+        print("No baseline at {0}, record one on this machine with --update-baseline.".format(args.baseline))
+    import numpy
+
+    report = {
+        "meta": {
+            "created": time.strftime("%Y-%m-%dT%H:%M:%S"),
+            "python": platform.python_version(),
+            "numpy": numpy.__version__,
+            "platform": platform.platform(),
+            "seed": args.seed,
+            "repeat": args.repeat,
+        },
+        "results": results,
+        "variant_ratios": ratios,
+        "regressions": regressions,
+    }
+    if args.output:
+        with open(args.output, "w") as output_file:
+            json.dump(report, output_file, indent=2)
+    if args.update_baseline:
+        # Merge into the existing baseline so a partial run only refreshes the cases it ran.
+        merged = {}
+        if os.path.exists(args.baseline):
+            with open(args.baseline) as baseline_file:
+                merged = {result["key"]: result for result in json.load(baseline_file).get("results", [])}
+        merged.update({result["key"]: result for result in results})
+        report["results"] = [merged[key] for key in sorted(merged)]
+        report.pop("regressions")
+        report.pop("variant_ratios")
+        with open(args.baseline, "w") as baseline_file:
+            json.dump(report, baseline_file, indent=2)
+        print("Baseline written to {0}.".format(args.baseline))
+    if regressions:
+        print("PERFORMANCE REGRESSIONS:")
+        for message in regressions:
+            print("    " + message)
+        return 1
+    return 0
+
+
+# This test allows the script to be used from the operating
+# system command prompt (stand-alone), in a Python IDE,
+# or as a module imported in another script
+if __name__ == "__main__":
+    sys.exit(main())
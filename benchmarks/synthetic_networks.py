@@ -0,0 +1,219 @@
+# --------------------------------
+# Name: synthetic_networks.py
+# Purpose: Seeded synthetic line network generators for the study line editor benchmarks. Every generator is
+# vectorized and returns linearray.PackedLines so networks of 1e3-1e7 features can be built without arcpy.
+# Current Owner: David Wasserman
+# Last Modified: 10/19/2026
+# Copyright:   David Wasserman
+# Python Version:   3.6+
+# --------------------------------
+# Copyright 2026 David J. Wasserman
+#
+# Licensed under the Apache License, Version 2.0 (the "License");
+# you may not use this file except in compliance with the License.
+# You may obtain a copy of the License at
+#
+#     http://www.apache.org/licenses/LICENSE-2.0
+#
+# Unless required by applicable law or agreed to in writing, software
+# distributed under the License is distributed on an "AS IS" BASIS,
+# WITHOUT WARRANTIES OR CONDITIONS OF ANY KIND, either express or implied.
+# See the License for the specific language governing permissions and
+# limitations under the License.
+# --------------------------------
+
+# Import Modules
+import os
+import sys
+import numpy as np
+
+sys.path.insert(0, os.path.join(os.path.dirname(os.path.abspath(__file__)), "..", "Scripts"))
+import linearray as la
+
+
+# Function Definitions
+def group_cumsum(values, counts):
+    """Cumulative sum of values along the first axis that restarts at each group of the given counts."""
+    values = np.asarray(values)
+    counts = np.asarray(counts, dtype=np.int64)
+    total = np.cumsum(values, axis=0)
+    before = total - values
+    starts = np.cumsum(counts) - counts
+    non_empty = counts > 0
+    offset = np.zeros((len(counts),) + values.shape[1:], dtype=total.dtype)
+    offset[non_empty] = before[starts[non_empty]]
+    return total - np.repeat(offset, counts, axis=0)
+
+
+def pack_single_parts(coords, vertex_counts, oids=None):
+    """Packs coordinates where every feature has a single part with the given vertex counts."""
+    part_offsets = np.concatenate([[0], np.cumsum(vertex_counts, dtype=np.int64)])
+    feature_offsets = np.arange(len(vertex_counts) + 1, dtype=np.int64)
+    return la.PackedLines(coords, part_offsets, feature_offsets, oids)
+
+
+def _random_walk(rng, starts, vertex_counts, step, turn_sd, headings=None):
+    """Smooth random walks from the start points, one per count, with normally distributed heading changes."""
+    total = int(np.sum(vertex_counts))
+    n_walks = len(vertex_counts)
+    if headings is None:
+        headings = rng.uniform(0, 2 * np.pi, n_walks)
+    turns = rng.normal(0.0, turn_sd, total)
+    walk_start = np.concatenate([[0], np.cumsum(vertex_counts)[:-1]])
+    turns[walk_start] = 0.0
+    heading = np.repeat(headings, vertex_counts) + group_cumsum(turns, vertex_counts)
+    steps = np.column_stack([np.cos(heading), np.sin(heading)]) * step
+    steps[walk_start] = 0.0
+    return np.repeat(starts, vertex_counts, axis=0) + group_cumsum(steps, vertex_counts)
+
+
+def grid_streets(n, seed=0, block=100.0, jitter=0.5):
+    """Street centerlines between the intersections of a square grid. Features alternate between east-west and
+    north-south blocks and carry 0-2 slightly jittered interior vertices.
+    :param - n - number of features
+    :param - seed - random seed
+    :param - block - block length in map units
+    :param - jitter - standard deviation of interior vertex noise
+    :return - linearray.PackedLines"""
+    rng = np.random.default_rng(seed)
+    side = int(np.ceil(np.sqrt(n / 2.0))) + 1
+    index = np.arange(n)
+    vertical = index % 2 == 1
+    cell = index // 2
+    col, row = cell % side, cell // side
+    start = np.column_stack([col * block, row * block]).astype(np.float64)
+    end = start + np.where(vertical[:, np.newaxis], [0.0, block], [block, 0.0])
+    vertex_counts = rng.integers(2, 5, n)
+    vertex_feature = np.repeat(index, vertex_counts)
+    position = np.arange(len(vertex_feature)) - np.repeat(np.cumsum(vertex_counts) - vertex_counts, vertex_counts)
+    t = position / (np.repeat(vertex_counts, vertex_counts) - 1.0)
+    coords = start[vertex_feature] + t[:, np.newaxis] * (end - start)[vertex_feature]
+    interior = (t > 0) & (t < 1)
+    coords[interior] += rng.normal(0.0, jitter, (int(np.sum(interior)), 2))
+    return pack_single_parts(coords, vertex_counts)
+
+
+def curvy_trails(n, seed=0, min_vertices=4, max_vertices=24, step=15.0, turn_sd=0.2, extent=1e5):
+    """Meandering trails built as smooth random walks with a random number of vertices per feature.
+    :param - n - number of features
+    :param - seed - random seed
+    :param - min_vertices, max_vertices - range of vertices per trail
+    :param - step - distance between vertices
+    :param - turn_sd - standard deviation of the heading change at each vertex in radians
+    :param - extent - size of the square the trails start in
+    :return - linearray.PackedLines"""
+    rng = np.random.default_rng(seed)
+    vertex_counts = rng.integers(min_vertices, max_vertices + 1, n)
+    starts = rng.uniform(0, extent, (n, 2))
+    coords = _random_walk(rng, starts, vertex_counts, step, turn_sd)
+    return pack_single_parts(coords, vertex_counts)
+
+
+def multipart_lines(n, seed=0, min_parts=2, max_parts=5, min_vertices=10, max_vertices=40, step=5.0, gap=20.0):
+    """Dense multipart lines, each part a short walk that starts a gap away from the end of the previous part.
+    :param - n - number of features
+    :param - seed - random seed
+    :param - min_parts, max_parts - range of parts per feature
+    :param - min_vertices, max_vertices - range of vertices per part
+    :param - step - distance between vertices
+    :param - gap - distance between the end of a part and the start of the next one
+    :return - linearray.PackedLines"""
+    rng = np.random.default_rng(seed)
+    part_counts = rng.integers(min_parts, max_parts + 1, n)
+    n_parts = int(np.sum(part_counts))
+    vertex_counts = rng.integers(min_vertices, max_vertices + 1, n_parts)
+    feature_heading = rng.uniform(0, 2 * np.pi, n)
+    part_heading = np.repeat(feature_heading, part_counts)
+    # Parts are laid out along the feature heading with a constant gap and an estimated part length.
+    part_span = (vertex_counts - 1) * step + gap
+    origin = np.repeat(rng.uniform(0, 1e5, (n, 2)), part_counts, axis=0)
+    along = group_cumsum(part_span.astype(np.float64), part_counts) - part_span
+    starts = origin + along[:, np.newaxis] * np.column_stack([np.cos(part_heading), np.sin(part_heading)])
+    coords = _random_walk(rng, starts, vertex_counts, step, 0.05, part_heading)
+    part_offsets = np.concatenate([[0], np.cumsum(vertex_counts, dtype=np.int64)])
+    feature_offsets = np.concatenate([[0], np.cumsum(part_counts, dtype=np.int64)])
+    return la.PackedLines(coords, part_offsets, feature_offsets)
+
+
+def dual_carriageways(n, seed=0, separation=12.0, min_vertices=8, max_vertices=40, step=20.0):
+    """Pairs of parallel divided roadway lines offset to either side of a smooth centerline. The second carriageway
+    of each pair runs in the opposite direction, as digitized divided highways usually do.
+    :param - n - number of features (pairs are n // 2 rounded up, the last odd feature is dropped)
+    :param - seed - random seed
+    :param - separation - distance between the two carriageways
+    :param - min_vertices, max_vertices - range of vertices per carriageway
+    :param - step - distance between vertices
+    :return - linearray.PackedLines"""
+    rng = np.random.default_rng(seed)
+    n_pairs = (n + 1) // 2
+    vertex_counts = rng.integers(min_vertices, max_vertices + 1, n_pairs)
+    starts = rng.uniform(0, 1e5, (n_pairs, 2))
+    center = _random_walk(rng, starts, vertex_counts, step, 0.08)
+    # Vertex normals from the central difference of neighbouring vertices within each centerline.
+    previous = np.roll(center, 1, axis=0)
+    following = np.roll(center, -1, axis=0)
+    first = np.concatenate([[0], np.cumsum(vertex_counts)[:-1]])
+    last = np.cumsum(vertex_counts) - 1
+    previous[first] = center[first]
+    following[last] = center[last]
+    tangent = following - previous
+    tangent /= np.maximum(np.hypot(tangent[:, 0], tangent[:, 1]), 1e-12)[:, np.newaxis]
+    normal = np.column_stack([-tangent[:, 1], tangent[:, 0]]) * (separation / 2.0)
+    left = center + normal
+    right = center - normal
+    # Reverse each right carriageway within its own vertex range.
+    pair = np.repeat(np.arange(n_pairs), vertex_counts)
+    position = np.arange(len(center)) - first[pair]
+    right = right[first[pair] + (vertex_counts[pair] - 1 - position)]
+    coords = np.empty((2 * len(center), 2))
+    feature_counts = np.repeat(vertex_counts, 2)
+    feature_first = np.concatenate([[0], np.cumsum(feature_counts)[:-1]])
+    left_index = np.repeat(feature_first[0::2], vertex_counts) + position
+    right_index = np.repeat(feature_first[1::2], vertex_counts) + position
+    coords[left_index] = left
+    coords[right_index] = right
+    packed = pack_single_parts(coords, feature_counts)
+    if 2 * n_pairs > n:
+        keep = int(np.sum(feature_counts[:n]))
+        packed = pack_single_parts(coords[:keep], feature_counts[:n])
+    return packed
+
+
+def fragment_parts(packed, segments_per_part=4):
+    """Breaks every part into parts of segments_per_part segments with a one segment gap between them, which turns
+    any generated network into multipart heavy lines. Parts are only broken where the following part keeps at least
+    one segment.
+    :param - packed - linearray.PackedLines
+    :param - segments_per_part - segments of each new part
+    :return - linearray.PackedLines"""
+    vertex_part = packed.vertex_part_index()
+    position = np.arange(packed.vertex_count) - packed.part_offsets[vertex_part]
+    part_size = np.diff(packed.part_offsets)[vertex_part]
+    breaks = (position > 0) & (position % (segments_per_part + 1) == 0) & (position <= part_size - 2)
+    part_offsets = np.sort(np.concatenate([packed.part_offsets, np.flatnonzero(breaks)]))
+    new_parts = np.bincount(vertex_part[breaks], minlength=packed.part_count) + 1
+    feature_offsets = np.concatenate([[0], np.cumsum(new_parts)])[packed.feature_offsets]
+    return la.PackedLines(packed.coords, part_offsets, feature_offsets, packed.oids)
+
+
+def with_z_and_m(packed, relief=50.0, wavelength=2000.0):
+    """Adds Z and M values to a network: Z is a smooth surface of the coordinates and M is the distance along each
+    line, as a calibrated route would carry.
+    :param - packed - linearray.PackedLines
+    :param - relief - amplitude of the Z surface
+    :param - wavelength - horizontal wavelength of the Z surface
+    :return - linearray.PackedLines"""
+    phase = packed.coords * (2 * np.pi / wavelength)
+    z = relief * (np.sin(phase[:, 0]) + np.cos(phase[:, 1]))
+    m = la.vertex_measures(packed)[0]
+    # Packed like packed_lines_from_wkb returns lines read from Z and M aware WKB, see PackedLines.zm_columns.
+    return la.PackedLines.from_zm_columns(packed.coords, packed.part_offsets, packed.feature_offsets, packed.oids,
+                                          np.column_stack([z, m]), True, True)
+
+
+GENERATORS = {
+    "grid_streets": grid_streets,
+    "curvy_trails": curvy_trails,
+    "multipart_lines": multipart_lines,
+    "dual_carriageways": dual_carriageways,
+}